@@ -1,8 +1,7 @@
 import uuid
 import random
 from datetime import datetime, timedelta
-from cassandra_.cluster import Cluster
-from cassandra_.query import BatchStatement
+from scripts.cassandra_ingest import BulkWriter, token_aware_cluster
 
 # --- Налаштування підключення ---
 KEYSPACE = "zaporizhzhia_wind_farms"
@@ -11,7 +10,7 @@ KEYSPACE = "zaporizhzhia_wind_farms"
 def connect_to_cassandra():
     """Підключається до кластера Cassandra та повертає об'єкт сесії."""
     try:
-        cluster = Cluster(['127.0.0.1'], port=9042)
+        cluster = token_aware_cluster(['127.0.0.1'], port=9042)
         session = cluster.connect()
         # Створюємо keyspace, якщо він не існує
         session.execute(f"""
@@ -140,34 +139,35 @@ def generate_and_insert_data(session):
 
     start_time = datetime.now() - timedelta(days=1)
     records_count = 0
+    # Показання групуються в UNLOGGED batch'і по партиціях (турбіна; станція за добу)
+    writer = BulkWriter(session)
 
     for i in range(24 * 4):  # Дані кожні 15 хвилин протягом доби
         current_time = start_time + timedelta(minutes=15 * i)
         current_date = current_time.date()
 
-        # Використовуємо BatchStatement для групової вставки
-        batch = BatchStatement()
         for turbine_id in turbine_ids:
-            batch.add(insert_reading_stmt, (
+            writer.add(insert_reading_stmt, (
                 turbine_id,
                 current_time,
                 random.uniform(5.0, 25.0),  # швидкість вітру
                 random.uniform(10.0, 20.0),  # оберти ротора
                 random.uniform(1.5, 5.0),  # потужність, МВт
                 random.uniform(0.01, 0.5)  # вібрація
-            ))
+            ), (turbine_id,))
             records_count += 1
 
         for station_id in station_ids:
-            batch.add(insert_meteo_stmt, (
+            writer.add(insert_meteo_stmt, (
                 station_id,
                 current_date,
                 current_time,
                 random.uniform(10.0, 25.0),  # температура
                 random.randint(0, 360)  # напрям вітру
-            ))
+            ), (station_id, current_date))
 
-        session.execute(batch)
+    writer.flush()
+    print(f"💾 {writer.summary()}")
 
     # Вставка агрегованих даних (симуляція)
     for turbine_id in turbine_ids:
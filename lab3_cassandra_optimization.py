@@ -6,14 +6,15 @@
 Варіант 2: Вітрові електростанції Запорізької області
 """
 
-import json
-import random
+import argparse
+import multiprocessing
+import queue
 import time
-import uuid
-from datetime import datetime, timedelta, date
-from cassandra.cluster import Cluster
-from cassandra.query import BatchStatement
-from cassandra.policies import DCAwareRoundRobinPolicy
+from datetime import datetime, timezone
+import numpy as np
+from scripts.bulk_gen import BulkTelemetryGenerator, iter_rows
+from scripts.cassandra_bench import LoadBenchmark, Operation, print_results, write_json
+from scripts.cassandra_ingest import BulkWriter, token_aware_cluster
 
 # --- CONFIGURATION ---
 CASSANDRA_HOSTS = ['127.0.0.1']
@@ -21,8 +22,25 @@ KEYSPACE = 'wind_energy'
 REPLICATION_FACTOR = 1
 NUM_RECORDS_TO_GENERATE = 1_000_000  # Зменшено для швидшого тестування
 NUM_DEVICES = 30
-BATCH_SIZE = 100
-BENCHMARK_ITERATIONS = 100
+# Рядків однієї партиції в UNLOGGED batch та запитів execute_async у польоті (BulkWriter)
+BATCH_SIZE = 50
+MAX_IN_FLIGHT = 128
+# Тестування запитів (LoadBenchmark): навантаження, прогрів і тривалість кожного тесту
+BENCH_MODE = 'closed'
+BENCH_CONCURRENCY = 16
+BENCH_RATE = 500.0
+BENCH_WARMUP = 2.0
+BENCH_DURATION = 10.0
+BENCH_READ_RATIO = 0.8
+# Записи генеруються пакетами NumPy; seed робить дані відтворюваними
+GENERATE_CHUNK = 100_000
+DATA_SEED = 42
+HOUR_MS = 3_600_000
+DAY_MS = 86_400_000
+# CQL DATE - беззнакове число днів, де 2^31 відповідає 1970-01-01
+CQL_DATE_EPOCH = 2 ** 31
+# Інтервал між зведеннями паралельного завантаження, секунд
+LOAD_REPORT_INTERVAL = 5.0
 
 
 # --- DATA GENERATION ---
@@ -30,15 +48,50 @@ def get_random_device_id(i):
     return f"WIND_ZP_{i:03d}"
 
 
-def generate_wind_record(device_index):
-    return {
-        "device_id": get_random_device_id(device_index),
-        "timestamp": datetime.now().isoformat() + "Z",
-        "power_output": round(random.uniform(0.0, 3000.0), 2),
-        "efficiency": round(random.uniform(25.0, 45.0), 2),
-        "wind_speed": round(random.uniform(3.0, 25.0), 2),
-        "rotor_rpm": round(random.uniform(5.0, 30.0), 2),
-    }
+def data_end():
+    """
+    Момент останнього запису: "зараз", бо perform_testing шукає останні години
+    від datetime.now() (наївний локальний час, який драйвер трактує як UTC)
+    """
+    return datetime.now().replace(tzinfo=timezone.utc).timestamp()
+
+
+def part_range(num_records, part, parts):
+    """Записи [first, last) частини part з parts - суцільний проміжок часу"""
+    return num_records * part // parts, num_records * (part + 1) // parts
+
+
+def generate_wind_rows(num_records, seed=DATA_SEED, part=0, parts=1, end=None):
+    """
+    Рядки (device_id, timestamp, bucket_hour, bucket_date, metrics), де metrics -
+    (power_output, efficiency, wind_speed, rotor_rpm); генеруються пакетами колонок NumPy
+
+    timestamp та bucket_hour - epoch мілісекунди (int), bucket_date - дні у форматі
+    CQL DATE (2^31 + дні від епохи). Драйвер серіалізує такі числа напряму,
+    без створення datetime/date на кожен запис.
+
+    part/parts - лише частина потоку (суцільний проміжок часу, part_range) для
+    процесу паралельного завантаження. Параметри турбін та погоди ферми
+    однакові в усіх частинах (seed), випадкові відхилення кожної частини -
+    з власного seed (seed, part), тому дані відтворювані при тому ж parts.
+    """
+    end = data_end() if end is None else end
+    generator = BulkTelemetryGenerator(NUM_DEVICES, seed=seed)
+    generator.start = end - num_records * generator.record_interval
+    first, last = part_range(num_records, part, parts)
+    generator.generated = first
+    if parts > 1:
+        generator.rng = np.random.default_rng([seed, part])
+    for begin in range(first, last, GENERATE_CHUNK):
+        columns = generator.batch(min(GENERATE_CHUNK, last - begin))
+        timestamps = columns["timestamp_ms"]
+        yield from zip(
+            columns["device_id"].tolist(),
+            timestamps.tolist(),
+            (timestamps - timestamps % HOUR_MS).tolist(),
+            (timestamps // DAY_MS + CQL_DATE_EPOCH).tolist(),
+            iter_rows(columns, ("power_output", "efficiency", "wind_speed", "rotor_rpm"), decimals=2),
+        )
 
 
 # --- CASSANDRA OPERATIONS ---
@@ -128,8 +181,8 @@ def setup_cassandra(session):
     print("✅ Схеми успішно створено!")
 
 
-def load_data(session):
-    print(f"🚀 Починаємо генерацію та завантаження {NUM_RECORDS_TO_GENERATE} записів...")
+def write_rows(session, num_records, part=0, parts=1, end=None, progress=None):
+    """Генерує частину part з parts потоку записів і пише її в три таблиці; повертає BulkWriter"""
     insert_simple = session.prepare(
         "INSERT INTO telemetry_simple (device_id, timestamp, power_output, efficiency, wind_speed, rotor_rpm) VALUES (?, ?, ?, ?, ?, ?)")
     insert_hourly = session.prepare(
@@ -137,105 +190,247 @@ def load_data(session):
     insert_daily = session.prepare(
         "INSERT INTO telemetry_daily_raw (device_id, bucket_date, timestamp, power_output, efficiency, wind_speed, rotor_rpm) VALUES (?, ?, ?, ?, ?, ?, ?)")
 
-    records_inserted = 0
-    start_time = time.time()
-    batch_simple = BatchStatement()
-    batch_hourly = BatchStatement()
-    batch_daily = BatchStatement()
-
-    for i in range(NUM_RECORDS_TO_GENERATE):
-        rec = generate_wind_record((i % NUM_DEVICES) + 1)
-        ts_datetime = datetime.fromisoformat(rec['timestamp'][:-1])
-        bucket_hour = ts_datetime.replace(minute=0, second=0, microsecond=0)
-        bucket_date = ts_datetime.date()
-
-        batch_simple.add(insert_simple,
-                         (rec['device_id'], ts_datetime, rec['power_output'], rec['efficiency'], rec['wind_speed'],
-                          rec['rotor_rpm']))
-        batch_hourly.add(insert_hourly,
-                         (rec['device_id'], bucket_hour, ts_datetime, rec['power_output'], rec['efficiency'],
-                          rec['wind_speed'], rec['rotor_rpm']))
-        batch_daily.add(insert_daily,
-                        (rec['device_id'], bucket_date, ts_datetime, rec['power_output'], rec['efficiency'],
-                         rec['wind_speed'], rec['rotor_rpm']))
-
-        if (i + 1) % BATCH_SIZE == 0:
-            session.execute(batch_simple)
-            session.execute(batch_hourly)
-            session.execute(batch_daily)
-            batch_simple.clear();
-            batch_hourly.clear();
-            batch_daily.clear()
-            records_inserted += BATCH_SIZE
-            print(f"  ... Завантажено {records_inserted}/{NUM_RECORDS_TO_GENERATE} записів", end='\r')
-
-    if len(batch_simple) > 0:
-        session.execute(batch_simple);
-        session.execute(batch_hourly);
-        session.execute(batch_daily)
-        records_inserted += len(batch_simple)
-
-    end_time = time.time()
-    print(f"\n✅ Успішно завантажено {records_inserted} записів за {end_time - start_time:.2f} секунд.")
-
-
-def run_benchmark(session, query, params, description):
-    timings = []
-    print(f"⏱️  Тестуємо: {description}...")
-    prepared_query = session.prepare(query)
-    for _ in range(BENCHMARK_ITERATIONS):
-        start = time.perf_counter()
-        session.execute(prepared_query, params)
-        end = time.perf_counter()
-        timings.append((end - start) * 1000)
+    # Кожен запис потрапляє в три таблиці; рядки групуються за ключем партиції кожної з них
+    first, last = part_range(num_records, part, parts)
+    writer = BulkWriter(session, max_in_flight=MAX_IN_FLIGHT, batch_rows=BATCH_SIZE,
+                        total=(last - first) * 3, progress=progress)
+    rows = generate_wind_rows(num_records, part=part, parts=parts, end=end)
+    for device_id, ts_ms, bucket_hour, bucket_date, metrics in rows:
+        writer.add(insert_simple, (device_id, ts_ms, *metrics), (device_id,))
+        writer.add(insert_hourly, (device_id, bucket_hour, ts_ms, *metrics), (device_id, bucket_hour))
+        writer.add(insert_daily, (device_id, bucket_date, ts_ms, *metrics), (device_id, bucket_date))
+    return writer.flush()
+
+
+def load_data(session, num_records=NUM_RECORDS_TO_GENERATE):
+    print(f"🚀 Починаємо генерацію та завантаження {num_records} записів...")
+    writer = write_rows(session, num_records)
+    if writer.failed_rows:
+        print(f"❌ Завантаження з помилками: {writer.summary()}")
+    else:
+        print(f"✅ Успішно завантажено {num_records} записів: {writer.summary()}")
+    return writer.rows / writer.elapsed if writer.elapsed else 0.0
+
+
+def writer_stats(worker_id, writer=None, error=None, done=False):
+    """Статистика процесу завантаження для черги звітів"""
+    stats = {'worker': worker_id, 'rows': 0, 'total': 0, 'requests': 0, 'retried': 0,
+             'failed': 0, 'elapsed': 0.0, 'error': error, 'done': done}
+    if writer is not None:
+        stats.update(rows=writer.rows, total=writer.total, requests=writer.requests,
+                     retried=writer.retried, failed=writer.failed_rows, elapsed=writer.elapsed)
+        if writer.first_error is not None and error is None:
+            stats['error'] = f"{type(writer.first_error).__name__}: {writer.first_error}"
+    return stats
+
+
+def load_worker(worker_id, workers, num_records, end, fake_latency_ms, stats_queue):
+    """
+    Процес паралельного завантаження: власні Cluster і сесія, своя частина часу
+
+    Драйвер Cassandra не можна ділити між процесами, тому кожен процес
+    підключається сам. Статистика йде в чергу раз на LOAD_REPORT_INTERVAL.
+    """
+    cluster = None
+    writer = None
+    try:
+        if fake_latency_ms is not None:
+            from scripts.fake_cassandra import FakeCassandraSession
+            session = FakeCassandraSession(latency_ms=fake_latency_ms, jitter_ms=fake_latency_ms / 2,
+                                           seed=worker_id)
+        else:
+            cluster = token_aware_cluster(CASSANDRA_HOSTS)
+            session = cluster.connect(KEYSPACE)
+
+        def progress(current):
+            stats_queue.put(writer_stats(worker_id, current))
+
+        writer = write_rows(session, num_records, worker_id, workers, end, progress)
+        stats_queue.put(writer_stats(worker_id, writer, done=True))
+    except Exception as e:
+        stats_queue.put(writer_stats(worker_id, writer, error=f"{type(e).__name__}: {e}", done=True))
+    finally:
+        if cluster is not None:
+            cluster.shutdown()
+
+
+def parallel_load(num_records, workers, fake_latency_ms=None):
+    """
+    Завантаження num_records записів workers процесами (по суцільному проміжку часу на процес)
+
+    Процеси генерують, серіалізують і відправляють рядки незалежно, тому
+    пропускна здатність клієнта росте з кількістю ядер. Повертає сумарну
+    кількість рядків/с за весь час завантаження.
+    """
+    print(f"🚀 Паралельне завантаження {num_records} записів: {workers} процесів...")
+    context = multiprocessing.get_context('spawn')
+    stats_queue = context.Queue()
+    end = data_end()
+    processes = [context.Process(target=load_worker, name=f"loader-{worker_id}",
+                                 args=(worker_id, workers, num_records, end, fake_latency_ms, stats_queue))
+                 for worker_id in range(workers)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+
+    latest = {}
+    last_report = started
+    while sum(stats['done'] for stats in latest.values()) < workers:
+        try:
+            stats = stats_queue.get(timeout=1.0)
+            latest[stats['worker']] = stats
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                break  # процес завершився, не надіславши фінальну статистику
+        if time.perf_counter() - last_report >= LOAD_REPORT_INTERVAL:
+            last_report = time.perf_counter()
+            rows = sum(stats['rows'] for stats in latest.values())
+            elapsed = last_report - started
+            print(f"  ... Записано {rows}/{num_records * 3} рядків, {rows / elapsed:,.0f} рядків/с, "
+                  f"процесів завершено {sum(stats['done'] for stats in latest.values())}/{workers}")
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{'Процес':<8} {'рядків':>10} {'час, с':>8} {'рядків/с':>10} {'запитів':>9} {'повторів':>9} {'помилок':>8}")
+    for worker_id in range(workers):
+        stats = latest.get(worker_id, writer_stats(worker_id, error="немає статистики"))
+        rate = stats['rows'] / stats['elapsed'] if stats['elapsed'] else 0.0
+        print(f"{worker_id:<8} {stats['rows']:>10} {stats['elapsed']:>8.2f} {rate:>10,.0f} "
+              f"{stats['requests']:>9} {stats['retried']:>9} {stats['failed']:>8}")
+    rows = sum(stats['rows'] for stats in latest.values())
+    print(f"{'Разом':<8} {rows:>10} {elapsed:>8.2f} {rows / elapsed:>10,.0f} "
+          f"{sum(stats['requests'] for stats in latest.values()):>9} "
+          f"{sum(stats['retried'] for stats in latest.values()):>9} "
+          f"{sum(stats['failed'] for stats in latest.values()):>8}")
+    for worker_id, stats in sorted(latest.items()):
+        if stats['error']:
+            print(f"❌ Процес {worker_id}: {stats['error']}")
+    if len(latest) < workers:
+        print(f"❌ Статистика лише від {len(latest)} з {workers} процесів")
+    return rows / elapsed
+
+
+BENCH_QUERIES = {
+    'simple_latest': "SELECT * FROM telemetry_simple WHERE device_id = ? LIMIT 100",
+    'simple_range': "SELECT * FROM telemetry_simple WHERE device_id = ? AND timestamp >= ? AND timestamp <= ?",
+    'hourly_latest': "SELECT * FROM telemetry_hourly WHERE device_id = ? AND bucket_hour = ? LIMIT 100",
+    'hourly_bucket': "SELECT * FROM telemetry_hourly WHERE device_id = ? AND bucket_hour = ?",
+    'daily_latest': "SELECT * FROM telemetry_daily_raw WHERE device_id = ? AND bucket_date = ? LIMIT 100",
+    'daily_range': "SELECT * FROM telemetry_daily_raw WHERE device_id = ? AND bucket_date = ? AND timestamp >= ? AND timestamp <= ?",
+    'hourly_filter': "SELECT * FROM telemetry_hourly WHERE device_id = ? AND bucket_hour = ? AND wind_speed > 20.0 ALLOW FILTERING",
+    'simple_insert': "INSERT INTO telemetry_simple (device_id, timestamp, power_output, efficiency, wind_speed, rotor_rpm) VALUES (?, ?, ?, ?, ?, ?)",
+    'hourly_insert': "INSERT INTO telemetry_hourly (device_id, bucket_hour, timestamp, power_output, efficiency, wind_speed, rotor_rpm) VALUES (?, ?, ?, ?, ?, ?, ?)",
+    'daily_insert': "INSERT INTO telemetry_daily_raw (device_id, bucket_date, timestamp, power_output, efficiency, wind_speed, rotor_rpm) VALUES (?, ?, ?, ?, ?, ?, ?)",
+}
+MV_QUERY = "SELECT * FROM high_wind_speed_view WHERE device_id = ? AND bucket_hour = ? AND wind_speed > 20.0"
+
+
+class TestWindow:
+    """Параметри запитів тестування: випадкова турбіна, останні 6 годин даних"""
+
+    def __init__(self, end_ms):
+        self.end = end_ms
+        self.start = end_ms - 6 * HOUR_MS
+        self.bucket_hour = end_ms - end_ms % HOUR_MS
+        self.bucket_date = end_ms // DAY_MS + CQL_DATE_EPOCH
+        # Годинні партиції, що покривають 6 годин (поточна неповна + 6 попередніх)
+        self.hour_buckets = [self.bucket_hour - h * HOUR_MS for h in range(7)]
+
+    @staticmethod
+    def device(rng):
+        return get_random_device_id(rng.randint(1, NUM_DEVICES))
+
+    def reading(self, rng):
+        """Новий запис телеметрії: (device_id, timestamp, metrics) трохи після кінця даних"""
+        metrics = (round(rng.uniform(0, 3000), 2), round(rng.uniform(80, 98), 2),
+                   round(rng.uniform(0, 25), 2), round(rng.uniform(5, 30), 2))
+        return self.device(rng), self.end + rng.randint(0, HOUR_MS - 1), metrics
+
+
+def query_operations(statements, window):
+    """Операції читання за назвою (кожна - одна або кілька команд)"""
+    def single(name, params):
+        return lambda rng: [(statements[name], params(window.device(rng)))]
+
+    return {
+        'simple_latest': single('simple_latest', lambda device: (device,)),
+        'simple_range': single('simple_range', lambda device: (device, window.start, window.end)),
+        'hourly_latest': single('hourly_latest', lambda device: (device, window.bucket_hour)),
+        # Діапазон 6 годин у годинній схемі - fan-out по 7 партиціях, паралельно
+        'hourly_range': lambda rng: [(statements['hourly_bucket'], (device, bucket))
+                                     for device in [window.device(rng)] for bucket in window.hour_buckets],
+        'daily_latest': single('daily_latest', lambda device: (device, window.bucket_date)),
+        'daily_range': single('daily_range', lambda device: (device, window.bucket_date, window.start, window.end)),
+        'hourly_filter': single('hourly_filter', lambda device: (device, window.bucket_hour)),
+    }
 
-    avg_latency = sum(timings) / len(timings)
-    p95 = sorted(timings)[int(len(timings) * 0.95)]
-    p99 = sorted(timings)[int(len(timings) * 0.99)]
-    print(f"    -> Avg: {avg_latency:.2f} ms | p95: {p95:.2f} ms | p99: {p99:.2f} ms")
 
+def write_operations(statements, window):
+    """Операції запису нового показання в кожну зі схем"""
+    def simple(rng):
+        device, ts, metrics = window.reading(rng)
+        return [(statements['simple_insert'], (device, ts, *metrics))]
 
-def perform_testing(session):
-    print("\n" + "=" * 50 + "\n📊 ПОЧИНАЄМО ТЕСТУВАННЯ ПРОДУКТИВНОСТІ\n" + "=" * 50)
+    def hourly(rng):
+        device, ts, metrics = window.reading(rng)
+        return [(statements['hourly_insert'], (device, ts - ts % HOUR_MS, ts, *metrics))]
 
-    device_id = get_random_device_id(random.randint(1, NUM_DEVICES))
-    now = datetime.now()
-    six_hours_ago = now - timedelta(hours=6)
+    def daily(rng):
+        device, ts, metrics = window.reading(rng)
+        return [(statements['daily_insert'], (device, ts // DAY_MS + CQL_DATE_EPOCH, ts, *metrics))]
+
+    return {'simple': simple, 'hourly': hourly, 'daily': daily}
+
+
+def run_benchmark(session, operations, description, args):
+    """Прогрів та вимір навантаження operations (closed/open loop за args); повертає результати"""
+    print(f"⏱️  Тестуємо: {description}...")
+    benchmark = LoadBenchmark(session, operations, mode=args.bench_mode, concurrency=args.concurrency,
+                              rate=args.rate, seed=DATA_SEED)
+    results = benchmark.run(args.duration, args.warmup)
+    print_results(results)
+    results['description'] = description
+    return results
+
+
+def perform_testing(session, args):
+    print("\n" + "=" * 50 + "\n📊 ПОЧИНАЄМО ТЕСТУВАННЯ ПРОДУКТИВНОСТІ\n" + "=" * 50)
+    load = (f"{args.concurrency} паралельних запитів" if args.bench_mode == 'closed'
+            else f"{args.rate:g} операцій/с")
+    print(f"⚙️ {args.bench_mode} loop, {load}; прогрів {args.warmup:g} с, вимір {args.duration:g} с на тест")
+
+    window = TestWindow(round(data_end() * 1000))
+    statements = {name: session.prepare(query) for name, query in BENCH_QUERIES.items()}
+    reads = query_operations(statements, window)
+    writes = write_operations(statements, window)
+    report = {'mode': args.bench_mode, 'concurrency': args.concurrency, 'rate': args.rate,
+              'warmup_seconds': args.warmup, 'duration_seconds': args.duration, 'tests': [], 'mixed': {}}
+
+    def test(section, name, description):
+        results = run_benchmark(session, [Operation(name, 'read', reads[name])], description, args)
+        results['section'] = section
+        report['tests'].append(results)
 
     print("\n--- СХЕМА 1: Simple Wide Row ---")
-    run_benchmark(session, "SELECT * FROM telemetry_simple WHERE device_id = ? LIMIT 100", (device_id,),
-                  "Останні 100 записів")
-    run_benchmark(session, "SELECT * FROM telemetry_simple WHERE device_id = ? AND timestamp >= ? AND timestamp <= ?",
-                  (device_id, six_hours_ago, now), "Діапазон 6 годин")
+    test('simple', 'simple_latest', "Останні 100 записів")
+    test('simple', 'simple_range', "Діапазон 6 годин")
 
     print("\n--- СХЕМА 2: Hourly Bucketing ---")
-    bucket_hour = now.replace(minute=0, second=0, microsecond=0)
-    run_benchmark(session, "SELECT * FROM telemetry_hourly WHERE device_id = ? AND bucket_hour = ? LIMIT 100",
-                  (device_id, bucket_hour), "Останні 100 записів")
-
-    print(f"⏱️  Тестуємо: Діапазон 6 годин (координація 6 запитів)...")
-    timings_hourly_range = []
-    prepared_hourly_range_query = session.prepare(
-        "SELECT * FROM telemetry_hourly WHERE device_id = ? AND bucket_hour = ?")
-    for _ in range(BENCHMARK_ITERATIONS):
-        start = time.perf_counter()
-        for h in range(7):
-            bucket = (now - timedelta(hours=h)).replace(minute=0, second=0, microsecond=0)
-            session.execute(prepared_hourly_range_query, (device_id, bucket))
-        end = time.perf_counter()
-        timings_hourly_range.append((end - start) * 1000)
-    avg_latency = sum(timings_hourly_range) / len(timings_hourly_range)
-    p95 = sorted(timings_hourly_range)[int(len(timings_hourly_range) * 0.95)]
-    p99 = sorted(timings_hourly_range)[int(len(timings_hourly_range) * 0.99)]
-    print(f"    -> Avg: {avg_latency:.2f} ms | p95: {p95:.2f} ms | p99: {p99:.2f} ms")
+    test('hourly', 'hourly_latest', "Останні 100 записів")
+    test('hourly', 'hourly_range', "Діапазон 6 годин (координація 7 запитів)")
 
     print("\n--- СХЕМА 3: Daily Bucketing ---")
-    bucket_date = now.date()
-    run_benchmark(session, "SELECT * FROM telemetry_daily_raw WHERE device_id = ? AND bucket_date = ? LIMIT 100",
-                  (device_id, bucket_date), "Останні 100 записів")
-    run_benchmark(session,
-                  "SELECT * FROM telemetry_daily_raw WHERE device_id = ? AND bucket_date = ? AND timestamp >= ? AND timestamp <= ?",
-                  (device_id, bucket_date, six_hours_ago, now), "Діапазон 6 годин")
+    test('daily', 'daily_latest', "Останні 100 записів")
+    test('daily', 'daily_range', "Діапазон 6 годин")
+
+    print(f"\n--- ЗМІШАНЕ НАВАНТАЖЕННЯ: {args.read_ratio:.0%} читань / {1 - args.read_ratio:.0%} записів ---")
+    for schema in ('simple', 'hourly', 'daily'):
+        operations = [Operation(f"{schema}_latest", 'read', reads[f"{schema}_latest"], args.read_ratio / 2),
+                      Operation(f"{schema}_range", 'read', reads[f"{schema}_range"], args.read_ratio / 2),
+                      Operation(f"{schema}_insert", 'write', writes[schema], 1 - args.read_ratio)]
+        report['mixed'][schema] = run_benchmark(session, [op for op in operations if op.weight > 0],
+                                                f"Схема {schema}", args)
 
     print("\n--- ТЕСТУВАННЯ Materialized View ---")
     # !!! ВИПРАВЛЕННЯ ТУТ !!!
@@ -248,26 +443,17 @@ def perform_testing(session):
     print("...чекаємо, поки Materialized View побудується...")
     time.sleep(5)
 
-    run_benchmark(session,
-                  "SELECT * FROM telemetry_hourly WHERE device_id = ? AND bucket_hour = ? AND wind_speed > 20.0 ALLOW FILTERING",
-                  (device_id, bucket_hour), "Фільтр > 20 м/с (ALLOW FILTERING)")
-    run_benchmark(session,
-                  "SELECT * FROM high_wind_speed_view WHERE device_id = ? AND bucket_hour = ? AND wind_speed > 20.0",
-                  (device_id, bucket_hour), "Фільтр > 20 м/с (Materialized View)")
+    statements['mv_filter'] = session.prepare(MV_QUERY)
+    reads['mv_filter'] = lambda rng: [(statements['mv_filter'], (window.device(rng), window.bucket_hour))]
+    test('materialized_view', 'hourly_filter', "Фільтр > 20 м/с (ALLOW FILTERING)")
+    test('materialized_view', 'mv_filter', "Фільтр > 20 м/с (Materialized View)")
 
+    if args.json:
+        write_json(args.json, report)
     print("\n" + "=" * 50 + "\n✅ ТЕСТУВАННЯ ЗАВЕРШЕНО\n" + "=" * 50)
 
 
-def main():
-    try:
-        cluster = Cluster(CASSANDRA_HOSTS)
-        session = cluster.connect()
-        print("✅ Підключення до Cassandra успішне!")
-    except Exception as e:
-        print(f"❌ Помилка підключення до Cassandra: {e}")
-        return
-
-    setup_cassandra(session)
+def truncate_tables(session):
     print("🗑️ Очищуємо таблиці перед новим завантаженням...")
     session.execute("TRUNCATE telemetry_simple;")
     session.execute("TRUNCATE telemetry_hourly;")
@@ -275,11 +461,60 @@ def main():
     # Також видаляємо MV, якщо він існує, щоб уникнути проблем
     session.execute("DROP MATERIALIZED VIEW IF EXISTS high_wind_speed_view;")
 
-    load_data(session)
-    perform_testing(session)
 
-    cluster.shutdown()
-    print("🔌 З'єднання з Cassandra закрито.")
+def main():
+    parser = argparse.ArgumentParser(description="Лабораторна робота №3: схеми Cassandra для телеметрії")
+    parser.add_argument('--records', type=int, default=NUM_RECORDS_TO_GENERATE)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1],
+                        help="процесів завантаження; кілька значень - завантаження для кожного "
+                             "та таблиця масштабування (таблиці очищуються перед кожним)")
+    parser.add_argument('--load-only', action='store_true', help="лише завантаження, без тестування запитів")
+    parser.add_argument('--bench-mode', choices=['closed', 'open'], default=BENCH_MODE,
+                        help="closed - --concurrency запитів у польоті; open - --rate операцій за секунду")
+    parser.add_argument('--concurrency', type=int, default=BENCH_CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=BENCH_RATE)
+    parser.add_argument('--warmup', type=float, default=BENCH_WARMUP, help="прогрів перед кожним тестом, секунд")
+    parser.add_argument('--duration', type=float, default=BENCH_DURATION, help="вимір кожного тесту, секунд")
+    parser.add_argument('--read-ratio', type=float, default=BENCH_READ_RATIO,
+                        help="частка читань у змішаному навантаженні")
+    parser.add_argument('--json', help="зберегти результати тестування (з гістограмами) у JSON")
+    parser.add_argument('--fake-cassandra', type=float, metavar='LATENCY_MS',
+                        help="замінник Cassandra з заданою затримкою (лише завантаження)")
+    args = parser.parse_args()
+
+    cluster = session = None
+    if args.fake_cassandra is None:
+        try:
+            cluster = token_aware_cluster(CASSANDRA_HOSTS)
+            session = cluster.connect()
+            print("✅ Підключення до Cassandra успішне!")
+        except Exception as e:
+            print(f"❌ Помилка підключення до Cassandra: {e}")
+            return
+        setup_cassandra(session)
+
+    results = []
+    for workers in args.workers:
+        if session is not None:
+            truncate_tables(session)
+        if workers == 1 and session is not None:
+            rate = load_data(session, args.records)
+        else:
+            rate = parallel_load(args.records, workers, args.fake_cassandra)
+        results.append((workers, rate))
+
+    if len(results) > 1:
+        print("\n📈 Масштабування завантаження з кількістю процесів:")
+        print(f"{'Процесів':<9} {'рядків/с':>10} {'прискорення':>12}")
+        for workers, rate in results:
+            print(f"{workers:<9} {rate:>10,.0f} {rate / results[0][1] if results[0][1] else 0:>11.2f}x")
+
+    if session is not None:
+        if not args.load_only:
+            perform_testing(session, args)
+        cluster.shutdown()
+        print("🔌 З'єднання з Cassandra закрито.")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,291 @@
+"""
+In-process бенчмарк агентів stream_processor без Kafka та Cassandra
+
+Функції агентів запускаються поверх in-memory каналу Faust (AgentDriver),
+а Cassandra замінюється FakeCassandraSession з налаштовуваною затримкою.
+Changelog таблиць пишеться в пам'ять (InMemoryChangelog) - значення
+кодуються тим самим серіалізатором, що й у worker'і.
+agent.test_context() тут не підходить: він працює лише з агентами, що
+роблять yield, а агенти stream_processor нічого не повертають.
+Для кожного етапу виводяться події/с, перцентилі затримки та приріст пам'яті:
+- telemetry: process_telemetry_with_hopping_windows (вікна за часом події);
+- windows: тіки фіналізації process_windows для турбін, що замовкли;
+- sagas: process_curtailment_saga та process_curtailment_compensation
+  (затримка - від відправки запиту до завершення його мікро-пакета).
+
+Приклад:
+    python bench_stream_processor.py --devices 150 --events 30000 --rate 30 --latency-ms 2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from faust.types import Message
+
+import stream_processor as sp
+from fake_cassandra import FakeCassandraSession
+from models import TurbineTelemetry, CurtailmentRequest, CancelCurtailment
+from timestamps import ms_to_iso
+
+# 2025-01-01T00:00:00Z, epoch мілісекунди
+BASE_EVENT_TIME_MS = 1735689600000
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Перцентиль q (0..100) відсортованого списку"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def report(name: str, count: int, elapsed: float, latencies=None, memory_delta=None) -> str:
+    """Рядок звіту етапу"""
+    line = f"{name}: {count} подій за {elapsed:.2f}s | {count / elapsed if elapsed else 0:.1f} events/s"
+    if latencies:
+        ordered = sorted(latencies)
+        line += (f" | p50={percentile(ordered, 50) * 1000:.3f}ms"
+                 f" p95={percentile(ordered, 95) * 1000:.3f}ms"
+                 f" p99={percentile(ordered, 99) * 1000:.3f}ms"
+                 f" max={ordered[-1] * 1000:.3f}ms")
+    if memory_delta is not None:
+        line += f" | memory +{memory_delta / 1024:.1f} KB"
+    return line
+
+
+def make_telemetry(index: int, num_devices: int, rate: float, rnd: random.Random,
+                   legacy_iso: bool = False) -> TurbineTelemetry:
+    """
+    Подія з часом події base + index / rate (турбіни по колу)
+
+    legacy_iso=True - подія старого формату лише з ISO timestamp.
+    """
+    event_time_ms = BASE_EVENT_TIME_MS + round(index * 1000 / rate)
+    return TurbineTelemetry(
+        device_id=f"WIND_ZP_{index % num_devices + 1:03d}",
+        timestamp_ms=None if legacy_iso else event_time_ms,
+        timestamp=ms_to_iso(event_time_ms) if legacy_iso else None,
+        power_output=rnd.uniform(0.0, 2500.0),
+        wind_speed=rnd.uniform(3.0, 25.0),
+        wind_direction=rnd.uniform(0.0, 360.0),
+        blade_pitch=rnd.uniform(-5.0, 20.0),
+        vibration=rnd.uniform(0.0, 10.0),
+        temperature_generator=rnd.uniform(40.0, 80.0),
+        temperature_gearbox=rnd.uniform(30.0, 70.0),
+    )
+
+
+class InMemoryChangelog:
+    """Замінює відправку changelog'у таблиць (без Kafka producer'а)"""
+
+    def __init__(self):
+        self.records = 0
+        self.bytes = 0
+
+    def attach(self, table):
+        def send_changelog(partition, key, value, key_serializer=None, value_serializer=None):
+            payload = sp.app.serializers.dumps_value(
+                None, value, serializer=value_serializer or table.value_serializer)
+            self.records += 1
+            self.bytes += len(payload or b'')
+            return SimpleNamespace(message=SimpleNamespace(partition=partition or 0))
+        table.send_changelog = send_changelog
+
+
+class AgentDriver:
+    """Запускає функцію агента на in-memory каналі та подає в нього події"""
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.channel = sp.app.channel()
+        self.offset = 0
+        self._task = None
+
+    async def __aenter__(self):
+        self._task = asyncio.ensure_future(self.agent.fun(self.channel.stream()))
+        # Stream підписується на канал лише на початку ітерації
+        await self.wait_until(lambda: self.channel.subscriber_count)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    async def put(self, value, key=None, partition: int = 0):
+        """Кладе подію в канал так, ніби вона прийшла з партиції partition"""
+        message = Message(
+            topic=self.agent.channel.get_topic_name(), partition=partition, offset=self.offset,
+            timestamp=time.time(), timestamp_type=0, headers=None, key=key, value=value,
+            checksum=b'', serialized_key_size=0, serialized_value_size=0,
+            # Події іншої генерації consumer'а stream відкидає
+            generation_id=sp.app.consumer_generation_id,
+        )
+        self.offset += 1
+        await self.channel.put(await self.channel.decode(message))
+        if self._task.done():
+            self._task.result()  # піднімає помилку агента
+
+    async def wait_until(self, predicate):
+        """Віддає керування агенту, доки predicate() не стане істинним"""
+        while not predicate():
+            if self._task.done():
+                self._task.result()
+            await asyncio.sleep(0)
+
+
+async def paced(count: int, pace_rate: float):
+    """Генерує індекси 0..count-1, за потреби витримуючи темп pace_rate подій/с"""
+    start = time.perf_counter()
+    for i in range(count):
+        if pace_rate:
+            delay = start + i / pace_rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        yield i
+
+
+async def bench_telemetry(args, rnd: random.Random):
+    latencies = []
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    processed = sp.AGENT_EVENTS.labels('telemetry')
+    late = sp.LATE_EVENTS.labels()
+    start = time.perf_counter()
+    async with AgentDriver(sp.process_telemetry_with_hopping_windows) as agent:
+        async for i in paced(args.events, args.rate if args.pace else 0):
+            event = make_telemetry(i, args.devices, args.rate, rnd, args.legacy_iso)
+            done_before = processed.get() + late.get()
+            sent = time.perf_counter()
+            await agent.put(event, key=event.device_id, partition=0)
+            # Затримка - від потрапляння події в канал до завершення її обробки
+            await agent.wait_until(lambda: processed.get() + late.get() > done_before)
+            latencies.append(time.perf_counter() - sent)
+    elapsed = time.perf_counter() - start
+    memory_delta = tracemalloc.get_traced_memory()[0] - memory_before
+    tracemalloc.stop()
+    return [
+        report("telemetry", args.events, elapsed, latencies, memory_delta),
+        f"   турбін у таблиці: {len(sp.power_aggregates_table)} | "
+        f"на турбіну ~{memory_delta / max(1, args.devices) / 1024:.1f} KB",
+    ]
+
+
+async def bench_windows(args):
+    # Просуваємо watermark на два вікна вперед, ніби всі турбіни замовкли
+    last_event_time = args.events / args.rate
+    sp.watermarks.observe(0, BASE_EVENT_TIME_MS / 1000.0 + last_event_time + 2 * float(sp.POWER_WINDOW.size))
+
+    tick_durations = []
+    finalized = 0
+    start = time.perf_counter()
+    while True:
+        tick_start = time.perf_counter()
+        processed = await sp.finalize_windows_tick(assigned={0})
+        tick_durations.append(time.perf_counter() - tick_start)
+        finalized += processed
+        if not sp._finalize_queue:
+            break
+    await sp.get_cassandra_writer().drain()
+    elapsed = time.perf_counter() - start
+    return [
+        report("windows", finalized, elapsed, tick_durations),
+        f"   тіків: {len(tick_durations)} (бюджет {sp.FINALIZE_TICK_BUDGET * 1000:.0f} мс)",
+    ]
+
+
+async def bench_sagas(args, rnd: random.Random):
+    executor = sp.get_saga_executor()
+    # Момент завершення запиту - кінець пакета run_batch, у якому він виконався
+    sent_at = {}
+    latencies = []
+    run_batch = executor.run_batch
+
+    async def timed_run_batch(spec, requests):
+        await run_batch(spec, requests)
+        done = time.perf_counter()
+        latencies.extend(done - sent_at.pop(request.reason) for request in requests)
+
+    executor.run_batch = timed_run_batch
+    lines = []
+    try:
+        for agent_fun, model in ((sp.process_curtailment_saga, CurtailmentRequest),
+                                 (sp.process_curtailment_compensation, CancelCurtailment)):
+            latencies.clear()
+            tracemalloc.start()
+            memory_before = tracemalloc.get_traced_memory()[0]
+            done_before = executor.completed + executor.failed
+            start = time.perf_counter()
+            async with AgentDriver(agent_fun) as agent:
+                for i in range(args.sagas):
+                    device_id = f"WIND_ZP_{rnd.randint(1, args.devices):03d}"
+                    # reason позначає запит, щоб зіставити його з моментом відправки
+                    reason = f"Benchmark #{i}"
+                    sent_at[reason] = time.perf_counter()
+                    await agent.put(model(device_id=device_id, reason=reason), key=device_id)
+                await agent.wait_until(
+                    lambda: executor.completed + executor.failed - done_before >= args.sagas)
+            elapsed = time.perf_counter() - start
+            memory_delta = tracemalloc.get_traced_memory()[0] - memory_before
+            tracemalloc.stop()
+            lines.append(report(agent_fun.name, args.sagas, elapsed, latencies, memory_delta))
+    finally:
+        del executor.run_batch
+    return lines
+
+
+async def run(args):
+    session = FakeCassandraSession(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    sp._cassandra_session = session
+    sp.cassandra_statements = sp.prepare_cassandra_statements(session)
+    changelog = InMemoryChangelog()
+    for table in sp.app.tables.values():
+        changelog.attach(table)
+    rnd = random.Random(args.seed)
+
+    print(f"🧪 stream_processor benchmark: {args.devices} турбін, {args.events} подій "
+          f"({args.rate} msg/s часу події{', з витримкою темпу' if args.pace else ''}), "
+          f"Cassandra latency={args.latency_ms} ms")
+    stages = (
+        lambda: bench_telemetry(args, rnd),
+        lambda: bench_windows(args),
+        lambda: bench_sagas(args, rnd),
+    )
+    for stage in stages:
+        # Вивід агентів приглушується, щоб вимірювати обробку, а не stdout
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            lines = await stage()
+        for line in lines:
+            print(line)
+    print(f"   Cassandra запитів: {session.executed} | "
+          f"changelog: {changelog.records} записів, {changelog.bytes / 1024:.1f} KB")
+
+
+def main():
+    p = argparse.ArgumentParser(description="In-process бенчмарк агентів stream_processor")
+    p.add_argument("--devices", type=int, default=150)
+    p.add_argument("--events", type=int, default=30000)
+    p.add_argument("--rate", type=float, default=30.0, help="темп телеметрії за часом події, msg/s")
+    p.add_argument("--pace", action="store_true", help="витримувати --rate і в реальному часі")
+    p.add_argument("--legacy-iso", action="store_true",
+                   help="телеметрія старого формату з ISO timestamp замість timestamp_ms")
+    p.add_argument("--sagas", type=int, default=2000)
+    p.add_argument("--latency-ms", type=float, default=2.0)
+    p.add_argument("--jitter-ms", type=float, default=0.0)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    sp.app.finalize()
+    sp.app.conf.store = 'memory://'
+    sp.app.flow_control.resume()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Неблокуючий шар запису в Cassandra для Faust агентів
+
+session.execute() блокує весь event loop worker'а на час round trip.
+AsyncCassandraWriter використовує session.execute_async() та переносить
+результати ResponseFuture (що приходять з потоку драйвера) в asyncio:
+- кількість одночасних запитів обмежена семафором (max_in_flight);
+- submit() чекає на вільний слот - це і є backpressure для stream;
+- кожен запис повертає asyncio.Future, яку можна await'ити;
+- drain() чекає завершення всіх запитів у польоті.
+
+Затримка кожного запису (від submit до результату), кількість помилок
+та запитів у польоті публікуються як метрики cassandra_*.
+"""
+
+import asyncio
+import time
+from metrics import Counter, Gauge, Histogram
+from shared_setup import CASSANDRA_MAX_IN_FLIGHT
+
+CASSANDRA_WRITE_SECONDS = Histogram(
+    'cassandra_write_latency_seconds', 'Затримка запису в Cassandra (від submit до результату)')
+CASSANDRA_WRITE_ERRORS = Counter('cassandra_write_errors_total', 'Помилки запису в Cassandra')
+CASSANDRA_IN_FLIGHT = Gauge('cassandra_in_flight_requests', 'Запити до Cassandra у польоті')
+
+
+class AsyncCassandraWriter:
+    """Обгортка над session.execute_async() з обмеженням запитів у польоті"""
+
+    def __init__(self, session, max_in_flight: int = CASSANDRA_MAX_IN_FLIGHT, loop=None):
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight має бути додатним")
+        self.session = session
+        self.max_in_flight = max_in_flight
+        self._loop = loop
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._pending = set()
+        CASSANDRA_IN_FLIGHT.set_function(lambda: self.in_flight)
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    @property
+    def in_flight(self) -> int:
+        """Кількість запитів, що ще виконуються"""
+        return len(self._pending)
+
+    async def submit(self, statement, parameters=None) -> asyncio.Future:
+        """
+        Відправляє запит і повертає Future з результатом
+
+        Якщо в польоті вже max_in_flight запитів, корутина чекає на вільний
+        слот, тож агент перестає читати stream, доки Cassandra не встигне.
+        """
+        await self._slots.acquire()
+        future = self.loop.create_future()
+        self._pending.add(future)
+        submitted = time.perf_counter()
+        future.add_done_callback(lambda f: self._release(f, submitted))
+        try:
+            response_future = self.session.execute_async(statement, parameters)
+        except Exception as e:
+            future.set_exception(e)
+            return future
+        response_future.add_callbacks(
+            callback=self._on_success, callback_args=(future,),
+            errback=self._on_error, errback_args=(future,),
+        )
+        return future
+
+    async def execute(self, statement, parameters=None):
+        """Відправляє запит і чекає на його результат"""
+        return await (await self.submit(statement, parameters))
+
+    async def drain(self):
+        """Чекає завершення всіх запитів у польоті (помилки не піднімаються)"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def _release(self, future: asyncio.Future, submitted: float):
+        self._pending.discard(future)
+        self._slots.release()
+        CASSANDRA_WRITE_SECONDS.observe(time.perf_counter() - submitted)
+        if future.cancelled() or future.exception() is not None:
+            CASSANDRA_WRITE_ERRORS.inc()
+
+    # Колбеки драйвера викликаються з його потоку, тому результат
+    # передається в event loop через call_soon_threadsafe
+    def _on_success(self, result, future: asyncio.Future):
+        self.loop.call_soon_threadsafe(_set_result, future, result)
+
+    def _on_error(self, exc, future: asyncio.Future):
+        self.loop.call_soon_threadsafe(_set_exception, future, exc)
+
+
+def _set_result(future: asyncio.Future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exc):
+    if not future.done():
+        future.set_exception(exc)
@@ -0,0 +1,313 @@
+"""
+Бенчмарк затримки Cassandra під навантаженням
+
+100 послідовних запитів з одного потоку показують затримку ненавантаженого
+кластера, а p99 зі 100 вимірів - це один вимір. LoadBenchmark натомість
+тримає задане навантаження протягом заданого часу:
+- closed loop: concurrency "користувачів", кожен відправляє наступну
+  операцію одразу після завершення попередньої;
+- open loop: операції стартують із фіксованою частотою rate (ops/s)
+  незалежно від того, чи встигає кластер (у польоті до max_in_flight);
+- спочатку прогрів (warmup), виміри якого відкидаються;
+- операції обираються випадково за вагами - суміш читань і записів.
+
+Затримки накопичуються в LatencyHistogram - гістограмі з логарифмічними
+корзинами як у HdrHistogram (відносна похибка < 1%, пам'ять не залежить
+від кількості вимірів). Для кожної операції зберігаються дві гістограми:
+- service - від фактичної відправки до відповіді;
+- response - з поправкою на coordinated omission. В open loop час
+  рахується від запланованого старту операції, тож затримка в черзі
+  клієнта теж потрапляє у вимір. У closed loop довга відповідь затримує
+  наступні запити користувача, тому для неї додаються пропущені виміри
+  (value - k * interval), як у HdrHistogram recordValueWithExpectedInterval;
+  очікуваний інтервал - медіана service-затримки на прогріві.
+
+Операція - одна або кілька CQL-команд (напр. fan-out по 7 годинних
+партиціях), що виконуються паралельно; вона завершується з останньою з них.
+"""
+
+import json
+import math
+import random
+import threading
+import time
+
+# Корзини гістограми: 2 значущі цифри -> 256 корзин на кожну степінь двійки
+SIGNIFICANT_DIGITS = 2
+PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9, 99.99)
+# Степінь двійки найбільшого значення гістограми, мкс (2^40 мкс ~ 12 діб)
+MAX_VALUE_BITS = 40
+
+
+class LatencyHistogram:
+    """
+    Гістограма затримок у мікросекундах з корзинами HdrHistogram
+
+    Значення до 2 * 10^digits зберігаються точно, далі кожна степінь двійки
+    ділиться на однакову кількість корзин, тож відносна похибка значення
+    не перевищує 10^-digits.
+    """
+
+    def __init__(self, significant_digits: int = SIGNIFICANT_DIGITS):
+        self.sub_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.sub_count = 1 << self.sub_bits
+        self.half_count = self.sub_count // 2
+        self.counts = [0] * (self.sub_count + (MAX_VALUE_BITS - self.sub_bits) * self.half_count)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half_count + (value >> shift) - self.half_count
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self.sub_count:
+            return index
+        shift = (index - self.sub_count) // self.half_count + 1
+        sub = (index - self.sub_count) % self.half_count + self.half_count
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value_us: float, count: int = 1):
+        value = min(max(int(value_us), 0), (1 << MAX_VALUE_BITS) - 1)
+        self.counts[self._index(value)] += count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def record_corrected(self, value_us: float, expected_interval_us: float):
+        """Запис з поправкою на coordinated omission (пропущені виміри за час довгої відповіді)"""
+        self.record(value_us)
+        if not expected_interval_us or expected_interval_us <= 0:
+            return
+        missing = value_us - expected_interval_us
+        while missing >= expected_interval_us:
+            self.record(missing)
+            missing -= expected_interval_us
+
+    def add(self, other: 'LatencyHistogram'):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> int:
+        """Значення, не менше за q% вимірів (верхня межа корзини, як у HdrHistogram)"""
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(q / 100.0 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        """Зведення в мілісекундах та ненульові корзини [верхня межа, мкс; кількість]"""
+        summary = {'count': self.count, 'min_ms': (self.min or 0) / 1000.0,
+                   'mean_ms': self.mean / 1000.0, 'max_ms': self.max / 1000.0}
+        for q in PERCENTILES:
+            summary[f"p{q:g}_ms"] = self.percentile(q) / 1000.0
+        summary['buckets'] = [[self._highest_equivalent(index), count]
+                              for index, count in enumerate(self.counts) if count]
+        return summary
+
+
+class Operation:
+    """
+    Операція навантаження
+
+    requests(rng) повертає список (statement, params) - команди однієї
+    операції, що відправляються паралельно; kind - 'read' або 'write'.
+    """
+
+    def __init__(self, name: str, kind: str, requests, weight: float = 1.0):
+        self.name = name
+        self.kind = kind
+        self.requests = requests
+        self.weight = weight
+
+
+class _OperationStats:
+    def __init__(self):
+        self.service = LatencyHistogram()
+        self.response = LatencyHistogram()
+        self.errors = 0
+        self.first_error = None
+
+
+class LoadBenchmark:
+    """Прогрів і вимір навантаження operations на сесії Cassandra (closed або open loop)"""
+
+    def __init__(self, session, operations, mode: str = 'closed', concurrency: int = 16,
+                 rate: float = None, max_in_flight: int = 1024, seed: int = 42):
+        if mode not in ('closed', 'open'):
+            raise ValueError("mode має бути 'closed' або 'open'")
+        if mode == 'open' and not rate:
+            raise ValueError("open loop потребує rate (операцій за секунду)")
+        self.session = session
+        self.operations = list(operations)
+        self.mode = mode
+        self.concurrency = concurrency
+        self.rate = rate
+        self.max_in_flight = max_in_flight if mode == 'open' else concurrency
+        self.rng = random.Random(seed)
+        self._weights = [op.weight for op in self.operations]
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._in_flight = 0
+        self.expected_interval_us = None
+
+    def run(self, duration: float, warmup: float = 0.0) -> dict:
+        """Прогрів warmup секунд, потім вимір протягом duration секунд; повертає результати"""
+        if warmup > 0:
+            warm = self._phase(warmup)
+            service = LatencyHistogram()
+            for stats in warm[0].values():
+                service.add(stats.service)
+            if self.mode == 'closed' and service.count:
+                self.expected_interval_us = service.percentile(50)
+        stats, elapsed = self._phase(duration)
+        return self._results(stats, elapsed, duration, warmup)
+
+    def _phase(self, duration: float):
+        stats = {op.name: _OperationStats() for op in self.operations}
+        started = time.perf_counter()
+        deadline = started + duration
+        interval = 1.0 / self.rate if self.mode == 'open' else 0.0
+        scheduled = started
+        while True:
+            if self.mode == 'open':
+                intended = scheduled
+                if intended >= deadline:
+                    break
+                scheduled += interval
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                intended = None
+                if time.perf_counter() >= deadline:
+                    break
+            self._slots.acquire()
+            op = self.rng.choices(self.operations, self._weights)[0]
+            self._start(op, stats[op.name], intended)
+        with self._idle:
+            while self._in_flight:
+                self._idle.wait()
+        return stats, time.perf_counter() - started
+
+    def _start(self, op: Operation, stats: _OperationStats, intended: float):
+        requests = op.requests(self.rng)
+        with self._lock:
+            self._in_flight += 1
+        # [команд, що ще виконуються; перша помилка]
+        state = [len(requests), None]
+        sent = time.perf_counter()
+        for statement, params in requests:
+            try:
+                future = self.session.execute_async(statement, params)
+            except Exception as e:
+                self._finish_request(e, op, stats, state, sent, intended)
+                continue
+            future.add_callbacks(callback=self._on_success, callback_args=(op, stats, state, sent, intended),
+                                 errback=self._finish_request, errback_args=(op, stats, state, sent, intended))
+
+    # Колбеки викликаються з потоку драйвера
+    def _on_success(self, result, op, stats, state, sent, intended):
+        self._finish_request(None, op, stats, state, sent, intended)
+
+    def _finish_request(self, error, op, stats, state, sent, intended):
+        finished = time.perf_counter()
+        with self._lock:
+            state[0] -= 1
+            if error is not None and state[1] is None:
+                state[1] = error
+            if state[0]:
+                return
+            if state[1] is not None:
+                stats.errors += 1
+                if stats.first_error is None:
+                    stats.first_error = state[1]
+            else:
+                service_us = (finished - sent) * 1e6
+                stats.service.record(service_us)
+                if intended is not None:
+                    stats.response.record((finished - intended) * 1e6)
+                else:
+                    stats.response.record_corrected(service_us, self.expected_interval_us)
+            self._in_flight -= 1
+            self._idle.notify_all()
+        self._slots.release()
+
+    def _results(self, stats: dict, elapsed: float, duration: float, warmup: float) -> dict:
+        operations = {}
+        for op in self.operations:
+            op_stats = stats[op.name]
+            operations[op.name] = {
+                'kind': op.kind,
+                'weight': op.weight,
+                'count': op_stats.service.count,
+                'errors': op_stats.errors,
+                'first_error': f"{type(op_stats.first_error).__name__}: {op_stats.first_error}"
+                               if op_stats.first_error is not None else None,
+                'throughput': op_stats.service.count / elapsed,
+                'service': op_stats.service.to_dict(),
+                'response': op_stats.response.to_dict(),
+            }
+        totals = {}
+        for kind in ('read', 'write'):
+            service, response = LatencyHistogram(), LatencyHistogram()
+            for op in self.operations:
+                if op.kind == kind:
+                    service.add(stats[op.name].service)
+                    response.add(stats[op.name].response)
+            if service.count:
+                totals[kind] = {'count': service.count, 'throughput': service.count / elapsed,
+                                'service': service.to_dict(), 'response': response.to_dict()}
+        return {
+            'mode': self.mode,
+            'concurrency': self.concurrency if self.mode == 'closed' else None,
+            'rate': self.rate if self.mode == 'open' else None,
+            'max_in_flight': self.max_in_flight,
+            'warmup_seconds': warmup,
+            'duration_seconds': duration,
+            'elapsed_seconds': elapsed,
+            'expected_interval_us': self.expected_interval_us,
+            'operations': operations,
+            'totals': totals,
+        }
+
+
+def print_results(results: dict):
+    """Рядок на операцію: ops/s, затримки service та response (з поправкою на coordinated omission)"""
+    for name, op in results['operations'].items():
+        service, response = op['service'], op['response']
+        errors = f" | ❌ помилок {op['errors']} ({op['first_error']})" if op['errors'] else ""
+        print(f"    -> {name}: {op['throughput']:,.0f} ops/s | Avg: {service['mean_ms']:.2f} ms | "
+              f"p50: {service['p50_ms']:.2f} ms | p95: {service['p95_ms']:.2f} ms | "
+              f"p99: {service['p99_ms']:.2f} ms | p99.9: {service['p99.9_ms']:.2f} ms | "
+              f"max: {service['max_ms']:.2f} ms{errors}")
+        print(f"       з поправкою на coordinated omission: p50: {response['p50_ms']:.2f} ms | "
+              f"p99: {response['p99_ms']:.2f} ms | p99.9: {response['p99.9_ms']:.2f} ms | "
+              f"max: {response['max_ms']:.2f} ms")
+
+
+def write_json(path: str, results: dict):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"💾 Результати збережено в {path}")
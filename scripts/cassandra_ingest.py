@@ -0,0 +1,219 @@
+"""
+Масове завантаження рядків у Cassandra
+
+Один великий logged BatchStatement з рядками різних партицій змушує
+координатора писати batchlog і розсилати рядки по всіх вузлах, а
+синхронний session.execute() на кожен batch тримає в польоті лише
+один запит. BulkWriter натомість:
+- збирає рядки кожної партиції окремо та відправляє їх UNLOGGED batch'ами
+  до batch_rows рядків (batch однієї партиції - одна мутація на репліці);
+- такий batch має routing key своєї партиції, тому з TokenAwarePolicy
+  (token_aware_cluster) драйвер відправляє його одразу на репліку;
+- тримає в польоті не більше max_in_flight запитів execute_async
+  (add() блокується, доки не звільниться слот);
+- повторює невдалі запити з експоненційною паузою (INSERT ідемпотентний);
+- друкує прогрес: рядків/с, запитів, повторів.
+
+Приклад:
+    writer = BulkWriter(session, max_in_flight=128, total=len(rows))
+    for row in rows:
+        writer.add(insert, row, partition_key=row[:1])
+    writer.flush()
+    print(writer.summary())
+
+Модуль залежить лише від драйвера Cassandra, тому використовується і
+lab3_cassandra_optimization.py, і cassandra_/main.py.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from cassandra.cluster import EXEC_PROFILE_DEFAULT, Cluster, ExecutionProfile
+from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
+from cassandra.query import BatchStatement, BatchType
+
+MAX_IN_FLIGHT = 128
+# 50 рядків телеметрії (~3 КБ) - менше порогу попередження batch_size_warn_threshold (5 КБ)
+BATCH_ROWS = 50
+# Неповні буфери всіх партицій відправляються, коли в них стільки рядків
+MAX_BUFFERED = 50_000
+RETRIES = 5
+RETRY_BACKOFF = 0.1
+REPORT_INTERVAL = 2.0
+
+
+def token_aware_cluster(hosts, port: int = 9042, request_timeout: float = 30.0, **kwargs) -> Cluster:
+    """Cluster, що відправляє запит на репліку його партиції (TokenAwarePolicy)"""
+    profile = ExecutionProfile(load_balancing_policy=TokenAwarePolicy(DCAwareRoundRobinPolicy()),
+                               request_timeout=request_timeout)
+    return Cluster(hosts, port=port, execution_profiles={EXEC_PROFILE_DEFAULT: profile}, **kwargs)
+
+
+class BulkWriter:
+    """Буфери рядків по партиціях та їх запис UNLOGGED batch'ами через execute_async"""
+
+    def __init__(self, session, max_in_flight: int = MAX_IN_FLIGHT, batch_rows: int = BATCH_ROWS,
+                 retries: int = RETRIES, max_buffered: int = MAX_BUFFERED,
+                 report_interval: float = REPORT_INTERVAL, total: int = None, progress=None):
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight має бути додатним")
+        self.session = session
+        self.max_in_flight = max_in_flight
+        self.batch_rows = batch_rows
+        self.retries = retries
+        self.max_buffered = max_buffered
+        self.report_interval = report_interval
+        self.total = total
+        # progress(writer) замість друку прогресу (напр. передача статистики з процесу-воркера)
+        self.progress = progress
+        # (statement, ключ партиції) -> параметри рядків, ще не відправлені
+        self._buffers = {}
+        self.buffered = 0
+        self._slots = threading.Semaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._in_flight = 0
+        # Невдалі запити (heap): (час повтору, №, запит, параметри, рядків, спроба)
+        self._retry_queue = []
+        self._retry_order = itertools.count()
+        self.rows = 0
+        self.requests = 0
+        self.retried = 0
+        self.failed_rows = 0
+        self.first_error = None
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed else 0.0
+
+    def add(self, statement, params, partition_key):
+        """
+        Додає рядок statement з параметрами params
+
+        partition_key - значення ключа партиції рядка (напр. (device_id, bucket_hour));
+        рядки з однаковими statement і ключем потрапляють в один batch.
+        """
+        self._resubmit_due()
+        key = (statement, partition_key)
+        rows = self._buffers.get(key)
+        if rows is None:
+            rows = self._buffers[key] = []
+        rows.append(params)
+        self.buffered += 1
+        if len(rows) >= self.batch_rows:
+            del self._buffers[key]
+            self.buffered -= len(rows)
+            self._send(statement, rows)
+        elif self.buffered >= self.max_buffered:
+            self._send_buffers()
+        if time.perf_counter() - self._last_report >= self.report_interval:
+            self._report()
+
+    def flush(self):
+        """Відправляє всі буфери та чекає завершення запитів і повторів"""
+        self._send_buffers()
+        while True:
+            self._resubmit_due()
+            with self._changed:
+                if not self._in_flight and not self._retry_queue:
+                    break
+                timeout = 0.05
+                if self._retry_queue:
+                    timeout = min(timeout, max(0.0, self._retry_queue[0][0] - time.monotonic()))
+                self._changed.wait(timeout)
+        self._report(final=True)
+        return self
+
+    def summary(self) -> str:
+        text = (f"{self.rows} рядків за {self.elapsed:.2f} с ({self.rows_per_second:,.0f} рядків/с), "
+                f"запитів {self.requests}, повторів {self.retried}")
+        if self.failed_rows:
+            text += f", НЕ записано {self.failed_rows} рядків ({type(self.first_error).__name__}: {self.first_error})"
+        return text
+
+    def _report(self, final: bool = False):
+        self._last_report = time.perf_counter()
+        if self.progress is not None:
+            self.progress(self)
+            return
+        self.print_progress()
+        if final:
+            print()
+
+    def print_progress(self):
+        done = f"{self.rows}/{self.total}" if self.total else f"{self.rows}"
+        print(f"  ... Записано {done} рядків, {self.rows_per_second:,.0f} рядків/с, "
+              f"у польоті {self._in_flight}, повторів {self.retried}", end='\r')
+
+    def _send_buffers(self):
+        buffers, self._buffers, self.buffered = self._buffers, {}, 0
+        for (statement, _), rows in buffers.items():
+            self._send(statement, rows)
+
+    def _send(self, statement, rows):
+        if len(rows) == 1:
+            self._submit(statement, rows[0], 1, 0)
+            return
+        batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+        for params in rows:
+            batch.add(statement, params)
+        self._submit(batch, None, len(rows), 0)
+
+    def _submit(self, request, params, num_rows: int, attempt: int):
+        self._slots.acquire()
+        with self._lock:
+            self._in_flight += 1
+            self.requests += 1
+        try:
+            future = self.session.execute_async(request, params)
+        except Exception as e:
+            self._on_error(e, request, params, num_rows, attempt)
+            return
+        future.add_callbacks(callback=self._on_success, callback_args=(num_rows,),
+                             errback=self._on_error, errback_args=(request, params, num_rows, attempt))
+
+    def _resubmit_due(self):
+        """
+        Відправляє повтори, час яких настав
+
+        Викликається з add() та flush() - з основного потоку, а не з колбеків
+        драйвера. Цикл, а не рекурсія через _submit: запит, що знову впав,
+        повертається в чергу з пізнішим часом, тож під час недоступності
+        кластера стек не росте.
+        """
+        while self._retry_queue and self._retry_queue[0][0] <= time.monotonic():
+            with self._lock:
+                _, _, request, params, num_rows, attempt = heapq.heappop(self._retry_queue)
+            self._submit(request, params, num_rows, attempt)
+
+    # Колбеки викликаються з потоку драйвера
+    def _on_success(self, result, num_rows: int):
+        with self._changed:
+            self._in_flight -= 1
+            self.rows += num_rows
+            self._changed.notify()
+        self._slots.release()
+
+    def _on_error(self, exc, request, params, num_rows: int, attempt: int):
+        with self._changed:
+            self._in_flight -= 1
+            if attempt < self.retries:
+                self.retried += 1
+                heapq.heappush(self._retry_queue, (time.monotonic() + RETRY_BACKOFF * 2 ** attempt,
+                                                   next(self._retry_order), request, params,
+                                                   num_rows, attempt + 1))
+            else:
+                self.failed_rows += num_rows
+                if self.first_error is None:
+                    self.first_error = exc
+            self._changed.notify()
+        self._slots.release()
@@ -1,42 +1,510 @@
-import time, json
-import gzip, snappy, lz4.frame, zstandard as zstd
-from gen_wind_data import gen_record
-
-def bench_compress(data_bytes, alg):
-    t0 = time.perf_counter()
-    if alg == "none":
-        comp = data_bytes
-    elif alg == "gzip":
-        comp = gzip.compress(data_bytes)
-    elif alg == "snappy":
-        comp = snappy.compress(data_bytes)
-    elif alg == "lz4":
-        comp = lz4.frame.compress(data_bytes)
-    elif alg == "zstd":
-        cctx = zstd.ZstdCompressor(level=3)
-        comp = cctx.compress(data_bytes)
-    t1 = time.perf_counter()
-    return len(comp), (t1 - t0)
+"""
+Бенчмарк стиснення телеметрії так, як її стискає Kafka
+
+Kafka стискає не окремі повідомлення, а цілий record batch producer'а
+(розмір задають batch_size / linger_ms). Тому в режимі batch записи
+пакуються у формат записів Kafka v2 (довжина, timestamp/offset delta,
+ключ device_id, значення) до заповнення batch'а заданого розміру, і
+стискається вся секція записів. Режим message стискає кожне повідомлення
+окремо - так працює стиснення на рівні payload'у без batch'ів.
+
+Для кожного алгоритму, рівня та розміру batch'а виводяться ступінь
+стиснення (raw / compressed), швидкість стиснення та розпакування в MB/s
+(за обсягом нестиснених даних) та CPU на одне повідомлення. Контексти
+стиснення (ZstdCompressor/ZstdDecompressor) створюються один раз на
+прогін, а не на кожен виклик.
+
+Кожна конфігурація проганяється --warmup разів без обліку та --repeats
+разів з обліком; швидкість виводиться як середнє ± 95% довірчий інтервал.
+--workers 1,2,4 ділить дані між процесами (ProcessPoolExecutor), щоб
+побачити масштабування по ядрах: процеси починають кожну фазу одночасно,
+сумарна швидкість - обсяг даних, поділений на час від першого старту до
+останнього завершення фази. Результати разом з описом машини
+(CPU, ядра, версії бібліотек) зберігаються в JSON/CSV для порівняння між
+машинами та в часі; --plot будує графік ratio vs швидкість (matplotlib).
+
+Приклади:
+    python compression_bench.py                                  # batch 16 KB ... 1 MB
+    python compression_bench.py --mode message --codecs zstd:1,3 lz4
+    python compression_bench.py --input wind_1000.json --batch-sizes 16384,65536
+    python compression_bench.py --workers 1,2,4 --repeats 5 --json out.json --csv out.csv --plot out.png
+"""
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import platform
+import statistics
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import lz4
+import lz4.frame
+import zstandard as zstd
+from bulk_gen import BulkTelemetryGenerator, to_json_lines
+
+try:
+    import snappy  # python-snappy, необов'язкова залежність
+except ImportError:
+    snappy = None
+
+MB = 1024 * 1024
+DEFAULT_BATCH_SIZES = (16384, 65536, 262144, 1048576)
+# Рівні за замовчуванням (Kafka: compression.gzip.level, compression.lz4.level, compression.zstd.level)
+DEFAULT_CODECS = {
+    'gzip': (1, 6, 9),
+    'snappy': (None,),
+    'lz4': (0, 9),
+    'zstd': (1, 3, 9, 19),
+}
+# Критичні значення t-розподілу Стьюдента для 95% інтервалу (ступені свободи -> t)
+T_CRITICAL_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+                 8: 2.306, 9: 2.262, 10: 2.228, 15: 2.131, 20: 2.086, 30: 2.042}
+# Колонки CSV та поля результату в JSON
+RESULT_FIELDS = (
+    'mode', 'batch_size', 'codec', 'level', 'workers', 'repeats', 'payloads', 'messages',
+    'raw_bytes', 'compressed_bytes', 'ratio',
+    'compress_mb_s', 'compress_mb_s_ci', 'decompress_mb_s', 'decompress_mb_s_ci',
+    'compress_us_per_msg', 'decompress_us_per_msg',
+)
+
+
+def make_codec(name: str, level):
+    """Пара (compress, decompress) з контекстами, що перевикористовуються"""
+    if name == 'none':
+        return bytes, bytes
+    if name == 'gzip':
+        # wbits=31 - gzip-обгортка, як у Kafka
+        level = 6 if level is None else level
+        return (lambda data: zlib.compress(data, level, wbits=31),
+                lambda data: zlib.decompress(data, wbits=31))
+    if name == 'snappy':
+        if snappy is None:
+            raise RuntimeError("snappy недоступний: pip install python-snappy")
+        return snappy.compress, snappy.decompress
+    if name == 'lz4':
+        level = 0 if level is None else level
+        return (lambda data: lz4.frame.compress(data, compression_level=level),
+                lz4.frame.decompress)
+    if name == 'zstd':
+        compressor = zstd.ZstdCompressor(level=3 if level is None else level)
+        decompressor = zstd.ZstdDecompressor()
+        return compressor.compress, decompressor.decompress
+    raise ValueError(f"Невідомий алгоритм: {name}")
+
+
+def _write_varint(value: int, out: bytearray):
+    """Zigzag varint, як у форматі записів Kafka"""
+    value = (value << 1) ^ (value >> 63)
+    while value & ~0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_record(out: bytearray, offset_delta: int, timestamp_delta: int, key: bytes, value: bytes):
+    """Додає запис Kafka v2 (record batch magic=2) до out"""
+    body = bytearray(b'\x00')  # attributes
+    _write_varint(timestamp_delta, body)
+    _write_varint(offset_delta, body)
+    if key is None:
+        _write_varint(-1, body)
+    else:
+        _write_varint(len(key), body)
+        body += key
+    _write_varint(len(value), body)
+    body += value
+    _write_varint(0, body)  # headers
+    _write_varint(len(body), out)
+    out += body
+
+
+def record_batches(messages, keys, batch_size: int, interval_ms: int = 33):
+    """
+    Пакує повідомлення в секції записів Kafka batch'ів розміром до batch_size
+
+    Як і producer, batch закривається, коли наступний запис не вміщається;
+    interval_ms - крок timestamp delta між записами (темп потоку телеметрії).
+    Повертає список (секція записів, кількість записів).
+    """
+    batches = []
+    current = bytearray()
+    count = 0
+    for key, value in zip(keys, messages):
+        record = bytearray()
+        encode_record(record, count, count * interval_ms, key, value)
+        if count and len(current) + len(record) > batch_size:
+            batches.append((bytes(current), count))
+            current = bytearray()
+            count = 0
+            record = bytearray()
+            encode_record(record, 0, 0, key, value)
+        current += record
+        count += 1
+    if count:
+        batches.append((bytes(current), count))
+    return batches
+
+
+def load_messages(args):
+    """Повідомлення телеметрії (JSON, як у gen_wind_data.py) та їхні ключі device_id"""
+    if args.input:
+        with open(args.input, 'rb') as f:
+            messages = [line.rstrip(b'\n') for line in f if line.strip()]
+    else:
+        generator = BulkTelemetryGenerator(args.devices, seed=args.seed)
+        messages = [line.encode('utf-8') for line in to_json_lines(generator.batch(args.messages)).splitlines()]
+    keys = [json.loads(message)['device_id'].encode('utf-8') for message in messages]
+    return messages, keys
+
+
+def _result(name: str, level, payloads: int, messages: int, raw_bytes: int, compressed_bytes: int,
+            compress_wall: float, decompress_wall: float, compress_cpu: float, decompress_cpu: float) -> dict:
+    return {
+        'codec': name,
+        'level': level,
+        'payloads': payloads,
+        'messages': messages,
+        'raw_bytes': raw_bytes,
+        'compressed_bytes': compressed_bytes,
+        'ratio': raw_bytes / compressed_bytes,
+        'compress_seconds': compress_wall,
+        'decompress_seconds': decompress_wall,
+        'compress_mb_s': raw_bytes / MB / compress_wall,
+        'decompress_mb_s': raw_bytes / MB / decompress_wall,
+        'compress_us_per_msg': compress_cpu / messages * 1e6,
+        'decompress_us_per_msg': decompress_cpu / messages * 1e6,
+    }
+
+
+def measure(name: str, level, payloads, messages: int, codec=None) -> dict:
+    """
+    Стискає та розпаковує payloads одним контекстом
+
+    payloads - список (дані, кількість повідомлень); codec - готова пара
+    (compress, decompress) замість make_codec. Час - wall clock,
+    CPU - process_time (один потік, тому вони майже збігаються).
+    """
+    compress, decompress = codec or make_codec(name, level)
+    raw_bytes = sum(len(data) for data, _ in payloads)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    compressed = [compress(data) for data, _ in payloads]
+    compress_wall, compress_cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    restored = [decompress(data) for data in compressed]
+    decompress_wall, decompress_cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    if restored[0] != payloads[0][0] or restored[-1] != payloads[-1][0]:
+        raise AssertionError(f"{name}: розпаковані дані не збігаються з вихідними")
+
+    return _result(name, level, len(payloads), messages, raw_bytes, sum(map(len, compressed)),
+                   compress_wall, decompress_wall, compress_cpu, decompress_cpu)
+
+
+# Дані процесу пулу: передаються один раз через initializer, а не з кожною задачею
+_worker_payloads = None
+_worker_barrier = None
+
+
+def _init_worker(payloads, barrier):
+    global _worker_payloads, _worker_barrier
+    _worker_payloads = payloads
+    _worker_barrier = barrier
+
+
+def _measure_slice(name: str, level, start: int, stop: int) -> dict:
+    """
+    Частина паралельного прогону в процесі пулу
+
+    Barrier вирівнює старт фаз стиснення та розпакування в усіх процесах;
+    perf_counter (CLOCK_MONOTONIC) спільний для процесів, тому межі фаз
+    можна порівнювати між ними.
+    """
+    payloads = _worker_payloads[start:stop]
+    compress, decompress = make_codec(name, level)
+
+    _worker_barrier.wait()
+    compress_start, cpu = time.perf_counter(), time.process_time()
+    compressed = [compress(data) for data, _ in payloads]
+    compress_end, compress_cpu = time.perf_counter(), time.process_time() - cpu
+
+    _worker_barrier.wait()
+    decompress_start, cpu = time.perf_counter(), time.process_time()
+    restored = [decompress(data) for data in compressed]
+    decompress_end, decompress_cpu = time.perf_counter(), time.process_time() - cpu
+
+    if restored[0] != payloads[0][0] or restored[-1] != payloads[-1][0]:
+        raise AssertionError(f"{name}: розпаковані дані не збігаються з вихідними")
+    return {
+        'messages': sum(count for _, count in payloads),
+        'raw_bytes': sum(len(data) for data, _ in payloads),
+        'compressed_bytes': sum(map(len, compressed)),
+        'compress': (compress_start, compress_end, compress_cpu),
+        'decompress': (decompress_start, decompress_end, decompress_cpu),
+    }
+
+
+def measure_parallel(pool: ProcessPoolExecutor, workers: int, name: str, level, payloads) -> dict:
+    """
+    Один прогін на workers процесах, кожен стискає свою частину payloads
+
+    Час фази - від першого старту до останнього завершення серед процесів,
+    тому сумарна швидкість - весь обсяг даних, поділений на цей час;
+    CPU на повідомлення - сумарний CPU всіх процесів.
+    """
+    bounds = [len(payloads) * index // workers for index in range(workers + 1)]
+    futures = [pool.submit(_measure_slice, name, level, start, stop)
+               for start, stop in zip(bounds, bounds[1:])]
+    parts = [future.result() for future in futures]
+
+    def phase(key):
+        wall = max(part[key][1] for part in parts) - min(part[key][0] for part in parts)
+        return wall, sum(part[key][2] for part in parts)
+
+    compress_wall, compress_cpu = phase('compress')
+    decompress_wall, decompress_cpu = phase('decompress')
+    return _result(name, level, len(payloads), sum(part['messages'] for part in parts),
+                   sum(part['raw_bytes'] for part in parts), sum(part['compressed_bytes'] for part in parts),
+                   compress_wall, decompress_wall, compress_cpu, decompress_cpu)
+
+
+def confidence_interval(values) -> float:
+    """Половина 95% довірчого інтервалу середнього (t-розподіл)"""
+    if len(values) < 2:
+        return 0.0
+    df = len(values) - 1
+    t = T_CRITICAL_95[max(key for key in T_CRITICAL_95 if key <= df)] if df <= 30 else 1.96
+    return t * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def run_repeated(run, warmup: int, repeats: int) -> dict:
+    """
+    warmup прогонів без обліку, потім repeats прогонів
+
+    Розмір і ratio однакові в усіх прогонах; швидкість та CPU усереднюються,
+    для швидкості додається 95% довірчий інтервал (*_ci).
+    """
+    for _ in range(warmup):
+        run()
+    runs = [run() for _ in range(repeats)]
+    result = dict(runs[0], repeats=repeats)
+    for field in ('compress_mb_s', 'decompress_mb_s'):
+        values = [item[field] for item in runs]
+        result[field] = statistics.mean(values)
+        result[f'{field}_ci'] = confidence_interval(values)
+    for field in ('compress_seconds', 'decompress_seconds', 'compress_us_per_msg', 'decompress_us_per_msg'):
+        result[field] = statistics.mean(item[field] for item in runs)
+    return result
+
+
+def parse_codecs(specs):
+    """["zstd:1,3", "lz4"] -> [("zstd", 1), ("zstd", 3), ("lz4", 0), ("lz4", 9)]"""
+    if not specs:
+        specs = list(DEFAULT_CODECS)
+    codecs = []
+    for spec in specs:
+        name, _, levels = spec.partition(':')
+        if name not in DEFAULT_CODECS and name != 'none':
+            raise ValueError(f"Невідомий алгоритм: {name}")
+        if name == 'snappy' and snappy is None:
+            print("⚠️  snappy пропущено: python-snappy не встановлено")
+            continue
+        if levels:
+            codecs.extend((name, int(level)) for level in levels.split(','))
+        else:
+            codecs.extend((name, level) for level in DEFAULT_CODECS.get(name, (None,)))
+    return codecs
+
+
+def host_info() -> dict:
+    """Опис машини та версій бібліотек для порівняння результатів між запусками"""
+    cpu = platform.processor()
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            cpu = next((line.split(':', 1)[1].strip() for line in f if line.startswith('model name')), cpu)
+    except OSError:
+        pass
+    return {
+        'hostname': platform.node(),
+        'cpu': cpu,
+        'cpu_count': os.cpu_count(),
+        'machine': platform.machine(),
+        'system': platform.platform(),
+        'python': platform.python_version(),
+        'zstandard': zstd.__version__,
+        'zstd': '.'.join(map(str, zstd.ZSTD_VERSION)),
+        'lz4': lz4.library_version_string(),
+        'zlib': zlib.ZLIB_RUNTIME_VERSION,
+        'snappy': getattr(snappy, '__version__', 'unknown') if snappy else None,
+    }
+
+
+def print_header():
+    print(f"{'batch':>8} {'codec':<7} {'level':>5} {'w':>2} {'ratio':>8} {'comp MB/s':>16} {'dec MB/s':>16} "
+          f"{'comp us/msg':>11} {'dec us/msg':>10}")
+
+
+def print_row(batch_label: str, result: dict):
+    level = '-' if result['level'] is None else result['level']
+    compress = f"{result['compress_mb_s']:.1f} ± {result.get('compress_mb_s_ci', 0.0):.1f}"
+    decompress = f"{result['decompress_mb_s']:.1f} ± {result.get('decompress_mb_s_ci', 0.0):.1f}"
+    print(f"{batch_label:>8} {result['codec']:<7} {level:>5} {result.get('workers', 1):>2} "
+          f"{result['ratio']:>7.2f}x {compress:>16} {decompress:>16} "
+          f"{result['compress_us_per_msg']:>11.2f} {result['decompress_us_per_msg']:>10.2f}")
+
+
+def run_suite(args, messages, keys, codecs, workers_list):
+    """Усі комбінації режим x розмір batch'а x алгоритм x рівень x кількість процесів"""
+    scenarios = []
+    if args.mode in ("message", "both"):
+        scenarios.append(('message', 0, "msg", [(message, 1) for message in messages]))
+    if args.mode in ("batch", "both"):
+        for batch_size in (int(size) for size in args.batch_sizes.split(',')):
+            scenarios.append(('batch', batch_size, f"{batch_size // 1024}K",
+                              record_batches(messages, keys, batch_size)))
+
+    results = []
+    for mode, batch_size, label, payloads in scenarios:
+        for workers in workers_list:
+            pool = None
+            if workers > 1:
+                if len(payloads) < workers:
+                    print(f"⚠️  {label}: {len(payloads)} batch'ів на {workers} процесів, пропущено")
+                    continue
+                # Кожен процес отримує рівно одну задачу, тому barrier на workers учасників
+                pool = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                           initargs=(payloads, multiprocessing.Barrier(workers)))
+            try:
+                for name, level in codecs:
+                    if pool is None:
+                        run = partial(measure, name, level, payloads, len(messages))
+                    else:
+                        run = partial(measure_parallel, pool, workers, name, level, payloads)
+                    result = run_repeated(run, args.warmup, args.repeats)
+                    result.update(mode=mode, batch_size=batch_size, workers=workers)
+                    results.append(result)
+                    print_row(label, result)
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+    return results
+
+
+def write_json(path: str, host: dict, args, results):
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'host': host,
+        'params': {'messages': args.messages, 'input': args.input, 'devices': args.devices,
+                   'seed': args.seed, 'warmup': args.warmup, 'repeats': args.repeats},
+        'results': [{field: result[field] for field in RESULT_FIELDS} for result in results],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def write_csv(path: str, host: dict, results):
+    """Один рядок на конфігурацію; колонки машини дозволяють склеювати CSV різних запусків"""
+    host_fields = ('hostname', 'cpu', 'cpu_count', 'zstd', 'lz4', 'zlib')
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(host_fields + RESULT_FIELDS)
+        for result in results:
+            writer.writerow([host[field] for field in host_fields] + [result[field] for field in RESULT_FIELDS])
+
+
+def plot_results(path: str, host: dict, results):
+    """Графік ratio від швидкості стиснення та розпакування (точка - алгоритм:рівень)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    scenarios = sorted({(result['mode'], result['batch_size']) for result in results})
+    codec_names = sorted({result['codec'] for result in results if result['codec'] != 'none'})
+    colors = {name: f"C{index}" for index, name in enumerate(codec_names)}
+    markers = dict(zip(scenarios, 'os^DvP*X'))
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6), sharey=True)
+    for ax, field, title in ((axes[0], 'compress_mb_s', 'Стиснення'),
+                             (axes[1], 'decompress_mb_s', 'Розпакування')):
+        for result in results:
+            if result['codec'] == 'none':
+                continue
+            ax.errorbar(result[field], result['ratio'], xerr=result[f'{field}_ci'],
+                        fmt=markers.get((result['mode'], result['batch_size']), 'o'),
+                        color=colors[result['codec']], alpha=0.8)
+            level = '' if result['level'] is None else f":{result['level']}"
+            workers = f" x{result['workers']}" if result['workers'] > 1 else ''
+            ax.annotate(f"{result['codec']}{level}{workers}", (result[field], result['ratio']),
+                        fontsize=7, xytext=(3, 3), textcoords='offset points')
+        ax.set_xscale('log')
+        ax.set_xlabel(f"{title}, MB/s (нестиснені дані)")
+        ax.set_title(title)
+        ax.grid(True, which='both', alpha=0.3)
+    axes[0].set_ylabel("Ratio (raw / compressed)")
+    handles = [plt.Line2D([], [], color=colors[name], marker='o', linestyle='', label=name)
+               for name in codec_names]
+    handles += [plt.Line2D([], [], color='gray', marker=markers[key], linestyle='',
+                           label='msg' if key[0] == 'message' else f"batch {key[1] // 1024}K")
+                for key in scenarios]
+    axes[1].legend(handles=handles, loc='best', fontsize=8)
+    fig.suptitle(f"Стиснення телеметрії: {host['cpu']} ({host['cpu_count']} ядер)")
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
 
 def main():
-    N = 5000
-    buf = []
-    for i in range(N):
-        rec = gen_record((i%30)+1)
-        s = json.dumps(rec).encode('utf-8')
-        buf.append(s)
-    algs = ["none","snappy","lz4","zstd","gzip"]
-    for alg in algs:
-        total_before = 0
-        total_after = 0
-        total_time = 0.0
-        for b in buf:
-            total_before += len(b)
-            after_len, t = bench_compress(b, alg)
-            total_after += after_len
-            total_time += t
-        ratio = total_after / total_before
-        print(f"{alg}: ratio={ratio:.3f} total_time={total_time:.3f}s avg_time_per_msg={total_time/N*1000:.3f}ms")
+    p = argparse.ArgumentParser(description="Стиснення телеметрії: окремі повідомлення vs batch'і Kafka")
+    p.add_argument("--mode", choices=["batch", "message", "both"], default="both")
+    p.add_argument("--messages", type=int, default=50_000)
+    p.add_argument("--devices", type=int, default=150)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--input", help="файл JSON Lines (напр. wind_1000.json) замість генерації")
+    p.add_argument("--batch-sizes", default=",".join(map(str, DEFAULT_BATCH_SIZES)),
+                   help="розміри batch'ів у байтах (batch_size producer'а)")
+    p.add_argument("--codecs", nargs="*", help="алгоритм[:рівні], напр. zstd:1,3,9 lz4 gzip:6")
+    p.add_argument("--workers", default="1", help="кількість процесів через кому, напр. 1,2,4")
+    p.add_argument("--warmup", type=int, default=1, help="прогони без обліку перед вимірюваннями")
+    p.add_argument("--repeats", type=int, default=3, help="кількість вимірюваних прогонів")
+    p.add_argument("--json", help="файл для результатів у JSON")
+    p.add_argument("--csv", help="файл для результатів у CSV")
+    p.add_argument("--plot", help="файл графіка ratio vs швидкість (PNG/SVG, потрібен matplotlib)")
+    args = p.parse_args()
+    if args.repeats < 1:
+        p.error("--repeats має бути не менше 1")
+
+    messages, keys = load_messages(args)
+    codecs = parse_codecs(args.codecs)
+    workers_list = [int(workers) for workers in args.workers.split(',')]
+    host = host_info()
+    raw = sum(map(len, messages))
+    print(f"🖥️  {host['cpu']}, {host['cpu_count']} ядер, zstd {host['zstd']}, lz4 {host['lz4']}, zlib {host['zlib']}")
+    print(f"🧪 {len(messages)} повідомлень, {raw / len(messages):.0f} байт/повідомлення в середньому; "
+          f"warmup={args.warmup}, repeats={args.repeats}, ± - 95% довірчий інтервал")
+    if max(workers_list) > (host['cpu_count'] or 1):
+        print(f"⚠️  процесів більше, ніж ядер ({host['cpu_count']}): масштабування не буде видно")
+    print_header()
+
+    results = run_suite(args, messages, keys, codecs, workers_list)
+
+    if args.json:
+        write_json(args.json, host, args, results)
+        print(f"💾 JSON: {args.json}")
+    if args.csv:
+        write_csv(args.csv, host, results)
+        print(f"💾 CSV: {args.csv}")
+    if args.plot:
+        plot_results(args.plot, host, results)
+        print(f"📈 Графік: {args.plot}")
+
 
 if __name__ == "__main__":
     main()
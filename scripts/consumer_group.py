@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Група consumer-процесів для power-station-data з ручними комітами
+
+Кожен процес - окремий KafkaConsumer у стабільній групі (CONSUMER_GROUP),
+тому Kafka ділить партиції топіка між процесами, а після перезапуску група
+продовжує з закомічених offset'ів. Процес читає пакети через poll(),
+аналізує їх колонками (simple_consumer.analyze_batch) і лише після цього
+комітить offset'и пакета - повідомлення не вважається обробленим, доки
+аналіз не завершився.
+
+Rebalance та зупинка:
+- перед відкликанням партицій (on_partitions_revoked) процес синхронно
+  комітить оброблені offset'и, тому новий власник партиції не повторює
+  вже оброблені пакети;
+- Ctrl+C / SIGTERM зупиняє головний процес, він сигналізує процесам
+  групи; кожен завершує поточний пакет, комітить і виходить з групи;
+- якщо обробка пакета впала, процес виходить з групи без коміту, тож
+  пакет повторно отримає новий власник партиції.
+
+Головний процес раз на --interval секунд друкує сумарну пропускну
+здатність групи та розподіл партицій між процесами.
+
+Mock-брокер librdkafka (--local) зберігає лише останні ~16 тис. записів
+партиції і не завжди приймає повторний JoinGroup від kafka-python, тому
+з ним зручно перевіряти коміти та підсумки, а масштабування по ядрах -
+на справжньому брокері з топіком на кілька партицій.
+
+Приклади:
+    python consumer_group.py --workers 4
+    python consumer_group.py --local --workers 1 --prefill 50000   # mock-брокер librdkafka
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import signal
+import time
+
+from kafka import ConsumerRebalanceListener
+from simple_consumer import (BOOTSTRAP_SERVERS, MAX_POLL_RECORDS, TOPIC, WARNINGS,
+                             analyze_batch, create_consumer, decode_batch, to_columns)
+
+# Стабільна група: процеси однієї групи ділять партиції та offset'и
+CONSUMER_GROUP = os.getenv('CONSUMER_GROUP', 'energy-monitor')
+# Як часто процеси надсилають статистику головному процесу, секунд
+STATS_INTERVAL = 1.0
+REPORT_INTERVAL = 5.0
+
+
+class CommitOnRevoke(ConsumerRebalanceListener):
+    """Синхронний коміт оброблених offset'ів перед відкликанням партицій"""
+
+    def __init__(self, consumer, stats: dict):
+        self.consumer = consumer
+        self.stats = stats
+
+    def on_partitions_revoked(self, revoked):
+        if revoked:
+            commit(self.consumer, self.stats)
+        self.stats['rebalances'] += 1
+
+    def on_partitions_assigned(self, assigned):
+        self.stats['partitions'] = sorted(tp.partition for tp in assigned)
+
+
+def commit(consumer, stats: dict):
+    """Синхронний коміт позицій після останнього обробленого пакета"""
+    try:
+        consumer.commit()
+        stats['commits'] += 1
+    except Exception as e:
+        stats['commit_errors'] += 1
+        print(f"❌ Помилка коміту: {type(e).__name__}")
+
+
+def run_worker(worker_id: int, args, stop, stats_queue):
+    """Процес групи: poll -> analyze_batch -> коміт пакета"""
+    # Ctrl+C обробляє головний процес і зупиняє групу через stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    consumer = create_consumer(args.bootstrap, value_deserializer=None, group_id=args.group, topics=(),
+                               enable_auto_commit=False, auto_offset_reset=args.offset_reset,
+                               client_id=f"{args.group}-{worker_id}")
+    if consumer is None:
+        return
+    stats = {'worker': worker_id, 'messages': 0, 'batches': 0, 'commits': 0, 'commit_errors': 0,
+             'rebalances': 0, 'partitions': [], 'warnings': dict.fromkeys(WARNINGS, 0),
+             'first_at': None, 'last_at': None, 'error': None, 'done': False}
+    consumer.subscribe([args.topic], listener=CommitOnRevoke(consumer, stats))
+
+    def on_commit(offsets, response):
+        if isinstance(response, Exception):
+            stats['commit_errors'] += 1
+        else:
+            stats['commits'] += 1
+
+    reported = time.monotonic()
+    try:
+        while not stop.is_set():
+            polled = consumer.poll(timeout_ms=500, max_records=args.max_records)
+            values = [record.value for records in polled.values() for record in records]
+            if values:
+                analysis = analyze_batch(to_columns(decode_batch(values)))
+                stats['messages'] += analysis['messages']
+                stats['batches'] += 1
+                for key, count in analysis['warnings'].items():
+                    stats['warnings'][key] += count
+                stats['last_at'] = time.time()
+                stats['first_at'] = stats['first_at'] or stats['last_at']
+                # Коміт лише після обробки пакета; синхронний - на rebalance та при зупинці
+                if args.commit == 'sync':
+                    commit(consumer, stats)
+                else:
+                    consumer.commit_async(callback=on_commit)
+            if time.monotonic() - reported >= STATS_INTERVAL:
+                stats_queue.put(dict(stats))
+                reported = time.monotonic()
+    except Exception as e:
+        # Позиції вже за необробленим пакетом, тому без коміту: процес виходить
+        # з групи, і після rebalance новий власник читає з останнього коміту
+        stats['error'] = f"{type(e).__name__}: {e}"
+        print(f"❌ Процес #{worker_id} зупинено: {stats['error']}")
+    else:
+        # Зупинка між пакетами: усі отримані пакети оброблено
+        if consumer.assignment():
+            commit(consumer, stats)
+    finally:
+        consumer.close(autocommit=False)
+        stats['done'] = True
+        stats_queue.put(dict(stats))
+
+
+def count_partitions(bootstrap: str, topic: str) -> int:
+    """Кількість партицій топіка з метаданих брокера (0, якщо топіка немає)"""
+    from kafka import KafkaConsumer
+    consumer = KafkaConsumer(bootstrap_servers=bootstrap.split(','))
+    try:
+        return len(consumer.partitions_for_topic(topic) or ())
+    finally:
+        consumer.close()
+
+
+def prepare_local_topic(args):
+    """
+    Mock-брокер librdkafka з --prefill повідомленнями в топіку
+
+    Mock-брокер створює топік при першому записі з 4 партиціями
+    (CreateTopics він не підтримує). Ключ - номер повідомлення за модулем
+    64, тому повідомлення рівномірно розходяться по партиціях.
+    """
+    from confluent_kafka import Producer
+    from simple_producer import encode_value, generate_power_data, start_local_broker
+
+    holder, bootstrap = start_local_broker()
+    producer = Producer({'bootstrap.servers': bootstrap, 'linger.ms': 50})
+    payloads = [encode_value(generate_power_data()) for _ in range(1000)]
+    print(f"📦 Заповнюємо {args.topic}: {args.prefill} повідомлень...")
+    for i in range(args.prefill):
+        while True:
+            try:
+                producer.produce(args.topic, payloads[i % len(payloads)], key=str(i % 64).encode())
+                break
+            except BufferError:
+                producer.poll(0.05)
+    producer.flush()
+    return holder, bootstrap
+
+
+class GroupReport:
+    """Остання статистика кожного процесу та сумарна пропускна здатність"""
+
+    def __init__(self):
+        self.workers = {}
+        self.started = time.time()
+        self.reported_messages = 0
+        self.reported_at = time.monotonic()
+
+    def update(self, stats: dict):
+        self.workers[stats['worker']] = stats
+
+    @property
+    def messages(self) -> int:
+        return sum(stats['messages'] for stats in self.workers.values())
+
+    def print_progress(self):
+        now = time.monotonic()
+        messages = self.messages
+        rate = (messages - self.reported_messages) / (now - self.reported_at)
+        self.reported_messages, self.reported_at = messages, now
+        print(f"\n📊 Група: {messages} повідомлень, {rate:,.0f} msg/s за останній інтервал")
+        for worker_id, stats in sorted(self.workers.items()):
+            print(f"   👷 #{worker_id}: {stats['messages']} повідомлень, партиції {stats['partitions']}, "
+                  f"комітів {stats['commits']}, rebalance {stats['rebalances']}")
+
+    def print_summary(self):
+        messages = self.messages
+        print("\n📋 === ПІДСУМОК ГРУПИ ===")
+        started = [stats['first_at'] for stats in self.workers.values() if stats['first_at']]
+        finished = [stats['last_at'] for stats in self.workers.values() if stats['last_at']]
+        if started:
+            active = max(finished) - min(started)
+            print(f"📨 {messages} повідомлень за {active:.2f} с активного читання "
+                  f"({messages / max(active, 1e-9):,.0f} msg/s), всього {time.time() - self.started:.1f} с")
+        else:
+            print("📨 Повідомлень не отримано")
+        for worker_id, stats in sorted(self.workers.items()):
+            print(f"   👷 #{worker_id}: {stats['messages']} повідомлень, {stats['batches']} пакетів, "
+                  f"комітів {stats['commits']}, помилок коміту {stats['commit_errors']}")
+            if stats['error']:
+                print(f"      ❌ {stats['error']}")
+        warnings = {key: sum(stats['warnings'][key] for stats in self.workers.values()) for key in WARNINGS}
+        for key, count in warnings.items():
+            if count:
+                print(f"   {WARNINGS[key]}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Група consumer-процесів з ручними комітами")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="кількість процесів (0 - по одному на партицію, не більше кількості ядер)")
+    parser.add_argument('--bootstrap', default=BOOTSTRAP_SERVERS)
+    parser.add_argument('--topic', default=TOPIC)
+    parser.add_argument('--group', default=CONSUMER_GROUP)
+    parser.add_argument('--offset-reset', choices=['earliest', 'latest'], default='earliest',
+                        help="звідки читати партиції без закоміченого offset'у")
+    parser.add_argument('--max-records', type=int, default=MAX_POLL_RECORDS)
+    parser.add_argument('--commit', choices=['sync', 'async'], default='async',
+                        help="коміт після кожного пакета; на rebalance та зупинці - завжди sync")
+    parser.add_argument('--interval', type=float, default=REPORT_INTERVAL)
+    parser.add_argument('--duration', type=float, default=0, help="зупинитися через N секунд (0 - до Ctrl+C)")
+    parser.add_argument('--expect', type=int, default=0, help="зупинитися після N повідомлень")
+    parser.add_argument('--local', action='store_true', help="локальний mock-брокер librdkafka з --prefill")
+    parser.add_argument('--prefill', type=int, default=50000, help="повідомлень у топіку для --local")
+    args = parser.parse_args()
+
+    broker = None
+    if args.local:
+        broker, args.bootstrap = prepare_local_topic(args)
+        args.expect = args.expect or args.prefill
+
+    workers = args.workers
+    if workers <= 0:
+        partitions = count_partitions(args.bootstrap, args.topic)
+        workers = max(1, min(partitions or 1, os.cpu_count() or 1))
+        print(f"🧮 {args.topic}: {partitions} партицій, {os.cpu_count()} ядер -> {workers} процесів")
+
+    # spawn: головний процес може тримати потоки librdkafka (mock-брокер)
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    stats_queue = context.Queue()
+    processes = [context.Process(target=run_worker, args=(worker_id, args, stop, stats_queue),
+                                 name=f"consumer-{worker_id}") for worker_id in range(workers)]
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    print(f"🚀 Група {args.group!r}: {workers} процесів, топік {args.topic}, коміт {args.commit}")
+    for process in processes:
+        process.start()
+
+    report = GroupReport()
+    deadline = time.monotonic() + args.duration if args.duration else None
+    try:
+        while not stop.is_set():
+            try:
+                report.update(stats_queue.get(timeout=0.5))
+            except queue.Empty:
+                pass
+            if time.monotonic() - report.reported_at >= args.interval:
+                report.print_progress()
+            if args.expect and report.messages >= args.expect:
+                stop.set()
+            if deadline and time.monotonic() >= deadline:
+                stop.set()
+            if not any(process.is_alive() for process in processes):
+                break
+    except KeyboardInterrupt:
+        print("\n🛑 Зупинка групи: процеси завершують поточний пакет і комітять offset'и...")
+        # Повторний Ctrl+C не перериває очікування комітів
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        stop.set()
+
+    # Фінальна статистика надходить після коміту та виходу з групи
+    done = {worker_id for worker_id, stats in report.workers.items() if stats['done']}
+    finish_by = time.monotonic() + 30
+    while len(done) < workers and time.monotonic() < finish_by and any(p.is_alive() for p in processes):
+        try:
+            stats = stats_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        report.update(stats)
+        if stats['done']:
+            done.add(stats['worker'])
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+    report.print_summary()
+    del broker
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Замінник Cassandra сесії для бенчмарків без живого кластера
+
+FakeCassandraSession імітує prepare/execute/execute_async з налаштовуваною
+затримкою. Результати execute_async приходять з окремого потоку, як і в
+справжньому драйвері, тому асинхронні шари працюють без змін.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+
+
+class _DelayScheduler(threading.Thread):
+    """Один фоновий потік, що викликає колбеки після затримки"""
+
+    def __init__(self):
+        super().__init__(name='fake-cassandra-io', daemon=True)
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def schedule(self, delay: float, fn, *args):
+        with self._condition:
+            heapq.heappush(self._queue, (time.monotonic() + delay, next(self._counter), fn, args))
+            self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                due, _, fn, args = self._queue[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                heapq.heappop(self._queue)
+            fn(*args)
+
+
+class FakeResponseFuture:
+    """Мінімальний аналог cassandra.cluster.ResponseFuture"""
+
+    def __init__(self, scheduler: _DelayScheduler, delay: float, result=None, error=None):
+        self._scheduler = scheduler
+        self._delay = delay
+        self._result = result
+        self._error = error
+        self._done = threading.Event()
+
+    def add_callbacks(self, callback, errback, callback_args=(), callback_kwargs=None,
+                      errback_args=(), errback_kwargs=None):
+        self._scheduler.schedule(self._delay, self._complete,
+                                 callback, callback_args, callback_kwargs or {},
+                                 errback, errback_args, errback_kwargs or {})
+
+    def _complete(self, callback, callback_args, callback_kwargs,
+                  errback, errback_args, errback_kwargs):
+        self._done.set()
+        if self._error is not None:
+            errback(self._error, *errback_args, **errback_kwargs)
+        else:
+            callback(self._result, *callback_args, **callback_kwargs)
+
+    def result(self):
+        time.sleep(self._delay)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class FakeCassandraSession:
+    """
+    Сесія Cassandra з фіксованою затримкою та опційною часткою помилок
+
+    latency_ms - затримка одного запиту; jitter_ms - випадкова добавка до неї;
+    error_rate - частка запитів, що завершуються помилкою.
+    """
+
+    def __init__(self, latency_ms: float = 1.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.executed = 0
+        self.failed = 0
+        self.keyspace = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._scheduler = _DelayScheduler()
+        self._scheduler.start()
+
+    def prepare(self, query: str):
+        """
+        Повертає текст запиту замість PreparedStatement
+
+        Маркери ? замінюються на %s, щоб такий запит можна було додати
+        в BatchStatement (драйвер підставляє параметри у звичайний рядок).
+        """
+        return query.replace('?', '%s')
+
+    def set_keyspace(self, keyspace: str):
+        self.keyspace = keyspace
+
+    def _next_delay_and_error(self):
+        with self._lock:
+            self.executed += 1
+            delay = (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000.0
+            error = None
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.failed += 1
+                error = RuntimeError("Fake Cassandra write failure")
+        return delay, error
+
+    def execute_async(self, statement, parameters=None, *args, **kwargs) -> FakeResponseFuture:
+        delay, error = self._next_delay_and_error()
+        return FakeResponseFuture(self._scheduler, delay, result=[], error=error)
+
+    def execute(self, statement, parameters=None, *args, **kwargs):
+        return self.execute_async(statement, parameters).result()
+
+    def shutdown(self):
+        pass
@@ -1,9 +1,10 @@
-import json, random, uuid, time
-from datetime import datetime
+import random, sys
 import argparse
+from bulk_gen import BulkTelemetryGenerator, to_json_lines
+from timestamps import now_ms
 
 FIELDS = [
-    "device_id","timestamp","power_output","efficiency","temperature",
+    "device_id","timestamp_ms","power_output","efficiency","temperature",
     "voltage","current","status","location","maintenance_hours",
     "wind_speed","rotor_rpm","blade_angle"
 ]
@@ -14,12 +15,14 @@ blade_angles = ["auto","manual","feathered"]
 def rand_device(i):
     return f"WIND_ZP_{i:03d}"
 
+# Генерація по одному запису (random + dict); не використовується для виводу,
+# залишена як базовий варіант для порівняння в бенчмарку bulk_gen.py
 def gen_record(device_index):
     lat = round(random.uniform(47.0,48.0),6)
     lon = round(random.uniform(34.0,36.0),6)
     return {
         "device_id": rand_device(device_index),
-        "timestamp": datetime.now().isoformat()+"Z",
+        "timestamp_ms": now_ms(),
         "power_output": round(random.uniform(0.0,3000.0),2),
         "efficiency": round(random.uniform(25.0,45.0),2),
         "temperature": round(random.uniform(-10.0,40.0),2),
@@ -38,15 +41,16 @@ if __name__ == "__main__":
     p.add_argument("--num", type=int, default=1000)
     p.add_argument("--devices", type=int, default=30)
     p.add_argument("--out", default="-")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--start", type=float, default=None,
+                   help="epoch-секунди першого запису (з --seed за замовчуванням - фіксований початок)")
+    p.add_argument("--batch", type=int, default=100_000)
     args = p.parse_args()
 
-    out = open(args.out, "w") if args.out != "-" else None
-    for i in range(args.num):
-        rec = gen_record((i % args.devices) + 1)
-        s = json.dumps(rec, ensure_ascii=False)
-        if out:
-            out.write(s + "\n")
-        else:
-            print(s)
-    if out:
+    # Записи генеруються та серіалізуються пакетами (bulk_gen.py)
+    generator = BulkTelemetryGenerator(args.devices, seed=args.seed, start=args.start)
+    out = open(args.out, "w") if args.out != "-" else sys.stdout
+    for begin in range(0, args.num, args.batch):
+        out.write(to_json_lines(generator.batch(min(args.batch, args.num - begin))))
+    if out is not sys.stdout:
         out.close()
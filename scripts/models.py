@@ -1,11 +1,11 @@
 from faust import Record
 from typing import Optional
+from timestamps import iso_to_ms
 
 
 class TurbineTelemetry(Record):
     """Модель телеметрії вітрової турбіни"""
     device_id: str
-    timestamp: str
     power_output: float
     wind_speed: float
     wind_direction: float
@@ -13,6 +13,22 @@ class TurbineTelemetry(Record):
     vibration: float
     temperature_generator: float
     temperature_gearbox: float
+    # Час події, epoch мілісекунди
+    timestamp_ms: Optional[int] = None
+    # ISO-мітка часу зі старих повідомлень (до timestamp_ms)
+    timestamp: Optional[str] = None
+
+    def event_time_ms(self) -> int:
+        """
+        Час події в epoch мілісекундах (для старих повідомлень - з ISO timestamp)
+
+        ValueError, якщо в записі немає жодної мітки часу або ISO-мітка некоректна.
+        """
+        if self.timestamp_ms is not None:
+            return self.timestamp_ms
+        if self.timestamp is None:
+            raise ValueError(f"Запис телеметрії {self.device_id} без timestamp_ms і timestamp")
+        return iso_to_ms(self.timestamp)
 
 
 class CurtailmentRequest(Record):
@@ -0,0 +1,419 @@
+"""
+Запис power-station-data з Kafka в Cassandra (sink)
+
+Запис по одному рядку на повідомлення синхронним session.execute() впирається
+в round trip Cassandra (~1-2 мс), тобто ~1000 рядків/с на весь consumer.
+PowerSink натомість:
+- буферизує записи кількох poll() (до --flush-rows або --flush-interval);
+- групує рядки за ключем партиції Cassandra (станція, доба) і пише кожну
+  групу UNLOGGED batch'ами до --batch-rows рядків - batch однієї партиції
+  виконується одним вузлом-реплікою без координації між вузлами;
+- відправляє batch'і через AsyncCassandraWriter: execute_async з не більше
+  ніж --max-in-flight запитами у польоті;
+- повторює невдалі batch'і з експоненційною паузою (запис ідемпотентний:
+  первинний ключ містить партицію та offset Kafka);
+- комітить offset'и Kafka лише після успішного запису всього буфера.
+
+Якщо запис не вдався після всіх повторів, sink зупиняється без коміту:
+після перезапуску ті самі повідомлення читаються й записуються ще раз
+(at-least-once без дублікатів у таблиці). При rebalance буфер
+відкидається - нові власники партицій читають їх від закоміченого offset'у.
+
+Таблиця power_station_readings створюється setup_cassandra.py.
+
+Приклади:
+    python power_sink.py run                                # Kafka -> Cassandra
+    python power_sink.py run --local --fake-cassandra 2     # mock-брокер -> замінник Cassandra
+    python power_sink.py bench --rows 50000 --latency-ms 2  # пропускна здатність без Kafka
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import threading
+import time
+from collections import namedtuple
+
+from cassandra.query import BatchStatement, BatchType
+from kafka import ConsumerRebalanceListener, TopicPartition
+from kafka.structs import OffsetAndMetadata
+
+from cassandra_async import AsyncCassandraWriter
+from shared_setup import CASSANDRA_MAX_IN_FLIGHT, KEYSPACE
+from simple_consumer import (BOOTSTRAP_SERVERS, MAX_POLL_RECORDS, TOPIC, create_consumer, decode_batch,
+                             decode_records)
+from timestamps import iso_to_ms, now_ms
+
+SINK_GROUP = os.getenv('POWER_SINK_GROUP', 'power-sink')
+# Буфер записується, коли в ньому FLUSH_ROWS рядків або минуло FLUSH_INTERVAL секунд
+FLUSH_ROWS = int(os.getenv('POWER_SINK_FLUSH_ROWS', '5000'))
+FLUSH_INTERVAL = float(os.getenv('POWER_SINK_FLUSH_INTERVAL', '1.0'))
+# Рядків однієї партиції в одному UNLOGGED batch
+BATCH_ROWS = int(os.getenv('POWER_SINK_BATCH_ROWS', '50'))
+WRITE_RETRIES = int(os.getenv('POWER_SINK_RETRIES', '3'))
+RETRY_BACKOFF = 0.05
+DAY_MS = 86_400_000
+# CQL DATE - беззнакове число днів, де 2^31 відповідає 1970-01-01
+CQL_DATE_EPOCH = 2 ** 31
+
+INSERT = ("INSERT INTO power_station_readings (station_name, day, timestamp, source_partition, "
+          "source_offset, station_type, power_output_mw, voltage_kv, frequency_hz, efficiency_percent) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def to_row(data: dict, partition: int, offset: int) -> tuple:
+    """
+    Рядок power_station_readings з повідомлення; (partition, offset) роблять ключ унікальним
+
+    simple_producer пише timestamp в UTC з явною зоною; мітка без зони
+    (повідомлення старих producer'ів) трактується як UTC. ValueError, якщо
+    timestamp не ISO-рядок.
+    """
+    if 'timestamp' not in data:
+        timestamp = now_ms()
+    elif isinstance(data['timestamp'], str):
+        timestamp = iso_to_ms(data['timestamp'])
+    else:
+        raise ValueError(f"timestamp має бути ISO-рядком, отримано {data['timestamp']!r}")
+    return (data.get('station_name', 'Невідома станція'), timestamp // DAY_MS + CQL_DATE_EPOCH,
+            timestamp, partition, offset, data.get('station_type', 'unknown'),
+            data.get('power_output_mw', 0), data.get('voltage_kv', 0),
+            data.get('frequency_hz', 0), data.get('efficiency_percent', 0))
+
+
+class PowerSink:
+    """Буфер записів топіка та їх запис у Cassandra batch'ами по партиціях"""
+
+    def __init__(self, writer: AsyncCassandraWriter, insert, batch_rows: int = BATCH_ROWS,
+                 retries: int = WRITE_RETRIES):
+        self.writer = writer
+        self.insert = insert
+        self.batch_rows = batch_rows
+        self.retries = retries
+        self.written = 0
+        self.batches = 0
+        self.retried = 0
+        self.flushes = 0
+        self.discarded = 0
+        # Повідомлення з некоректним timestamp: пропускаються, offset іде далі
+        self.skipped = 0
+        self.write_seconds = 0.0
+        self.discard()
+
+    def discard(self) -> int:
+        """Відкидає буфер без запису; повертає кількість відкинутих рядків"""
+        dropped = len(getattr(self, 'rows', ()))
+        self.rows = []
+        # TopicPartition -> offset наступного повідомлення (те, що комітиться)
+        self.offsets = {}
+        self.buffered_at = None
+        self.discarded += dropped
+        return dropped
+
+    def add(self, polled: dict):
+        """Додає результат consumer.poll() ({TopicPartition: [ConsumerRecord]}) у буфер"""
+        for tp, records in polled.items():
+            if not records:
+                continue
+            for record, data in decode_records(records):
+                try:
+                    self.rows.append(to_row(data, tp.partition, record.offset))
+                except ValueError as e:
+                    self.skipped += 1
+                    print(f"⚠️ Пропущено повідомлення {tp.partition}:{record.offset}: {e}")
+            self.offsets[tp] = records[-1].offset + 1
+            if self.buffered_at is None:
+                self.buffered_at = time.monotonic()
+
+    def due(self, flush_rows: int = FLUSH_ROWS, flush_interval: float = FLUSH_INTERVAL) -> bool:
+        return bool(self.offsets) and (len(self.rows) >= flush_rows
+                                    or time.monotonic() - self.buffered_at >= flush_interval)
+
+    def statements(self):
+        """UNLOGGED batch'і до batch_rows рядків, кожен - рядки однієї партиції (станція, доба)"""
+        partitions = {}
+        for row in self.rows:
+            partitions.setdefault(row[:2], []).append(row)
+        for rows in partitions.values():
+            for begin in range(0, len(rows), self.batch_rows):
+                chunk = rows[begin:begin + self.batch_rows]
+                if len(chunk) == 1:
+                    yield self.insert, chunk[0]
+                    continue
+                batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+                for row in chunk:
+                    batch.add(self.insert, row)
+                yield batch, None
+
+    async def flush(self) -> dict:
+        """
+        Записує буфер і повертає offset'и для коміту
+
+        Якщо хоч один batch не записано після всіх повторів, піднімає його
+        помилку; буфер при цьому залишається незакоміченим.
+        """
+        if not self.offsets:
+            return {}
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._write(statement, parameters)
+                                         for statement, parameters in self.statements()),
+                                       return_exceptions=True)
+        self.write_seconds += time.perf_counter() - start
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+
+        offsets = {tp: OffsetAndMetadata(offset, None) for tp, offset in self.offsets.items()}
+        self.written += len(self.rows)
+        self.batches += len(results)
+        self.flushes += 1
+        self.rows = []
+        self.offsets = {}
+        self.buffered_at = None
+        return offsets
+
+    async def _write(self, statement, parameters):
+        for attempt in range(self.retries + 1):
+            try:
+                return await self.writer.execute(statement, parameters)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                self.retried += 1
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+
+class DiscardOnRevoke(ConsumerRebalanceListener):
+    """
+    Rebalance listener: незакомічений буфер відкидається при відкликанні партицій
+
+    kafka-python відкликає всі партиції учасника на кожному rebalance, а після
+    призначення читає їх від закоміченого offset'у, тож відкинуті рядки буде
+    прочитано знову - цим або іншим учасником групи.
+    """
+
+    def __init__(self, sink: PowerSink):
+        self.sink = sink
+
+    def on_partitions_revoked(self, revoked):
+        dropped = self.sink.discard()
+        if dropped:
+            print(f"🔄 Rebalance: відкинуто {dropped} незаписаних рядків, їх буде прочитано знову")
+
+    def on_partitions_assigned(self, assigned):
+        print(f"📌 Партиції: {sorted(tp.partition for tp in assigned)}")
+
+
+def print_progress(sink: PowerSink, started: float):
+    elapsed = time.monotonic() - started
+    print(f"💾 {sink.written} рядків за {elapsed:.1f} с ({sink.written / elapsed:,.0f} рядків/с) | "
+          f"batch'ів {sink.batches}, повторів {sink.retried}, пропущено {sink.skipped}, "
+          f"запис {sink.write_seconds:.1f} с, у буфері {len(sink.rows)}")
+
+
+async def consume_to_cassandra(consumer, sink: PowerSink, stop: threading.Event, args):
+    """
+    Цикл sink'а: poll() у буфер, запис буфера, коміт його offset'ів
+
+    poll() блокує event loop, але в цей час запитів у польоті немає:
+    flush() завершує всі записи буфера до наступного poll().
+    """
+    started = time.monotonic()
+    last_report = started
+    try:
+        while not stop.is_set():
+            sink.add(consumer.poll(timeout_ms=200, max_records=args.max_records))
+            if sink.due(args.flush_rows, args.flush_interval):
+                consumer.commit(await sink.flush())
+            if time.monotonic() - last_report >= args.interval:
+                print_progress(sink, started)
+                last_report = time.monotonic()
+            if args.expect and sink.written >= args.expect:
+                break
+        # Залишок буфера записується й комітиться перед виходом
+        consumer.commit(await sink.flush())
+    finally:
+        print_progress(sink, started)
+
+
+def connect(args):
+    """Сесія Cassandra та підготовлений INSERT (таблицю створює setup_cassandra.py)"""
+    if args.fake_cassandra is not None:
+        from fake_cassandra import FakeCassandraSession
+        session = FakeCassandraSession(latency_ms=args.fake_cassandra, jitter_ms=args.fake_cassandra / 2)
+        print(f"🧪 Замінник Cassandra: {args.fake_cassandra} мс на запит")
+        return None, session, session.prepare(INSERT)
+
+    from shared_setup import ensure_keyspace, get_cassandra_session
+    cluster, session = get_cassandra_session()
+    ensure_keyspace(session)
+    return cluster, session, session.prepare(INSERT)
+
+
+def run(args):
+    broker = None
+    if args.local:
+        from consumer_group import prepare_local_topic
+        broker, args.bootstrap = prepare_local_topic(args)
+        args.expect = args.expect or args.prefill
+
+    cluster, session, insert = connect(args)
+    consumer = create_consumer(args.bootstrap, value_deserializer=None, group_id=args.group, topics=(),
+                               enable_auto_commit=False, auto_offset_reset=args.offset_reset)
+    if not consumer:
+        return
+
+    stop = threading.Event()
+    # Перший Ctrl+C завершує поточний flush, записує буфер і комітить його
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    async def main_loop():
+        sink = PowerSink(AsyncCassandraWriter(session, args.max_in_flight), insert,
+                         args.batch_rows, args.retries)
+        consumer.subscribe([args.topic], listener=DiscardOnRevoke(sink))
+        print(f"👀 {args.topic} -> {KEYSPACE}.power_station_readings, група {args.group}; "
+              f"flush кожні {args.flush_rows} рядків / {args.flush_interval} с, "
+              f"до {args.max_in_flight} запитів у польоті")
+        await consume_to_cassandra(consumer, sink, stop, args)
+
+    try:
+        asyncio.run(main_loop())
+    except Exception as e:
+        print(f"❌ Запис зупинено без коміту буфера: {type(e).__name__}: {e}")
+    finally:
+        consumer.close(autocommit=False)
+        if cluster is not None:
+            cluster.shutdown()
+        del broker
+        print("🔌 З'єднання закрито")
+
+
+def make_polled(payloads, count: int, partitions: int = 4):
+    """Пакети у форматі consumer.poll() без Kafka: повідомлення по черзі в partitions партицій"""
+    Record = namedtuple('Record', 'offset value')
+    polled = {TopicPartition(TOPIC, p): [] for p in range(partitions)}
+    tps = list(polled)
+    for i in range(count):
+        records = polled[tps[i % partitions]]
+        records.append(Record(len(records), payloads[i % len(payloads)]))
+    return polled
+
+
+async def bench_sink(polled, latency_ms: float, max_in_flight: int, batch_rows: int, flush_rows: int):
+    """Пропускна здатність PowerSink: буфер по flush_rows рядків, запис і 'коміт'"""
+    from fake_cassandra import FakeCassandraSession
+
+    session = FakeCassandraSession(latency_ms=latency_ms, jitter_ms=latency_ms / 2, seed=42)
+    sink = PowerSink(AsyncCassandraWriter(session, max_in_flight), session.prepare(INSERT), batch_rows)
+    per_flush = max(1, flush_rows // len(polled))
+    start = time.perf_counter()
+    for begin in range(0, max(map(len, polled.values())), per_flush):
+        sink.add({tp: records[begin:begin + per_flush] for tp, records in polled.items()})
+        await sink.flush()
+    return sink.written, time.perf_counter() - start, session.executed
+
+
+def bench_sync(polled, latency_ms: float, count: int):
+    """Базовий варіант: session.execute() на кожне повідомлення"""
+    from fake_cassandra import FakeCassandraSession
+
+    session = FakeCassandraSession(latency_ms=latency_ms, jitter_ms=latency_ms / 2, seed=42)
+    insert = session.prepare(INSERT)
+    records = [(tp, record) for tp, items in polled.items() for record in items][:count]
+    start = time.perf_counter()
+    for tp, record in records:
+        session.execute(insert, to_row(decode_batch([record.value])[0], tp.partition, record.offset))
+    return len(records), time.perf_counter() - start, session.executed
+
+
+def check_bad_timestamps():
+    """
+    Перевірка: повідомлення з некоректним timestamp пропускаються,
+    а offset'и для коміту йдуть далі за них
+    """
+    from fake_cassandra import FakeCassandraSession
+    from simple_producer import encode_value, generate_power_data
+
+    bad = [dict(generate_power_data(), timestamp=value) for value in ('not-a-date', None, 1700000000)]
+    payloads = [encode_value(generate_power_data()), *map(encode_value, bad), encode_value(generate_power_data())]
+    polled = make_polled(payloads, len(payloads), partitions=1)
+    session = FakeCassandraSession(latency_ms=0.0)
+    sink = PowerSink(AsyncCassandraWriter(session), session.prepare(INSERT))
+    sink.add(polled)
+    offsets = asyncio.run(sink.flush())
+    if sink.skipped != len(bad) or sink.written != len(payloads) - len(bad):
+        raise AssertionError(f"очікувано пропустити {len(bad)} повідомлень, пропущено {sink.skipped}")
+    if [meta.offset for meta in offsets.values()] != [len(payloads)]:
+        raise AssertionError(f"offset'и не пройшли пропущені повідомлення: {offsets}")
+    print(f"✅ Некоректні timestamp'и: пропущено {sink.skipped}, записано {sink.written}, "
+          f"offset для коміту {len(payloads)}")
+
+
+def benchmark(args):
+    """
+    Пропускна здатність запису без Kafka поверх FakeCassandraSession
+
+    Замінник не залежить від розміру batch'а, тому результати показують
+    виграш від паралельності й меншої кількості запитів, а не стелю кластера.
+    """
+    from simple_producer import encode_value, generate_power_data
+
+    check_bad_timestamps()
+    payloads = [encode_value(generate_power_data()) for _ in range(1000)]
+    polled = make_polled(payloads, args.rows)
+    print(f"🧪 Sink benchmark: {args.rows} рядків, latency={args.latency_ms} мс (+ jitter до "
+          f"{args.latency_ms / 2} мс), flush по {args.flush_rows} рядків")
+    runs = [('sync по рядку', None, None)]
+    runs += [(f"async, in-flight {n}", n, 1) for n in args.max_in_flight]
+    runs += [(f"batch {args.batch_rows}, in-flight {n}", n, args.batch_rows) for n in args.max_in_flight]
+
+    print(f"{'Режим':<26} {'рядків/с':>10} {'запитів':>9} {'час, с':>8}")
+    for label, max_in_flight, batch_rows in runs:
+        if max_in_flight is None:
+            written, elapsed, requests = bench_sync(polled, args.latency_ms, args.sync_rows)
+        else:
+            written, elapsed, requests = asyncio.run(bench_sink(
+                polled, args.latency_ms, max_in_flight, batch_rows, args.flush_rows))
+        print(f"{label:<26} {written / elapsed:>10,.0f} {requests:>9} {elapsed:>8.2f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Запис power-station-data з Kafka в Cassandra")
+    parser.add_argument('command', choices=['run', 'bench'])
+    parser.add_argument('--bootstrap', default=BOOTSTRAP_SERVERS)
+    parser.add_argument('--topic', default=TOPIC)
+    parser.add_argument('--group', default=SINK_GROUP)
+    parser.add_argument('--offset-reset', choices=['earliest', 'latest'], default='earliest',
+                        help="звідки читати партиції без закоміченого offset'у")
+    parser.add_argument('--max-records', type=int, default=MAX_POLL_RECORDS)
+    parser.add_argument('--flush-rows', type=int, default=FLUSH_ROWS)
+    parser.add_argument('--flush-interval', type=float, default=FLUSH_INTERVAL)
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS)
+    parser.add_argument('--retries', type=int, default=WRITE_RETRIES)
+    parser.add_argument('--interval', type=float, default=5.0, help="інтервал між звітами, секунд")
+    parser.add_argument('--expect', type=int, default=0, help="зупинитися після N записаних рядків")
+    parser.add_argument('--fake-cassandra', type=float, metavar='LATENCY_MS',
+                        help="замінник Cassandra з заданою затримкою замість кластера")
+    parser.add_argument('--local', action='store_true', help="локальний mock-брокер librdkafka з --prefill")
+    parser.add_argument('--prefill', type=int, default=50000, help="повідомлень у топіку для --local")
+    # bench
+    parser.add_argument('--max-in-flight', type=int, nargs='+', default=[CASSANDRA_MAX_IN_FLIGHT])
+    parser.add_argument('--rows', type=int, default=50000, help="рядків для bench")
+    parser.add_argument('--sync-rows', type=int, default=2000, help="рядків для синхронного варіанта bench")
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.command == 'bench':
+        benchmark(args)
+    else:
+        args.max_in_flight = args.max_in_flight[0]
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,31 @@
 import asyncio
-import random
-from datetime import datetime
+import math
+import time
+from array import array
 from faust import Topic
-from shared_setup import app
+from faust.cli import option
+from shared_setup import app, device_topic
 from models import TurbineTelemetry
+from bulk_gen import BulkTelemetryGenerator, TELEMETRY_FIELDS, iter_rows
+from metrics import Counter, Histogram
+from structured_log import get_logger
 
-# Топік для телеметрії
-telemetry_topic: Topic = app.topic('turbine_telemetry', value_type=TurbineTelemetry)
+# Топік для телеметрії (ключ - device_id)
+telemetry_topic: Topic = device_topic('turbine_telemetry', TurbineTelemetry)
 
 # Кількість турбін: 150 (згідно з Варіантом 2)
 NUM_DEVICES = 150
+# Інтервал між записами однієї турбіни, секунд
+SEND_INTERVAL = 5.0
+# Номінальна потужність турбіни, кВт (2.5 МВт)
+RATED_POWER = 2500.0
+# Максимальний розмір пакета, що генерується наперед
+GENERATE_CHUNK = 1000
+
+log = get_logger('producer')
+
+PRODUCER_MESSAGES = Counter('producer_messages_total', 'Відправлені записи телеметрії')
+PRODUCER_SEND_SECONDS = Histogram('producer_send_latency_seconds', 'Час відправки запису в топік')
 
 
 def get_device_id(device_index: int) -> str:
@@ -17,48 +33,144 @@ def get_device_id(device_index: int) -> str:
     return f"WIND_ZP_{device_index:03d}"
 
 
-def generate_telemetry_record(device_index: int) -> TurbineTelemetry:
-    """Генерує запис телеметрії для турбіни"""
-    # Максимальна потужність 2.5 МВт = 2500 кВт
-    max_power = 2500.0
-    return TurbineTelemetry(
-        device_id=get_device_id(device_index),
-        timestamp=datetime.utcnow().isoformat() + "Z",
-        power_output=round(random.uniform(0.0, max_power), 2),
-        wind_speed=round(random.uniform(3.0, 25.0), 2),
-        wind_direction=round(random.uniform(0.0, 360.0), 2),
-        blade_pitch=round(random.uniform(-5.0, 20.0), 2),
-        vibration=round(random.uniform(0.0, 10.0), 2),
-        temperature_generator=round(random.uniform(40.0, 80.0), 2),
-        temperature_gearbox=round(random.uniform(30.0, 70.0), 2),
-    )
-
-
 async def produce_telemetry():
-    """Головна функція producer - генерує та відправляє телеметрію кожні 5 секунд"""
-    device_counter = 0
-    
+    """Головна функція producer - кожна турбіна надсилає телеметрію раз на 5 секунд"""
     print("🚀 Запуск Faust Producer для генерації телеметрії...")
-    print(f"📡 Відправка даних в топік 'turbine_telemetry' кожні 5 секунд...")
+    print(f"📡 Відправка даних в топік 'turbine_telemetry' кожні {SEND_INTERVAL:.0f} секунд...")
     print(f"🏭 Кількість турбін: {NUM_DEVICES} (WIND_ZP_001 до WIND_ZP_{NUM_DEVICES:03d})")
-    print(f"⚡ Throughput: ~{NUM_DEVICES / 5:.0f} msg/sec")
-    
-    while True:
-        # Генеруємо запис для наступної турбіни (циклічно)
-        device_index = (device_counter % NUM_DEVICES) + 1
-        record = generate_telemetry_record(device_index)
-        
-        # Відправляємо в топік
-        await telemetry_topic.send(value=record)
-        
-        print(f"📤 Відправлено телеметрію: {record.device_id} | "
-              f"Power: {record.power_output:.2f} kW | "
-              f"Wind: {record.wind_speed:.2f} m/s")
-        
-        device_counter += 1
-        
-        # Чекаємо 5 секунд перед наступною генерацією
-        await asyncio.sleep(5)
+    print(f"⚡ Throughput: ~{NUM_DEVICES / SEND_INTERVAL:.0f} msg/sec")
+
+    # Турбіни по колу з темпом NUM_DEVICES / SEND_INTERVAL, без очікування кожного запису
+    generator = LoadGenerator(rate=NUM_DEVICES / SEND_INTERVAL, num_devices=NUM_DEVICES,
+                              duration=math.inf, max_pending=NUM_DEVICES, keep_latencies=False)
+    await generator.run()
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Перцентиль q (0..100) відсортованої послідовності"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LoadGenerator:
+    """
+    Генератор навантаження на turbine_telemetry
+
+    Записи відправляються без очікування підтвердження кожного: send()
+    лише ставить запис у буфер producer'а, а підтвердження обробляється
+    колбеком. Кількість непідтверджених записів обмежена max_pending -
+    при досягненні ліміту генератор чекає, доки брокер не підтвердить
+    попередні записи. rate=0 означає максимальну швидкість.
+
+    Записи генеруються пакетами (bulk_gen.py) приблизно на секунду
+    вперед; час події пакета - момент його генерації.
+    """
+
+    def __init__(self, rate: float, num_devices: int, duration: float, max_pending: int,
+                 keep_latencies: bool = True):
+        if max_pending <= 0:
+            raise ValueError("max_pending має бути додатним")
+        self.rate = rate
+        self.num_devices = num_devices
+        self.duration = duration
+        self.max_pending = max_pending
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+        # Затримки для звіту; безстроковий режим їх не накопичує
+        self.latencies = array('d') if keep_latencies else None
+        self._slots = asyncio.Semaphore(max_pending)
+        self._source = BulkTelemetryGenerator(
+            num_devices, rated_power=RATED_POWER,
+            device_interval=num_devices / rate if rate else 0.0,
+        )
+        self._chunk = max(1, min(GENERATE_CHUNK, int(rate))) if rate else GENERATE_CHUNK
+        self._rows = iter(())
+
+    def next_record(self) -> TurbineTelemetry:
+        """Наступний запис телеметрії (турбіни по колу)"""
+        row = next(self._rows, None)
+        if row is None:
+            columns = self._source.batch(self._chunk, start=time.time())
+            self._rows = iter_rows(columns, TELEMETRY_FIELDS, decimals=2)
+            row = next(self._rows)
+        # Порядок TELEMETRY_FIELDS збігається з полями TurbineTelemetry
+        return TurbineTelemetry(*row)
+
+    def _on_delivered(self, future, sent_at: float):
+        self._slots.release()
+        if future.cancelled() or future.exception() is not None:
+            self.failed += 1
+            log.error('telemetry_send_failed', error=None if future.cancelled() else future.exception())
+            return
+        latency = time.perf_counter() - sent_at
+        self.delivered += 1
+        if self.latencies is not None:
+            self.latencies.append(latency)
+        PRODUCER_MESSAGES.inc()
+        PRODUCER_SEND_SECONDS.observe(latency)
+
+    async def run(self):
+        """Відправляє записи протягом duration секунд та чекає всіх підтверджень"""
+        start = time.perf_counter()
+        deadline = start + self.duration
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if self.rate:
+                # Темп рахується від старту, тому затримки не накопичуються
+                delay = start + self.sent / self.rate - now
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+            await self._slots.acquire()
+            record = self.next_record()
+            sent_at = time.perf_counter()
+            try:
+                future = await telemetry_topic.send(key=record.device_id, value=record)
+            except Exception as e:
+                self._slots.release()
+                self.failed += 1
+                log.error('telemetry_send_failed', device_id=record.device_id, error=e)
+                continue
+            future.add_done_callback(lambda f, t=sent_at: self._on_delivered(f, t))
+            self.sent += 1
+        send_elapsed = time.perf_counter() - start
+
+        # Чекаємо підтвердження всіх записів у польоті
+        for _ in range(self.max_pending):
+            await self._slots.acquire()
+        return send_elapsed, time.perf_counter() - start
+
+    def report(self, send_elapsed: float, total_elapsed: float):
+        ordered = sorted(self.latencies or ())
+        print(f"📊 Відправлено: {self.sent} | підтверджено: {self.delivered} | помилок: {self.failed}")
+        print(f"⚡ Throughput: {self.sent / send_elapsed if send_elapsed else 0:.1f} msg/s відправки, "
+              f"{self.delivered / total_elapsed if total_elapsed else 0:.1f} msg/s підтверджених")
+        if ordered:
+            print(f"⏱️  Delivery latency: p50={percentile(ordered, 50) * 1000:.2f}ms "
+                  f"p95={percentile(ordered, 95) * 1000:.2f}ms "
+                  f"p99={percentile(ordered, 99) * 1000:.2f}ms "
+                  f"max={ordered[-1] * 1000:.2f}ms")
+
+
+@app.command(
+    option('--rate', type=float, default=0.0, help='Цільовий темп, msg/s (0 - без обмеження)'),
+    option('--devices', type=int, default=NUM_DEVICES, help='Кількість турбін'),
+    option('--duration', type=float, default=60.0, help='Тривалість навантаження, секунд'),
+    option('--max-pending', type=int, default=1000, help='Максимум непідтверджених записів'),
+)
+async def load(self, rate: float, devices: int, duration: float, max_pending: int):
+    """Режим генерації навантаження: faust -A producer load --rate 2000 --duration 60"""
+    print(f"🚀 Генерація навантаження на 'turbine_telemetry': "
+          f"{'без обмеження' if not rate else f'{rate:.0f} msg/s'}, "
+          f"{devices} турбін, {duration:.0f}s, pending <= {max_pending}")
+    generator = LoadGenerator(rate, devices, duration, max_pending)
+    send_elapsed, total_elapsed = await generator.run()
+    generator.report(send_elapsed, total_elapsed)
 
 
 @app.on_worker_init
@@ -0,0 +1,127 @@
+"""
+Бенчмарк часу холодного старту: memory vs RocksDB сховище
+
+Замість живого брокера використовується stand-in changelog'у таблиці
+power_aggregates: список записів (device_id, стан турбіни в бінарному
+кодуванні 'device_state'), тобто ті самі байти, що пише worker.
+
+- memory: після рестарту стан відновлюється replay'ем усього changelog'у
+  (кількість записів = турбіни * записів на турбіну до компакції);
+- rocksdb: стан уже лежить у локальній БД разом з offset'ом, тому
+  відкривається БД і догружається лише хвіст changelog'у після offset'у.
+
+Приклад:
+    python recovery_bench.py --devices 150 --records-per-key 500 --tail 2000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from faust.stores.rocksdb import RocksDBOptions
+from shared_setup import ROCKSDB_OPTIONS
+from telemetry_buffer import new_device_state, encode_device_state, decode_device_state
+
+# Ключ, під яким у RocksDB зберігається offset changelog'у (як робить faust)
+OFFSET_KEY = b'__faust\x00offset__'
+
+
+def build_changelog(num_devices: int, records_per_key: int, seed: int):
+    """Генерує changelog: кожен запис - повний стан турбіни після оновлення"""
+    rnd = random.Random(seed)
+    states = {f"WIND_ZP_{i:03d}": new_device_state() for i in range(1, num_devices + 1)}
+    changelog = []
+    event_time = 1_700_000_000.0
+    for _ in range(records_per_key):
+        event_time += 5.0
+        for device_id, state in states.items():
+            state.record(event_time, rnd.uniform(0.0, 2500.0))
+            changelog.append((device_id.encode(), encode_device_state(state)))
+    return changelog
+
+
+def cold_start_memory(changelog) -> float:
+    """Replay усього changelog'у в dict (як memory:// сховище)"""
+    start = time.perf_counter()
+    data = {}
+    for key, value in changelog:
+        data[key.decode()] = decode_device_state(value)
+    return time.perf_counter() - start
+
+
+def _close(db):
+    close = getattr(db, 'close', None)
+    if close is not None:
+        close()
+
+
+def prepare_rocksdb(path: str, changelog, checkpoint_offset: int):
+    """Записує стан до checkpoint_offset у локальну RocksDB (як worker до рестарту)"""
+    db = RocksDBOptions(**ROCKSDB_OPTIONS).open(path)
+    for key, value in changelog[:checkpoint_offset]:
+        db.put(key, value)
+    db.put(OFFSET_KEY, str(checkpoint_offset).encode())
+    _close(db)
+
+
+def cold_start_rocksdb(path: str, changelog) -> float:
+    """Відкриває локальну RocksDB і догружає хвіст changelog'у після offset'у"""
+    start = time.perf_counter()
+    db = RocksDBOptions(**ROCKSDB_OPTIONS).open(path)
+    offset = int(db.get(OFFSET_KEY) or b'0')
+    data = {}
+    for key, value in changelog[offset:]:
+        # Декодування, як у memory-режимі: обидва режими роблять однакову роботу на запис
+        data[key.decode()] = decode_device_state(value)
+        db.put(key, value)
+    db.put(OFFSET_KEY, str(len(changelog)).encode())
+    _close(db)
+    return time.perf_counter() - start
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def main():
+    p = argparse.ArgumentParser(description="Холодний старт: memory vs RocksDB")
+    p.add_argument("--devices", type=int, default=150)
+    p.add_argument("--records-per-key", type=int, default=500,
+                   help="записів changelog'у на турбіну, що replay'яться в memory-режимі")
+    p.add_argument("--tail", type=int, default=2000,
+                   help="записів після останнього checkpoint'у RocksDB")
+    p.add_argument("--datadir", default=None, help="каталог для RocksDB (за замовчуванням тимчасовий)")
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    print(f"🧪 Генеруємо changelog: {args.devices} турбін x {args.records_per_key} записів...")
+    changelog = build_changelog(args.devices, args.records_per_key, args.seed)
+    total_bytes = sum(len(k) + len(v) for k, v in changelog)
+    print(f"   {len(changelog)} записів, {total_bytes / 1024 / 1024:.1f} МБ")
+
+    memory_time = cold_start_memory(changelog)
+    print(f"memory:  cold start {memory_time:.3f}s (replay {len(changelog)} записів)")
+
+    datadir = args.datadir or tempfile.mkdtemp(prefix='recovery-bench-')
+    path = os.path.join(datadir, 'power_aggregates.db')
+    try:
+        checkpoint = max(0, len(changelog) - args.tail)
+        prepare_rocksdb(path, changelog, checkpoint)
+        rocksdb_time = cold_start_rocksdb(path, changelog)
+        print(f"rocksdb: cold start {rocksdb_time:.3f}s (replay {len(changelog) - checkpoint} записів, "
+              f"на диску {dir_size(path) / 1024 / 1024:.1f} МБ)")
+        if rocksdb_time > 0:
+            print(f"⚡ Прискорення відновлення: x{memory_time / rocksdb_time:.1f}")
+    finally:
+        if args.datadir is None:
+            shutil.rmtree(datadir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Бенчмарк пропускної здатності SagaExecutor
+
+Запускає curtailment saga для заданої кількості турбін поверх
+FakeCassandraSession з налаштовуваною затримкою та виводить кількість
+оброблених запитів за секунду для кожного рівня паралельності.
+
+Приклад:
+    python saga_bench.py --requests 5000 --devices 150 --latency-ms 2 --concurrency 1 8 32
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from cassandra_async import AsyncCassandraWriter
+from fake_cassandra import FakeCassandraSession
+from models import CurtailmentRequest
+from saga_executor import SagaExecutor, CURTAILMENT_SAGA
+from status_cache import TurbineStatusCache
+
+STATEMENTS = {
+    'insert_saga_log': "INSERT INTO saga_log (saga_id, timestamp, device_id, status, step, details) "
+                       "VALUES (%s, %s, %s, %s, %s, %s)",
+    'update_turbine_status': "INSERT INTO turbine_status (device_id, status, last_updated) VALUES (%s, %s, %s)",
+    'get_turbine_status': "SELECT status FROM turbine_status WHERE device_id = %s",
+}
+
+
+def make_requests(num_requests: int, num_devices: int, seed: int):
+    rnd = random.Random(seed)
+    return [
+        CurtailmentRequest(device_id=f"WIND_ZP_{rnd.randint(1, num_devices):03d}",
+                           reason="Grid overload")
+        for _ in range(num_requests)
+    ]
+
+
+async def run_once(requests, concurrency: int, batch_size: int, latency_ms: float,
+                   max_in_flight: int):
+    session = FakeCassandraSession(latency_ms=latency_ms)
+    writer = AsyncCassandraWriter(session, max_in_flight=max_in_flight)
+    status_cache = TurbineStatusCache({}, writer, STATEMENTS)
+    executor = SagaExecutor(writer, STATEMENTS, status_cache, concurrency=concurrency)
+
+    start = time.perf_counter()
+    for i in range(0, len(requests), batch_size):
+        await executor.run_batch(CURTAILMENT_SAGA, requests[i:i + batch_size])
+    await writer.drain()
+    elapsed = time.perf_counter() - start
+    return elapsed, executor, session, status_cache
+
+
+def main():
+    p = argparse.ArgumentParser(description="Бенчмарк SagaExecutor")
+    p.add_argument("--requests", type=int, default=5000)
+    p.add_argument("--devices", type=int, default=150)
+    p.add_argument("--concurrency", type=int, nargs='+', default=[1, 8, 32])
+    p.add_argument("--batch-size", type=int, default=100)
+    p.add_argument("--latency-ms", type=float, default=2.0)
+    p.add_argument("--max-in-flight", type=int, default=128)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    requests = make_requests(args.requests, args.devices, args.seed)
+    print(f"🧪 Saga benchmark: {args.requests} запитів, {args.devices} турбін, "
+          f"latency={args.latency_ms} ms, batch={args.batch_size}")
+    for concurrency in args.concurrency:
+        elapsed, executor, session, status_cache = asyncio.run(run_once(
+            requests, concurrency, args.batch_size, args.latency_ms, args.max_in_flight))
+        print(f"concurrency={concurrency}: {executor.completed / elapsed:.1f} req/s | "
+              f"time={elapsed:.2f}s | completed={executor.completed} failed={executor.failed} | "
+              f"cassandra_requests={session.executed} | "
+              f"status writes={status_cache.writes} skipped={status_cache.skipped_writes}")
+
+
+if __name__ == "__main__":
+    main()
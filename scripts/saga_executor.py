@@ -0,0 +1,153 @@
+"""
+Пакетний виконавець Saga для curtailment та compensation
+
+Запити читаються з stream мікро-пакетами (stream.take). У межах пакета
+запити групуються за device_id:
+- для однієї турбіни saga виконуються строго послідовно, у порядку надходження;
+- різні турбіни обробляються паралельно (не більше concurrency одночасно);
+- curtailment та compensation однієї турбіни не перемежовуються, бо обидва
+  агенти використовують спільні блокування турбін.
+
+Статус турбіни перевіряється через TurbineStatusCache. Якщо турбіна вже
+має цільовий статус, крок 2 нічого не змінює: запис turbine_status
+пропускається, а між записами saga_log немає дії над станом, тому STARTED
+та COMPLETED записуються одним UNLOGGED batch'ем - обидва рядки лежать
+в одній партиції saga_log (saga_id).
+"""
+
+import asyncio
+import os
+import uuid
+from cassandra.query import BatchStatement, BatchType
+from structured_log import get_logger
+from timestamps import now_ms
+
+# Максимальна кількість турбін, що обробляються одночасно
+SAGA_CONCURRENCY = int(os.getenv('SAGA_CONCURRENCY', '32'))
+# Розмір мікро-пакета та максимальний час його збору (секунди)
+SAGA_BATCH_SIZE = int(os.getenv('SAGA_BATCH_SIZE', '100'))
+SAGA_BATCH_WITHIN = float(os.getenv('SAGA_BATCH_WITHIN', '0.5'))
+
+log = get_logger('saga_executor')
+
+
+class SagaSpec:
+    """Опис статусів, кроків та повідомлень одного типу saga"""
+
+    def __init__(self, label, error_label, target_status,
+                 started_status, started_step, started_details,
+                 completed_status, completed_step, completed_details):
+        self.label = label
+        self.error_label = error_label
+        self.target_status = target_status
+        self.started_status = started_status
+        self.started_step = started_step
+        self.started_details = started_details
+        self.completed_status = completed_status
+        self.completed_step = completed_step
+        self.completed_details = completed_details
+
+
+CURTAILMENT_SAGA = SagaSpec(
+    label='Saga',
+    error_label='curtailment saga',
+    target_status='CURTAILED',
+    started_status='STARTED',
+    started_step='step_1',
+    started_details="Saga started for device {device_id}, reason: {reason}",
+    completed_status='COMPLETED',
+    completed_step='step_3',
+    completed_details="Saga completed for device {device_id}",
+)
+
+COMPENSATION_SAGA = SagaSpec(
+    label='Compensation',
+    error_label='compensation',
+    target_status='ACTIVE',
+    started_status='COMPENSATION_STARTED',
+    started_step='compensation_step_1',
+    started_details="Compensation started for device {device_id}, reason: {reason}",
+    completed_status='COMPENSATION_COMPLETED',
+    completed_step='compensation_step_3',
+    completed_details="Compensation completed for device {device_id}",
+)
+
+
+class SagaExecutor:
+    """Виконує saga мікро-пакетами: послідовно для турбіни, паралельно між турбінами"""
+
+    def __init__(self, writer, statements, status_cache, concurrency: int = SAGA_CONCURRENCY):
+        if concurrency <= 0:
+            raise ValueError("concurrency має бути додатним")
+        self.writer = writer
+        self.statements = statements
+        self.status_cache = status_cache
+        self.concurrency = concurrency
+        self.completed = 0
+        self.failed = 0
+        self._slots = asyncio.Semaphore(concurrency)
+        self._device_locks = {}
+
+    async def run_batch(self, spec: SagaSpec, requests):
+        """Виконує пакет запитів одного типу saga"""
+        by_device = {}
+        for request in requests:
+            by_device.setdefault(request.device_id, []).append(request)
+        await asyncio.gather(*(
+            self._run_device(spec, device_id, device_requests)
+            for device_id, device_requests in by_device.items()
+        ))
+
+    async def _run_device(self, spec: SagaSpec, device_id: str, requests):
+        lock = self._device_locks.setdefault(device_id, asyncio.Lock())
+        async with self._slots, lock:
+            for request in requests:
+                await self._run_saga(spec, request)
+
+    def _saga_log_batch(self, rows):
+        """UNLOGGED batch для рядків saga_log однієї saga (одна партиція)"""
+        batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+        for row in rows:
+            batch.add(self.statements['insert_saga_log'], row)
+        return batch
+
+    async def _run_saga(self, spec: SagaSpec, request) -> bool:
+        """Виконує одну saga; повертає True при успіху"""
+        device_id = request.device_id
+        saga_id = str(uuid.uuid4())
+        # Час кроків - epoch мілісекунди (TIMESTAMP у Cassandra)
+        timestamp = now_ms()
+        started = (saga_id, timestamp, device_id, spec.started_status, spec.started_step,
+                   spec.started_details.format(device_id=device_id, reason=request.reason or 'N/A'))
+        completed = (saga_id, timestamp + 1000, device_id,
+                     spec.completed_status, spec.completed_step,
+                     spec.completed_details.format(device_id=device_id))
+
+        try:
+            if await self.status_cache.is_current(device_id, spec.target_status):
+                # Крок 2 нічого не змінює - обидва записи журналу одним batch'ем
+                await self.writer.execute(self._saga_log_batch([started, completed]))
+                log.debug('status_unchanged', saga=spec.label, device_id=device_id,
+                          status=spec.target_status)
+            else:
+                # Крок 1: Записуємо в saga_log (status: STARTED)
+                await self.writer.execute(self.statements['insert_saga_log'], started)
+                log.debug('saga_started', saga=spec.label, saga_id=saga_id, device_id=device_id)
+
+                # Крок 2: Оновлюємо turbine_status (write-through у кеш)
+                await self.status_cache.set(device_id, spec.target_status, timestamp)
+                log.debug('status_updated', saga=spec.label, device_id=device_id,
+                          status=spec.target_status)
+
+                # Крок 3: Записуємо в saga_log (status: COMPLETED)
+                await self.writer.execute(self.statements['insert_saga_log'], completed)
+            log.info('saga_completed', saga=spec.label, saga_id=saga_id, device_id=device_id)
+            self.completed += 1
+            return True
+
+        except Exception as e:
+            self.failed += 1
+            log.error('saga_failed', saga=spec.label, device_id=device_id, error=e)
+            # Стан турбіни після збою невідомий - наступна saga прочитає його з Cassandra
+            self.status_cache.invalidate(device_id)
+            return False
@@ -0,0 +1,129 @@
+"""
+Файловий реєстр Avro-схем без зовнішнього сервісу
+
+Схеми лежать у каталозі schemas/ (або SCHEMA_REGISTRY_DIR) як .avsc файли,
+а registry.json перелічує їх версії:
+    [{"id": 1, "subject": "TurbineTelemetry", "version": 1, "file": "..."}]
+
+id записується в кожне повідомлення, тому читач завжди знає схему, якою
+повідомлення записане, навіть якщо сам уже використовує новішу версію.
+Нова версія реєструється лише якщо вона може читати дані попередньої
+(backward-сумісність: нові поля мають default, типи сумісні).
+"""
+
+import json
+import os
+import re
+
+import avro.schema
+from avro.compatibility import ReaderWriterCompatibilityChecker, SchemaCompatibilityType
+
+SCHEMA_DIR = os.getenv('SCHEMA_REGISTRY_DIR', os.path.join(os.path.dirname(__file__), 'schemas'))
+INDEX_FILE = 'registry.json'
+
+
+class SchemaVersion:
+    """Одна зареєстрована версія схеми"""
+
+    __slots__ = ('id', 'subject', 'version', 'definition', 'parsed')
+
+    def __init__(self, schema_id: int, subject: str, version: int, definition: dict):
+        self.id = schema_id
+        self.subject = subject
+        self.version = version
+        # JSON-визначення схеми (dict) та розібрана схема бібліотеки avro
+        self.definition = definition
+        self.parsed = avro.schema.parse(json.dumps(definition))
+
+
+class FileSchemaRegistry:
+    """Реєстр схем поверх каталогу з .avsc файлами"""
+
+    def __init__(self, directory: str = SCHEMA_DIR):
+        self.directory = directory
+        self._by_id = {}
+        self._latest = {}
+        self._entries = []
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                self._entries = json.load(f)
+        for entry in self._entries:
+            with open(os.path.join(directory, entry['file']), encoding='utf-8') as f:
+                definition = json.load(f)
+            self._add(SchemaVersion(entry['id'], entry['subject'], entry['version'], definition))
+
+    def _add(self, schema: SchemaVersion):
+        self._by_id[schema.id] = schema
+        latest = self._latest.get(schema.subject)
+        if latest is None or schema.version > latest.version:
+            self._latest[schema.subject] = schema
+
+    @property
+    def subjects(self):
+        return sorted(self._latest)
+
+    def get(self, schema_id: int) -> SchemaVersion:
+        """Схема за id з заголовка повідомлення"""
+        try:
+            return self._by_id[schema_id]
+        except KeyError:
+            raise KeyError(f"Схему з id={schema_id} не знайдено в {self.directory}") from None
+
+    def latest(self, subject: str) -> SchemaVersion:
+        """Остання версія схеми для subject (ім'я запису, напр. TurbineTelemetry)"""
+        try:
+            return self._latest[subject]
+        except KeyError:
+            raise KeyError(f"Немає схеми для {subject!r} в {self.directory}") from None
+
+    def register(self, subject: str, definition: dict) -> SchemaVersion:
+        """
+        Реєструє нову версію схеми та записує її у каталог реєстру
+
+        Якщо схема збігається з останньою версією, повертається вона ж.
+        Несумісна з попередньою версією схема відхиляється з ValueError.
+        """
+        latest = self._latest.get(subject)
+        if latest is not None:
+            if latest.definition == definition:
+                return latest
+            ensure_compatible(latest.definition, definition)
+        version = latest.version + 1 if latest else 1
+        schema_id = max(self._by_id, default=0) + 1
+        schema = SchemaVersion(schema_id, subject, version, definition)
+
+        file_name = f"{_snake_case(subject)}.v{version}.avsc"
+        with open(os.path.join(self.directory, file_name), 'w', encoding='utf-8') as f:
+            f.write(format_schema(definition))
+        self._entries.append({'id': schema_id, 'subject': subject, 'version': version, 'file': file_name})
+        with open(os.path.join(self.directory, INDEX_FILE), 'w', encoding='utf-8') as f:
+            f.write('[\n' + ',\n'.join(f"  {json.dumps(entry)}" for entry in self._entries) + '\n]\n')
+
+        self._add(schema)
+        return schema
+
+
+def ensure_compatible(writer: dict, reader: dict):
+    """Перевіряє, що схема reader може читати дані, записані схемою writer"""
+    result = ReaderWriterCompatibilityChecker().get_compatibility(
+        avro.schema.parse(json.dumps(reader)), avro.schema.parse(json.dumps(writer)))
+    if result.compatibility is not SchemaCompatibilityType.compatible:
+        raise ValueError(f"Схема {reader.get('name')} несумісна з попередньою версією: "
+                         f"{'; '.join(result.messages)}")
+
+
+def format_schema(definition: dict) -> str:
+    """JSON схеми у стилі .avsc файлів реєстру: по одному полю на рядок"""
+    lines = []
+    for key, value in definition.items():
+        if key == 'fields':
+            fields = ',\n'.join(f"    {json.dumps(field, ensure_ascii=False)}" for field in value)
+            lines.append(f'  "fields": [\n{fields}\n  ]')
+        else:
+            lines.append(f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}")
+    return '{\n' + ',\n'.join(lines) + '\n}\n'
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
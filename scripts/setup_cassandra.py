@@ -57,6 +57,26 @@ def setup_cassandra_schema():
         ) WITH CLUSTERING ORDER BY (timestamp DESC);
     """)
 
+    # Показники електростанцій з power-station-data (power_sink.py): партиція -
+    # станція за добу, (source_partition, source_offset) - позиція в Kafka,
+    # тому повторний запис після збою перезаписує ті самі рядки
+    print("🔧 Створюємо таблицю 'power_station_readings'...")
+    session.execute("""
+        CREATE TABLE IF NOT EXISTS power_station_readings (
+            station_name TEXT,
+            day DATE,
+            timestamp TIMESTAMP,
+            source_partition INT,
+            source_offset BIGINT,
+            station_type TEXT,
+            power_output_mw DOUBLE,
+            voltage_kv DOUBLE,
+            frequency_hz DOUBLE,
+            efficiency_percent DOUBLE,
+            PRIMARY KEY ((station_name, day), timestamp, source_partition, source_offset)
+        ) WITH CLUSTERING ORDER BY (timestamp DESC, source_partition ASC, source_offset ASC);
+    """)
+
     print("✅ Схема Cassandra успішно створена!")
     cluster.shutdown()
 
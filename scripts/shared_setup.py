@@ -1,6 +1,10 @@
 from cassandra.cluster import Cluster
 from faust import App
+from faust.exceptions import PartitionsMismatch
 import os
+import metrics
+import avro_codec  # noqa: F401 - реєструє Faust кодек 'avro'
+import zstd_dict  # noqa: F401 - реєструє Faust кодек 'zdict'
 
 # Налаштування Kafka
 KAFKA_BROKER = os.getenv('KAFKA_BROKER', 'localhost:9092')
@@ -9,16 +13,115 @@ KAFKA_BROKER = os.getenv('KAFKA_BROKER', 'localhost:9092')
 CASSANDRA_HOSTS = ['127.0.0.1']
 CASSANDRA_PORT = 9042
 KEYSPACE = 'lab4_wind_energy'
+# Максимальна кількість асинхронних запитів до Cassandra у польоті
+CASSANDRA_MAX_IN_FLIGHT = int(os.getenv('CASSANDRA_MAX_IN_FLIGHT', '128'))
+
+# Налаштування сховища стану Faust таблиць
+# memory - стан відновлюється повним replay changelog-топіків після рестарту;
+# rocksdb - стан зберігається локально разом з offset'ом changelog'у,
+# тому після рестарту догружається лише хвіст changelog'у
+STORE_MODE = os.getenv('FAUST_STORE', 'memory')
+STORE_URLS = {
+    'memory': 'memory://',
+    'rocksdb': 'rocksdb://',
+}
+DATA_DIR = os.getenv('FAUST_DATA_DIR', 'lab4-wind-energy-data')
+# Standby-репліки тримають копію стану на інших worker'ах для швидкого failover
+STANDBY_REPLICAS = int(os.getenv('FAUST_STANDBY_REPLICAS', '1'))
+
+MB = 1024 * 1024
+# Параметри RocksDB для таблиць (передаються в faust RocksDBOptions).
+# Стиснення тут не задається: драйвер rocksdict ігнорує невідомі ключі (extra_options)
+ROCKSDB_OPTIONS = {
+    'block_cache_size': int(os.getenv('ROCKSDB_BLOCK_CACHE_MB', '128')) * MB,
+    'block_cache_compressed_size': int(os.getenv('ROCKSDB_BLOCK_CACHE_COMPRESSED_MB', '64')) * MB,
+    'write_buffer_size': int(os.getenv('ROCKSDB_WRITE_BUFFER_MB', '32')) * MB,
+    'max_write_buffer_number': int(os.getenv('ROCKSDB_MAX_WRITE_BUFFERS', '3')),
+    'target_file_size_base': int(os.getenv('ROCKSDB_TARGET_FILE_MB', '64')) * MB,
+    'bloom_filter_size': 10,
+}
+
+if STORE_MODE not in STORE_URLS:
+    raise ValueError(f"Невідомий режим сховища FAUST_STORE={STORE_MODE!r}, "
+                     f"доступні: {', '.join(STORE_URLS)}")
+
+# Опції сховища для app.Table(options=...); memory-сховищу вони не потрібні
+TABLE_STORE_OPTIONS = ROCKSDB_OPTIONS if STORE_MODE == 'rocksdb' else None
+
+# Локальний HTTP endpoint worker'а (метрики: http://127.0.0.1:6066/metrics/)
+WEB_BIND = os.getenv('FAUST_WEB_BIND', '127.0.0.1')
+WEB_PORT = int(os.getenv('FAUST_WEB_PORT', '6066'))
+
+# Кількість партицій топіків з ключем device_id та changelog-топіків таблиць.
+# Однакова кількість партицій та однаковий ключ гарантують, що подія турбіни
+# і стан цієї турбіни в таблицях потрапляють в одну партицію (co-partitioning),
+# тому N worker'ів ділять турбіни без звернень до чужого стану
+TOPIC_PARTITIONS = int(os.getenv('FAUST_TOPIC_PARTITIONS', '8'))
+
+# Серіалізатор значень по топіках: "turbine_telemetry=avro,curtailment_requests=avro".
+# Кодеки поєднуються через '|': "turbine_telemetry=json|zdict" - JSON, стиснений словником zstd.
+# Топіки без явного серіалізатора використовують JSON (value_serializer App).
+# Producer і consumer топіка мають використовувати однакове налаштування.
+TOPIC_SERIALIZERS = dict(
+    item.split('=', 1) for item in os.getenv('FAUST_TOPIC_SERIALIZERS', '').split(',') if item
+)
+
+
+def topic_serializer(topic_name: str):
+    """Кодек значень для топіка або None (value_serializer App)"""
+    return TOPIC_SERIALIZERS.get(topic_name)
+
 
 # Створюємо Faust App
 app = App(
     'lab4-wind-energy',
     broker=KAFKA_BROKER,
-    store='memory://',
+    store=STORE_URLS[STORE_MODE],
+    datadir=DATA_DIR,
+    table_standby_replicas=STANDBY_REPLICAS,
+    topic_partitions=TOPIC_PARTITIONS,
     value_serializer='json',
+    web_bind=WEB_BIND,
+    web_port=WEB_PORT,
 )
 
 
+def device_topic(name: str, value_type):
+    """Топік з ключем device_id: усі події однієї турбіни йдуть в одну партицію"""
+    return app.topic(name, key_type=str, value_type=value_type, partitions=TOPIC_PARTITIONS,
+                     value_serializer=topic_serializer(name))
+
+
+def verify_copartitioning(topics, tables):
+    """
+    Перевіряє, що топіки-джерела та changelog-топіки таблиць мають
+    TOPIC_PARTITIONS партицій
+
+    Faust сам перевіряє це лише для таблиць без use_partitioner, тому
+    worker викликає перевірку після призначення партицій. Топіки, яких ще
+    немає в метаданих consumer'а, пропускаються.
+    """
+    names = [topic.get_topic_name() for topic in topics]
+    names += [table.changelog_topic.get_topic_name() for table in tables]
+    mismatched = {}
+    for name in names:
+        partitions = app.consumer.topic_partitions(name)
+        if partitions is not None and partitions != TOPIC_PARTITIONS:
+            mismatched[name] = partitions
+    if mismatched:
+        details = ', '.join(f"{name}={partitions}" for name, partitions in sorted(mismatched.items()))
+        raise PartitionsMismatch(
+            f"Топіки не co-partitioned: очікується {TOPIC_PARTITIONS} партицій "
+            f"(FAUST_TOPIC_PARTITIONS), фактично {details}. Перестворіть топіки "
+            f"або змініть FAUST_TOPIC_PARTITIONS.")
+
+
+@app.page('/metrics/')
+async def metrics_page(self, request):
+    """Метрики worker'а у текстовому форматі Prometheus"""
+    return self.text(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
 def get_cassandra_session():
     """Створює та повертає сесію Cassandra"""
     try:
@@ -1,35 +1,67 @@
 #!/usr/bin/env python3
 """
 Простий Consumer для енергетичних даних з Kafka
+
+Режим sink записує повідомлення в Cassandra (power_sink.py) і комітить
+offset'и лише після успішного запису.
 """
 
 from kafka import KafkaConsumer  # Імпортуємо KafkaConsumer
+import argparse
+import contextlib
+import io
 import json  # Імпортуємо JSON для десеріалізації
 from datetime import datetime  # Імпортуємо datetime для часових міток
 import time  # Імпортуємо time для унікальної групи
-
-
-def create_consumer():
-    """Створюємо Kafka consumer з налаштуваннями"""
+import numpy as np
+
+TOPIC = 'power-station-data'
+BOOTSTRAP_SERVERS = 'localhost:9092'
+# Максимум повідомлень за один poll() у пакетному режимі (як max_poll_records)
+MAX_POLL_RECORDS = 500
+# Інтервал між зведеннями пакетного режиму, секунд
+SUMMARY_INTERVAL = 5.0
+
+
+def json_deserializer(m):
+    return json.loads(m.decode('utf-8'))  # UTF-8 декодування
+
+
+# Налаштування KafkaConsumer (імена параметрів kafka-python)
+CONSUMER_SETTINGS = {
+    'auto_offset_reset': 'latest',  # Починаємо з останніх повідомлень
+    # Налаштування для надійності
+    'enable_auto_commit': True,  # Автоматичний коміт збережених офсетів
+    'auto_commit_interval_ms': 5000,  # Комітимо кожні 5 секунд
+    'session_timeout_ms': 30000,  # 30 секунд
+    'heartbeat_interval_ms': 10000,  # 10 секунд
+    'max_poll_records': MAX_POLL_RECORDS,  # Максимум 500 повідомлень за раз
+    # Налаштування для продуктивності
+    'fetch_min_bytes': 1024,  # Мінімум 1KB для отримання
+    'fetch_max_wait_ms': 1000,  # Чекаємо до 1 секунди для збору даних
+}
+
+
+def create_consumer(bootstrap_servers: str = BOOTSTRAP_SERVERS, value_deserializer=json_deserializer,
+                    group_id: str = None, topics=(TOPIC,), **overrides):
+    """
+    Створюємо Kafka consumer з налаштуваннями
+
+    Пакетний режим передає value_deserializer=None і розбирає JSON всього
+    пакета одним викликом (decode_batch). Без group_id кожен запуск - нова
+    група з одного учасника; consumer_group.py передає стабільну групу,
+    topics=() (підписка зі своїм rebalance listener) та ручні коміти.
+    """
     print("🔌 Підключаємся до Kafka як Consumer...")
 
     try:
         consumer = KafkaConsumer(
-            'power-station-data',  # Topic який читаємо
-            bootstrap_servers=['localhost:9092'],  # Адреса Kafka брокера
-            auto_offset_reset='latest',  # Починаємо з останніх повідомлень
-            group_id=f'energy-monitor-{int(time.time())}',  # Унікальна група consumers
+            *topics,  # Topic який читаємо
+            bootstrap_servers=bootstrap_servers.split(','),  # Адреса Kafka брокера
+            group_id=group_id or f'energy-monitor-{int(time.time())}',  # Група consumers
             # Перетворюємо JSON назад в Python об'єкти
-            value_deserializer=lambda m: json.loads(m.decode('utf-8')),  # UTF-8 декодування
-            # Налаштування для надійності
-            enable_auto_commit=True,  # Автоматичний коміт збережених офсетів
-            auto_commit_interval_ms=5000,  # Комітимо кожні 5 секунд
-            session_timeout_ms=30000,  # 30 секунд
-            heartbeat_interval_ms=10000,  # 10 секунд
-            max_poll_records=500,  # Максимум 500 повідомлень за раз
-            # Налаштування для продуктивності
-            fetch_min_bytes=1024,  # Мінімум 1KB для отримання
-            fetch_max_wait_ms=1000  # Чекаємо до 1 секунди для збору даних
+            value_deserializer=value_deserializer,
+            **{**CONSUMER_SETTINGS, **overrides}
         )
 
         print("✅ Consumer для Kafka готовий до роботи!")
@@ -148,15 +180,217 @@ def process_power_data(data):
         print(f"📝 Сирі дані: {data}")
 
 
-def main():
-    """Основна функція"""
-    consumer = create_consumer()
-    if not consumer:
-        return
+# Статуси потужності: індекс у лічильниках PowerSummary
+POWER_STATUSES = ("🔴 ВІДКЛЮЧЕНА", "🟡 НИЗЬКА ПОТУЖНІСТЬ", "🟢 НОРМАЛЬНА ПОТУЖНІСТЬ", "🟢 ВИСОКА ПОТУЖНІСТЬ")
+EFFICIENCY_STATUSES = ("🟠 ПОГАНО", "🟡 ДОБРЕ", "🟢 ВІДМІННО")
+# Попередження з process_power_data: ключ -> текст
+WARNINGS = {
+    'low_power': "⚠️ Критично низька потужність",
+    'voltage': "⚠️ Напруга поза допустимими межами",
+    'frequency': "🚨 Частота поза межами",
+    'efficiency': "⚠️ Низький ККД",
+}
+
+
+def decode_batch(values):
+    """
+    JSON усього пакета одним json.loads замість виклику на кожне повідомлення
+
+    Tombstone'и (value=None) пропускаються. Якщо пакет не розбирається
+    цілком, повідомлення декодуються по одному, а пошкоджені логуються та
+    відкидаються - одне погане повідомлення не зупиняє consumer.
+    """
+    values = [value for value in values if value is not None]
+    records = _decode_all(values)
+    if records is None:
+        records = [data for data in map(decode_value, values) if data is not None]
+    return records
+
+
+def decode_records(records):
+    """Пари (ConsumerRecord, дані) пакета; tombstone'и та пошкоджені повідомлення пропускаються"""
+    records = [record for record in records if record.value is not None]
+    values = _decode_all([record.value for record in records])
+    if values is None:
+        values = [decode_value(record.value) for record in records]
+    return [(record, data) for record, data in zip(records, values) if data is not None]
+
+
+def decode_value(value):
+    """JSON одного повідомлення; None для пошкодженого (з попередженням у лозі)"""
+    try:
+        data = json.loads(value)
+    except (ValueError, TypeError) as e:
+        print(f"⚠️ Пропущено пошкоджене повідомлення: {type(e).__name__}: {e}")
+        return None
+    if not isinstance(data, dict):
+        print(f"⚠️ Пропущено повідомлення без JSON-об'єкта: {value[:80]!r}")
+        return None
+    return data
 
-    print("👀 Очікуємо дані від електростанцій...")
-    print("🛑 Натисніть Ctrl+C для зупинки\n")
 
+def _decode_all(values):
+    """Весь пакет одним json.loads; None, якщо хоч одне повідомлення пошкоджене"""
+    try:
+        records = json.loads(b'[' + b','.join(values) + b']')
+    except (ValueError, TypeError):
+        return None
+    if len(records) != len(values) or not all(type(data) is dict for data in records):
+        return None
+    return records
+
+
+def to_columns(records) -> dict:
+    """Колонки NumPy з пакета записів (кожне поле читається один раз)"""
+    n = len(records)
+    return {
+        'station_name': np.array([r.get('station_name', 'Невідома станція') for r in records], dtype=object),
+        'station_type': np.array([r.get('station_type', 'unknown') for r in records], dtype=object),
+        'power': np.fromiter((r.get('power_output_mw', 0) for r in records), float, n),
+        'voltage': np.fromiter((r.get('voltage_kv', 0) for r in records), float, n),
+        'frequency': np.fromiter((r.get('frequency_hz', 0) for r in records), float, n),
+        'efficiency': np.fromiter((r.get('efficiency_percent', 0) for r in records), float, n),
+    }
+
+
+def analyze_batch(columns: dict) -> dict:
+    """
+    Ті самі пороги, що й analyze_power_data/process_power_data, над колонками пакета
+
+    Повертає лічильники статусів і попереджень та суми потужності по станціях.
+    """
+    power, voltage = columns['power'], columns['voltage']
+    frequency, efficiency = columns['frequency'], columns['efficiency']
+
+    power_status = np.where(power == 0, 0, np.where(power < 100, 1, np.where(power > 1000, 3, 2)))
+    efficiency_status = np.where(efficiency >= 85, 2, np.where(efficiency >= 80, 1, 0))
+    warnings = {
+        'low_power': power < 50,
+        'voltage': (voltage < 218) | (voltage > 222),
+        'frequency': (frequency < 49.8) | (frequency > 50.2),
+        'efficiency': efficiency < 75,
+    }
+
+    stations, inverse = np.unique(columns['station_name'], return_inverse=True)
+    types = dict(zip(columns['station_name'], columns['station_type']))
+    # Низька потужність вітряків і сонячних станцій - погода, а не аварія
+    weather = (power < 50) & np.isin(columns['station_type'], ('solar', 'wind'))
+    return {
+        'messages': len(power),
+        'power_status': np.bincount(power_status, minlength=len(POWER_STATUSES)),
+        'efficiency_status': np.bincount(efficiency_status, minlength=len(EFFICIENCY_STATUSES)),
+        'voltage_ok': int(np.count_nonzero((voltage >= 219) & (voltage <= 221))),
+        'frequency_ok': int(np.count_nonzero((frequency >= 49.9) & (frequency <= 50.1))),
+        'warnings': {key: int(np.count_nonzero(mask)) for key, mask in warnings.items()},
+        'weather_low_power': int(np.count_nonzero(weather)),
+        'stations': {
+            station: (types[station], int(count), float(total), float(low), float(high))
+            for station, count, total, low, high in zip(
+                stations,
+                np.bincount(inverse, minlength=len(stations)),
+                np.bincount(inverse, weights=power, minlength=len(stations)),
+                _group_reduce(np.minimum, inverse, power, len(stations), np.inf),
+                _group_reduce(np.maximum, inverse, power, len(stations), -np.inf),
+            )
+        },
+    }
+
+
+def _group_reduce(ufunc, groups, values, size: int, initial: float):
+    result = np.full(size, initial)
+    ufunc.at(result, groups, values)
+    return result
+
+
+class PowerSummary:
+    """Накопичує результати analyze_batch та періодично друкує зведення"""
+
+    def __init__(self, interval: float = SUMMARY_INTERVAL):
+        self.interval = interval
+        self.total = 0
+        self.started = time.monotonic()
+        self.reset()
+
+    def reset(self):
+        self.window_started = time.monotonic()
+        self.messages = 0
+        self.power_status = np.zeros(len(POWER_STATUSES), dtype=np.int64)
+        self.efficiency_status = np.zeros(len(EFFICIENCY_STATUSES), dtype=np.int64)
+        self.voltage_ok = 0
+        self.frequency_ok = 0
+        self.warnings = dict.fromkeys(WARNINGS, 0)
+        self.weather_low_power = 0
+        self.stations = {}
+
+    def add(self, analysis: dict):
+        self.messages += analysis['messages']
+        self.total += analysis['messages']
+        self.power_status += analysis['power_status']
+        self.efficiency_status += analysis['efficiency_status']
+        self.voltage_ok += analysis['voltage_ok']
+        self.frequency_ok += analysis['frequency_ok']
+        self.weather_low_power += analysis['weather_low_power']
+        for key, count in analysis['warnings'].items():
+            self.warnings[key] += count
+        for station, (station_type, count, total, low, high) in analysis['stations'].items():
+            current = self.stations.get(station)
+            if current is None:
+                self.stations[station] = [station_type, count, total, low, high]
+            else:
+                current[1] += count
+                current[2] += total
+                current[3] = min(current[3], low)
+                current[4] = max(current[4], high)
+
+    def due(self) -> bool:
+        return time.monotonic() - self.window_started >= self.interval
+
+    def print_summary(self):
+        elapsed = time.monotonic() - self.window_started
+        messages = max(self.messages, 1)
+        print(f"\n📋 === МОНІТОРИНГ ЕНЕРГОСИСТЕМИ: {datetime.now():%H:%M:%S} ===")
+        print(f"📨 {self.messages} повідомлень за {elapsed:.1f} с ({self.messages / elapsed:,.0f} msg/s), "
+              f"всього {self.total}")
+        for station, (station_type, count, total, low, high) in sorted(self.stations.items()):
+            print(f"🏭 {station} ({station_type.upper()}): {count} записів, "
+                  f"⚡ {total / count:.1f} МВт в середньому (мін {low:.1f}, макс {high:.1f})")
+        print("⚡ Потужність: " + ", ".join(
+            f"{status} {count}" for status, count in zip(POWER_STATUSES, self.power_status) if count))
+        print(f"🔌 Напруга в нормі: {self.voltage_ok / messages:.1%} | "
+              f"📊 Частота в нормі: {self.frequency_ok / messages:.1%}")
+        print("⚙️ ККД: " + ", ".join(
+            f"{status} {count}" for status, count in zip(EFFICIENCY_STATUSES, self.efficiency_status) if count))
+        warnings = [(WARNINGS[key], count) for key, count in self.warnings.items() if count]
+        if warnings:
+            print("🚨 ПОПЕРЕДЖЕННЯ:")
+            for text, count in warnings:
+                print(f"   {text}: {count}")
+        if self.weather_low_power:
+            print(f"💡 З них {self.weather_low_power} - низька потужність вітряків/сонячних станцій (погода)")
+        print("-" * 55)
+
+
+def consume_batches(consumer, max_records: int = MAX_POLL_RECORDS, interval: float = SUMMARY_INTERVAL):
+    """Пакетний режим: poll() до max_records повідомлень, аналіз колонками, зведення раз на interval"""
+    summary = PowerSummary(interval)
+    try:
+        while True:
+            polled = consumer.poll(timeout_ms=1000, max_records=max_records)
+            values = [record.value for records in polled.values() for record in records]
+            if values:
+                summary.add(analyze_batch(to_columns(decode_batch(values))))
+            if summary.due():
+                if summary.messages:
+                    summary.print_summary()
+                summary.reset()
+    except KeyboardInterrupt:
+        if summary.messages:
+            summary.print_summary()
+        print(f"\n🛑 Consumer зупинено. Оброблено {summary.total} повідомлень")
+
+
+def consume_messages(consumer):
+    """Режим по одному повідомленню з детальним виводом кожного"""
     message_count = 0
 
     try:
@@ -171,6 +405,74 @@ def main():
     except KeyboardInterrupt:
         print(f"\n🛑 Consumer зупинено. Оброблено {message_count} повідомлень")
 
+
+def benchmark(args):
+    """Порівняння аналізу по одному повідомленню та пакетами без Kafka"""
+    from simple_producer import encode_value, generate_power_data
+
+    payloads = [encode_value(generate_power_data()) for _ in range(1000)]
+    values = [payloads[i % len(payloads)] for i in range(args.count)]
+    print(f"🧪 Аналіз {args.count} повідомлень: по одному vs пакетами по {args.max_records}")
+
+    # Вивід по одному повідомленню йде в буфер, а не в термінал - рахується лише форматування
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for value in values:
+            process_power_data(json_deserializer(value))
+    single = time.perf_counter() - start
+
+    summary = PowerSummary()
+    start = time.perf_counter()
+    for begin in range(0, len(values), args.max_records):
+        summary.add(analyze_batch(to_columns(decode_batch(values[begin:begin + args.max_records]))))
+    batched = time.perf_counter() - start
+
+    print(f"{'Режим':<12} {'msg/s':>12} {'мкс/msg':>10}")
+    for name, elapsed in (('по одному', single), ('пакетами', batched)):
+        print(f"{name:<12} {args.count / elapsed:>12,.0f} {elapsed / args.count * 1e6:>10.2f}")
+    if summary.total != args.count:
+        raise AssertionError("пакетний аналіз обробив не всі повідомлення")
+
+
+def main():
+    """Основна функція"""
+    parser = argparse.ArgumentParser(description="Consumer енергетичних даних з Kafka")
+    parser.add_argument('--mode', choices=['message', 'batch', 'sink', 'bench'], default='message',
+                        help="message - детальний вивід кожного повідомлення; batch - аналіз пакетами "
+                             "та періодичні зведення; sink - запис у Cassandra (power_sink.py); "
+                             "bench - порівняння режимів без Kafka")
+    parser.add_argument('--bootstrap', default=BOOTSTRAP_SERVERS)
+    parser.add_argument('--max-records', type=int, default=MAX_POLL_RECORDS,
+                        help="Максимум повідомлень за один poll() у пакетному режимі")
+    parser.add_argument('--interval', type=float, default=SUMMARY_INTERVAL,
+                        help="Інтервал між зведеннями пакетного режиму, секунд")
+    parser.add_argument('--count', type=int, default=200000, help="Кількість повідомлень для bench")
+    args = parser.parse_args()
+
+    if args.mode == 'bench':
+        benchmark(args)
+        return
+    if args.mode == 'sink':
+        # Решта налаштувань sink'а - змінні POWER_SINK_* або python power_sink.py run --help
+        import power_sink
+        power_sink.run(power_sink.parse_args(['run', '--bootstrap', args.bootstrap,
+                                              '--max-records', str(args.max_records)]))
+        return
+
+    batch = args.mode == 'batch'
+    consumer = create_consumer(args.bootstrap, value_deserializer=None if batch else json_deserializer)
+    if not consumer:
+        return
+
+    print("👀 Очікуємо дані від електростанцій...")
+    print("🛑 Натисніть Ctrl+C для зупинки\n")
+
+    try:
+        if batch:
+            consume_batches(consumer, args.max_records, args.interval)
+        else:
+            consume_messages(consumer)
+
     finally:
         consumer.close()
         print("🔌 З'єднання закрито")
@@ -1,46 +1,231 @@
 #!/usr/bin/env python3
 """
 Простий Producer для енергетичних даних з Kafka
+
+Повідомлення відправляються конвеєрно: send() лише ставить запис у буфер
+клієнта, а підтвердження брокера обробляються колбеками та зводяться у
+DeliveryReport. Завдяки цьому linger_ms / batch_size реально збирають
+пакети, а не по одному повідомленню.
+
+Бекенд клієнта підключається через --backend: kafka-python або
+confluent-kafka (librdkafka). Режим --mode bench порівнює обидва бекенди
+на локальному замінику брокера (mock-кластер librdkafka) або на брокері
+з --bootstrap.
+
+Приклади:
+    python simple_producer.py                                # демо: 6 повідомлень раз на 3 с
+    python simple_producer.py --mode pipeline --count 100000 --backend confluent
+    python simple_producer.py --mode bench --count 100000    # без живого Kafka
 """
 
-from kafka import KafkaProducer  # Імпортуємо KafkaProducer
+import argparse  # Імпортуємо argparse для режимів запуску
+from collections import Counter  # Імпортуємо Counter для зведення підтверджень
+from array import array  # Імпортуємо array для компактного зберігання затримок
 import json  # Імпортуємо JSON для серіалізації
 import time  # Імпортуємо time для затримок
 import random  # Імпортуємо random для генерації випадкових даних
-from datetime import datetime  # Імпортуємо datetime для часових міток
+from datetime import datetime, timezone  # Імпортуємо datetime для часових міток
+
+TOPIC = 'power-station-data'
+BOOTSTRAP_SERVERS = 'localhost:9092'
+
+# Налаштування producer'а у термінах kafka-python
+PRODUCER_SETTINGS = {
+    # Налаштування для надійності
+    'acks': 'all',  # Чекаємо підтвердження від всіх реплік
+    'retries': 3,   # Повторюємо спробу 3 рази при невдачі
+    'request_timeout_ms': 30000,  # Час очікування відповіді від брокера
+    'retry_backoff_ms': 500,  # Час очікування між спробами
+    # Налаштування для продуктивності
+    'batch_size': 16384,  # 16KB пакетів
+    'linger_ms': 100,  # Чекаємо 100мс перед відправкою, щоб зібрати більше повідомлень
+    'compression_type': 'gzip',  # Стиснення для зменшення розміру повідомлень
+    'buffer_memory': 33554432,  # 32MB буфер для повідомлень
+    'max_in_flight_requests_per_connection': 5,  # Підтримка порядку при повторних спробах
+}
+
+# Відповідні назви параметрів librdkafka
+CONFLUENT_SETTING_NAMES = {
+    'acks': 'acks',
+    'retries': 'retries',
+    'request_timeout_ms': 'request.timeout.ms',
+    'retry_backoff_ms': 'retry.backoff.ms',
+    'batch_size': 'batch.size',
+    'linger_ms': 'linger.ms',
+    'compression_type': 'compression.type',
+    'max_in_flight_requests_per_connection': 'max.in.flight.requests.per.connection',
+}
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Перцентиль q (0..100) відсортованої послідовності"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class DeliveryReport:
+    """
+    Зведення підтверджень доставки
+
+    Колбеки обох бекендів викликають delivered/failed; звіт рахує
+    підтвердження по партиціях, помилки за типом та затримки від send()
+    до підтвердження. verbose=True друкує кожне підтвердження (демо).
+    """
+
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+        self.delivered = 0
+        self.failed = 0
+        self.partitions = Counter()
+        self.errors = Counter()
+        self.latencies = array('d')
+
+    def delivered_to(self, partition: int, offset: int, latency: float):
+        self.delivered += 1
+        self.partitions[partition] += 1
+        self.latencies.append(latency)
+        if self.verbose:
+            print(f"   ✅ Partition: {partition}, Offset: {offset}, {latency * 1000:.1f}ms")
+
+    def failed_with(self, error):
+        self.failed += 1
+        self.errors[str(error)] += 1
+        if self.verbose:
+            print(f"❌ Помилка: {error}")
+
+    def print_summary(self, sent: int, send_elapsed: float, total_elapsed: float):
+        ordered = sorted(self.latencies)
+        print(f"📊 Відправлено: {sent} | підтверджено: {self.delivered} | помилок: {self.failed}")
+        print(f"⚡ Throughput: {sent / send_elapsed if send_elapsed else 0:.0f} msg/s відправки, "
+              f"{self.delivered / total_elapsed if total_elapsed else 0:.0f} msg/s підтверджених")
+        if ordered:
+            print(f"⏱️  Delivery latency: p50={percentile(ordered, 50) * 1000:.2f}ms "
+                  f"p95={percentile(ordered, 95) * 1000:.2f}ms "
+                  f"p99={percentile(ordered, 99) * 1000:.2f}ms "
+                  f"max={ordered[-1] * 1000:.2f}ms")
+        if self.partitions:
+            print("📍 По партиціях: " + ", ".join(
+                f"{partition}={count}" for partition, count in sorted(self.partitions.items())))
+        for error, count in self.errors.most_common(5):
+            print(f"   ❌ {count} x {error}")
+
 
+class KafkaPythonBackend:
+    """Бекенд на kafka-python: підтвердження приходять у потоці відправки клієнта"""
+
+    name = 'kafka-python'
+
+    def __init__(self, bootstrap_servers: str, settings: dict):
+        from kafka import KafkaProducer  # Імпортуємо KafkaProducer
+        self.producer = KafkaProducer(bootstrap_servers=bootstrap_servers.split(','), **settings)
+
+    def send(self, topic: str, value: bytes, report: DeliveryReport):
+        sent_at = time.perf_counter()
+        future = self.producer.send(topic, value)
+        future.add_callback(self._on_success, report, sent_at)
+        future.add_errback(report.failed_with)
+        return future
+
+    @staticmethod
+    def _on_success(report: DeliveryReport, sent_at: float, record_metadata):
+        report.delivered_to(record_metadata.partition, record_metadata.offset,
+                            time.perf_counter() - sent_at)
+
+    def wait(self, handle, timeout: float = 10):
+        """Блокуюче очікування одного запису (стара поведінка скрипта)"""
+        handle.get(timeout=timeout)
+
+    def poll(self):
+        pass  # Колбеки виконуються у фоновому потоці kafka-python
+
+    def flush(self):
+        self.producer.flush()
+
+    def close(self):
+        self.producer.close()
+
+
+class ConfluentBackend:
+    """
+    Бекенд на confluent-kafka (librdkafka)
+
+    Підтвердження доставляються лише під час poll()/flush(), тому
+    poll(0) викликається після кожного produce(). Якщо локальна черга
+    librdkafka заповнена, produce() кидає BufferError - тоді чекаємо
+    підтверджень і повторюємо.
+    """
+
+    name = 'confluent-kafka'
+
+    def __init__(self, bootstrap_servers: str, settings: dict):
+        from confluent_kafka import Producer  # Імпортуємо Producer з librdkafka
+        config = {'bootstrap.servers': bootstrap_servers}
+        for key, value in settings.items():
+            if key == 'buffer_memory':
+                config['queue.buffering.max.kbytes'] = value // 1024
+            else:
+                config[CONFLUENT_SETTING_NAMES[key]] = value
+        self.producer = Producer(config)
+
+    def send(self, topic: str, value: bytes, report: DeliveryReport):
+        def on_delivery(error, message):
+            if error is not None:
+                report.failed_with(error)
+            else:
+                # latency() - час від produce() до підтвердження, виміряний librdkafka
+                report.delivered_to(message.partition(), message.offset(), message.latency())
+
+        while True:
+            try:
+                self.producer.produce(topic, value, on_delivery=on_delivery)
+                break
+            except BufferError:
+                self.producer.poll(0.05)
+        self.producer.poll(0)
 
-def create_producer():
+    def wait(self, handle, timeout: float = 10):
+        self.producer.flush(timeout)
+
+    def poll(self):
+        self.producer.poll(0)
+
+    def flush(self):
+        self.producer.flush()
+
+    def close(self):
+        self.producer.flush()
+
+
+BACKENDS = {
+    'kafka-python': KafkaPythonBackend,
+    'confluent': ConfluentBackend,
+}
+
+
+def create_producer(backend: str = 'kafka-python', bootstrap_servers: str = BOOTSTRAP_SERVERS,
+                    **overrides):
     """Створюємо Kafka producer з налаштуваннями"""
-    print("🔌 Підключаємся до Kafka...")
+    print(f"🔌 Підключаємся до Kafka ({backend})...")
 
     try:
-        producer = KafkaProducer(
-            bootstrap_servers=['localhost:9092'],  # Адреса Kafka брокера
-            # Перетворюємо Python об'єкти в JSON
-            value_serializer=lambda v: json.dumps(v, ensure_ascii=False).encode('utf-8'),
-            # Налаштування для надійності
-            acks='all',  # Чекаємо підтвердження від всіх реплік
-            retries=3,   # Повторюємо спробу 3 рази при невдачі
-            request_timeout_ms=30000,  # Час очікування відповіді від брокера
-            retry_backoff_ms=500,  # Час очікування між спробами
-            # Налаштування для продуктивності
-            batch_size=16384,  # 16KB пакетів
-            linger_ms=100,  # Чекаємо 100мс перед відправкою, щоб зібрати більше повідомлень
-            compression_type='gzip',  # Стиснення для зменшення розміру повідомлень
-            buffer_memory=33554432,  # 32MB буфер для повідомлень
-            max_in_flight_requests_per_connection=5  # Підтримка порядку при повторних спробах
-        )
+        producer = BACKENDS[backend](bootstrap_servers, {**PRODUCER_SETTINGS, **overrides})
 
         print("✅ Підключення до Kafka успішне!")
         return producer
 
     except Exception as e:
         print(f"❌ Помилка підключення: {e}")
-        print("Перевірте чи запущено Kafka на localhost:9092")
+        print(f"Перевірте чи запущено Kafka на {bootstrap_servers}")
         return None  # Якщо не вдалося підключитися, повертаємо None
 
 
+def encode_value(data: dict) -> bytes:
+    """Перетворюємо Python об'єкт в JSON"""
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
 def generate_power_data():
     """Генеруємо дані електростанції"""
     stations = [
@@ -78,7 +263,7 @@ def generate_power_data():
     data = {
         "station_name": station["name"],
         "station_type": station["type"],
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),  # UTC з явною зоною (+00:00)
         "power_output_mw": round(current_power, 2),
         "voltage_kv": round(random.uniform(218, 222), 1),
         "frequency_hz": round(random.uniform(49.9, 50.1), 2),
@@ -89,15 +274,136 @@ def generate_power_data():
     return data
 
 
+def run_pipeline(producer, payloads, count: int, report: DeliveryReport, topic: str = TOPIC):
+    """Відправляє count повідомлень без очікування кожного, потім чекає всіх підтверджень"""
+    start = time.perf_counter()
+    for i in range(count):
+        producer.send(topic, payloads[i % len(payloads)], report)
+    send_elapsed = time.perf_counter() - start
+    producer.flush()  # Відправляємо всі буферовані повідомлення та чекаємо підтверджень
+    return send_elapsed, time.perf_counter() - start
+
+
+def run_sync(producer, payloads, count: int, report: DeliveryReport):
+    """Стара поведінка: блокуємося на підтвердженні кожного повідомлення"""
+    start = time.perf_counter()
+    for i in range(count):
+        handle = producer.send(TOPIC, payloads[i % len(payloads)], report)
+        producer.wait(handle)
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def start_local_broker(num_brokers: int = 3):
+    """
+    Локальний замінник Kafka: mock-кластер librdkafka
+
+    Кластер живе, доки існує повернений producer-власник. Брокери
+    слухають справжні TCP-порти та розмовляють протоколом Kafka, тому
+    до них підключаються обидва бекенди. Мережевої затримки та запису на
+    диск немає - результати показують стелю клієнта, а не брокера.
+    """
+    from confluent_kafka import Producer
+    holder = Producer({'test.mock.num.brokers': num_brokers, 'log_level': 4})
+    metadata = holder.list_topics(timeout=10)
+    bootstrap = ','.join(f"{broker.host}:{broker.port}" for broker in metadata.brokers.values())
+    return holder, bootstrap
+
+
+def benchmark(args):
+    """Порівнює бекенди та синхронну відправку на однакових даних"""
+    holder = None
+    bootstrap = args.bootstrap
+    if not bootstrap:
+        holder, bootstrap = start_local_broker()
+        print(f"🧪 Локальний mock-брокер librdkafka: {bootstrap}")
+
+    overrides = {'linger_ms': args.linger_ms, 'batch_size': args.batch_size,
+                 'compression_type': args.compression}
+    # Дані генеруються наперед, щоб вимірювати лише клієнт Kafka
+    payloads = [encode_value(generate_power_data()) for _ in range(1000)]
+    runs = [
+        ('kafka-python', 'sync', run_sync, args.sync_count),
+        ('kafka-python', 'pipeline', run_pipeline, args.count),
+        ('confluent', 'pipeline', run_pipeline, args.count),
+    ]
+
+    results = []
+    for backend, mode, run, count in runs:
+        print(f"\n🚀 {backend} / {mode}: {count} повідомлень, acks=all, "
+              f"linger_ms={args.linger_ms}, batch_size={args.batch_size}, {args.compression}")
+        producer = create_producer(backend, bootstrap, **overrides)
+        if not producer:
+            continue
+        report = DeliveryReport()
+        try:
+            send_elapsed, total_elapsed = run(producer, payloads, count, report)
+        finally:
+            producer.close()
+        report.print_summary(count, send_elapsed, total_elapsed)
+        ordered = sorted(report.latencies)
+        results.append((backend, mode, report.delivered / total_elapsed if total_elapsed else 0.0,
+                        percentile(ordered, 50), percentile(ordered, 99)))
+
+    print("\n📋 === ПОРІВНЯННЯ БЕКЕНДІВ ===")
+    print(f"{'Бекенд':<14} {'Режим':<9} {'msg/s':>10} {'p50, ms':>9} {'p99, ms':>9}")
+    for backend, mode, throughput, p50, p99 in results:
+        print(f"{backend:<14} {mode:<9} {throughput:>10.0f} {p50 * 1000:>9.2f} {p99 * 1000:>9.2f}")
+    del holder  # Зупиняємо mock-кластер
+
+
+def produce_pipeline(args):
+    """Відправляє --count повідомлень конвеєрно та друкує зведення підтверджень"""
+    producer = create_producer(args.backend, args.bootstrap or BOOTSTRAP_SERVERS,
+                               linger_ms=args.linger_ms, batch_size=args.batch_size,
+                               compression_type=args.compression)
+    if not producer:
+        return
+
+    print(f"🚀 Конвеєрна відправка {args.count} повідомлень...")
+    payloads = [encode_value(generate_power_data()) for _ in range(1000)]
+    report = DeliveryReport()
+    try:
+        send_elapsed, total_elapsed = run_pipeline(producer, payloads, args.count, report)
+        report.print_summary(args.count, send_elapsed, total_elapsed)
+    finally:
+        producer.close()  # Закриваємо з'єднання
+
+
 def main():
     """Основна функція"""
-    producer = create_producer()  # Підключаємося до Kafka
+    parser = argparse.ArgumentParser(description="Producer енергетичних даних для Kafka")
+    parser.add_argument('--mode', choices=['demo', 'pipeline', 'bench'], default='demo',
+                        help="demo - 6 повідомлень раз на 3 с; pipeline - --count повідомлень; "
+                             "bench - порівняння бекендів")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='kafka-python')
+    parser.add_argument('--bootstrap', default=None,
+                        help=f"Адреса брокера (за замовчуванням {BOOTSTRAP_SERVERS}; "
+                             f"у bench - локальний mock-брокер)")
+    parser.add_argument('--count', type=int, default=100000, help="Кількість повідомлень")
+    parser.add_argument('--sync-count', type=int, default=50,
+                        help="Кількість повідомлень для синхронного прогону в bench")
+    parser.add_argument('--linger-ms', type=int, default=PRODUCER_SETTINGS['linger_ms'])
+    parser.add_argument('--batch-size', type=int, default=PRODUCER_SETTINGS['batch_size'])
+    parser.add_argument('--compression', default=PRODUCER_SETTINGS['compression_type'])
+    args = parser.parse_args()
+
+    if args.mode == 'bench':
+        benchmark(args)
+        return
+    if args.mode == 'pipeline':
+        produce_pipeline(args)
+        return
+
+    producer = create_producer(args.backend, args.bootstrap or BOOTSTRAP_SERVERS)  # Підключаємося до Kafka
     if not producer:
         return  # Якщо не вдалося підключитися, виходимо
 
     print("🚀 Починаємо відправку даних через Kafka...")
     print("📊 Натисніть Ctrl+C для зупинки\n")
 
+    # Підтвердження друкуються колбеками, send() не блокується
+    report = DeliveryReport(verbose=True)
     message_count = 0  # Лічильник повідомлень
     count = 0
     try:
@@ -107,26 +413,24 @@ def main():
 
             # Відправляємо в Kafka
             try:
-                future = producer.send('power-station-data', power_data)  # Відправляємо повідомлення
-                # Блокуємося, щоб отримати підтвердження від брокера
-                record_metadata = future.get(timeout=10)  # Чекаємо максимум 10 секунд
+                producer.send(TOPIC, encode_value(power_data), report)  # Ставимо повідомлення в буфер
                 message_count += 1  # Збільшуємо лічильник
-
                 print(f"📤 [{message_count}] {power_data['station_name']} - {power_data['power_output_mw']} МВт")
-                print(f"   Partition: {record_metadata.partition}, Offset: {record_metadata.offset}")
             except Exception as e:
                 print(f"❌ Помилка: {e}")
 
             time.sleep(3)  # Затримка між повідомленнями 3 секунди
+            producer.poll()  # Обробляємо підтвердження, що встигли прийти
             count+=1
 
     except KeyboardInterrupt:
-        print(f"\n🛑 Зупинено. Всього відправлено {message_count} повідомлень")
+        print("\n🛑 Зупинено.")
 
     finally:
         # Важливо! Закриваємо producer коректно
         producer.flush()  # Відправляємо всі буферовані повідомлення
         producer.close()  # Закриваємо з'єднання
+        print(f"📊 Всього підтверджено {report.delivered} повідомлень, помилок: {report.failed}")
         print("🔌 З'єднання з Kafka 3.7.1 закрито")
 
 
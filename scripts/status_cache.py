@@ -0,0 +1,96 @@
+"""
+Read-through / write-through кеш статусів турбін
+
+Статуси зберігаються в Faust таблиці (або будь-якому dict-подібному
+сховищі для бенчмарків):
+- після rebalance таблиця заповнюється з Cassandra (turbine_status)
+  статусами турбін, чиї партиції призначені цьому worker'у;
+- get() відповідає з таблиці, а при промаху читає Cassandra (get_turbine_status);
+- set() пише в Cassandra лише тоді, коли статус справді змінюється,
+  і після успішного запису оновлює таблицю.
+
+Повторні curtailment-шторми для тих самих турбін не множать навантаження
+на Cassandra: запити, що не змінюють стан, не генерують запису turbine_status.
+"""
+
+from cassandra.query import SimpleStatement
+
+# Повне читання таблиці статусів без пагінації (одна турбіна - один рядок)
+LOAD_ALL_STATUSES = SimpleStatement("SELECT device_id, status FROM turbine_status", fetch_size=None)
+
+
+class TurbineStatusCache:
+    """Кеш статусів турбін поверх Faust таблиці"""
+
+    def __init__(self, table, writer, statements):
+        self.table = table
+        self.writer = writer
+        self.statements = statements
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.skipped_writes = 0
+
+    async def load(self, owns=None) -> int:
+        """
+        Заповнює таблицю статусами з Cassandra; повертає кількість турбін
+
+        owns(device_id) відбирає турбіни, ключі яких належать цьому worker'у:
+        запис чужого ключа в таблицю з use_partitioner пішов би в changelog
+        партиції, якою володіє інший worker.
+        """
+        rows = await self.writer.execute(LOAD_ALL_STATUSES)
+        loaded = 0
+        for row in rows:
+            if owns is not None and not owns(row.device_id):
+                continue
+            if self.table.get(row.device_id) != row.status:
+                self.table[row.device_id] = row.status
+            loaded += 1
+        return loaded
+
+    async def get(self, device_id: str):
+        """Поточний статус турбіни або None, якщо він ще ніколи не записувався"""
+        status = self.table.get(device_id)
+        if status is not None:
+            self.hits += 1
+            return status
+
+        self.misses += 1
+        rows = await self.writer.execute(self.statements['get_turbine_status'], (device_id,))
+        if rows:
+            status = rows[0].status
+            self.table[device_id] = status
+        return status
+
+    async def is_current(self, device_id: str, status: str) -> bool:
+        """
+        True, якщо турбіна вже має цей статус - запис turbine_status
+        не потрібен і рахується як пропущений
+        """
+        if await self.get(device_id) == status:
+            self.skipped_writes += 1
+            return True
+        return False
+
+    async def set(self, device_id: str, status: str, timestamp) -> bool:
+        """
+        Записує статус, якщо він відрізняється від поточного
+
+        Повертає True, якщо запис у Cassandra виконано, і False, якщо
+        турбіна вже мала цей статус.
+        """
+        if await self.is_current(device_id, status):
+            return False
+        await self.writer.execute(
+            self.statements['update_turbine_status'],
+            (device_id, status, timestamp)
+        )
+        self.writes += 1
+        self.table[device_id] = status
+        return True
+
+    def invalidate(self, device_id: str):
+        """Забуває статус турбіни (наприклад, після збою запису)"""
+        if self.table.get(device_id) is not None:
+            del self.table[device_id]
@@ -1,24 +1,77 @@
-import uuid
-from datetime import datetime, timedelta
+import asyncio
+import os
+import time
+from collections import deque
 from faust import Topic, Stream, Table
-from faust.windows import HoppingWindow
-from shared_setup import app, get_cassandra_session, ensure_keyspace
+from shared_setup import (
+    app, get_cassandra_session, ensure_keyspace, TABLE_STORE_OPTIONS, TOPIC_PARTITIONS,
+    device_topic, verify_copartitioning,
+)
 from models import TurbineTelemetry, CurtailmentRequest, CancelCurtailment
+from windowing import (
+    POWER_WINDOW, ALLOWED_LATENESS, WatermarkTracker, event_seconds,
+    expire_panes, window_aggregate, ready_window_ends,
+)
+from telemetry_buffer import new_device_state
+from metrics import Counter, Gauge, Histogram
+from structured_log import get_logger
+from timestamps import ms_to_iso
+from cassandra_async import AsyncCassandraWriter
+from status_cache import TurbineStatusCache
+from saga_executor import (
+    SagaExecutor, CURTAILMENT_SAGA, COMPENSATION_SAGA, SAGA_BATCH_SIZE, SAGA_BATCH_WITHIN,
+)
+
+# Фіналізація вікон таймером: інтервал тіку, бюджет часу на тік,
+# кількість турбін між поверненнями керування event loop'у
+FINALIZE_TICK_INTERVAL = float(os.getenv('FINALIZE_TICK_INTERVAL', '5'))
+FINALIZE_TICK_BUDGET = float(os.getenv('FINALIZE_TICK_BUDGET_MS', '20')) / 1000.0
+FINALIZE_YIELD_EVERY = int(os.getenv('FINALIZE_YIELD_EVERY', '50'))
+
+log = get_logger('stream_processor')
+
+# Метрики агентів (endpoint /metrics/ worker'а)
+AGENT_EVENTS = Counter('agent_events_total', 'Оброблені події агентів', ['agent'])
+AGENT_EVENT_SECONDS = Histogram('agent_event_latency_seconds', 'Час обробки однієї події агентом', ['agent'])
+LATE_EVENTS = Counter('telemetry_late_events_total', 'Події, відкинуті як запізнілі')
+UNKEYED_EVENTS = Counter('telemetry_unkeyed_events_total', 'Події телеметрії з ключем, відмінним від device_id')
+INVALID_EVENTS = Counter('telemetry_invalid_events_total', 'Події телеметрії без коректного часу події')
+WINDOWS_FINALIZED = Counter('windows_finalized_total', 'Фіналізовані hopping-вікна')
+WINDOW_TICK_SECONDS = Histogram('window_finalize_tick_seconds', 'Тривалість тіку фіналізації вікон')
+TABLE_KEYS = Gauge('faust_table_keys', 'Кількість ключів у таблиці worker\'а', ['table'])
+TABLE_STATE_BYTES = Gauge('faust_table_state_bytes', 'Приблизний розмір стану таблиці', ['table'])
 
-# Топіки
-telemetry_topic: Topic = app.topic('turbine_telemetry', value_type=TurbineTelemetry)
-curtailment_requests_topic: Topic = app.topic('curtailment_requests', value_type=CurtailmentRequest)
-cancel_curtailment_topic: Topic = app.topic('cancel_curtailment', value_type=CancelCurtailment)
+# Топіки (ключ - device_id, однакова кількість партицій з таблицями)
+telemetry_topic: Topic = device_topic('turbine_telemetry', TurbineTelemetry)
+curtailment_requests_topic: Topic = device_topic('curtailment_requests', CurtailmentRequest)
+cancel_curtailment_topic: Topic = device_topic('cancel_curtailment', CancelCurtailment)
 
 # Таблиця для зберігання попередніх середніх значень потужності
+# use_partitioner: таблицю оновлює і таймер, де немає поточної події
 previous_avg_power_table: Table = app.Table(
     'previous_avg_power',
-    default=lambda: {'avg_power': None, 'window_end': None}
+    partitions=TOPIC_PARTITIONS,
+    default=lambda: {'avg_power': None, 'window_end': None},
+    use_partitioner=True,
+    options=TABLE_STORE_OPTIONS,
+)
+
+# Таблиця-кеш статусів турбін (device_id -> status)
+# use_partitioner: таблиця заповнюється з Cassandra поза stream
+turbine_status_cache_table: Table = app.Table(
+    'turbine_status_cache',
+    partitions=TOPIC_PARTITIONS,
+    default=lambda: None,
+    use_partitioner=True,
+    options=TABLE_STORE_OPTIONS,
 )
 
 # Ініціалізуємо Cassandra сесію
 _cassandra_cluster = None
 _cassandra_session = None
+_cassandra_writer = None
+_saga_executor = None
+_status_cache = None
 
 
 def get_cassandra():
@@ -30,6 +83,32 @@ def get_cassandra():
     return _cassandra_session
 
 
+def get_cassandra_writer() -> AsyncCassandraWriter:
+    """Отримує або створює неблокуючий writer для Cassandra"""
+    global _cassandra_writer
+    if _cassandra_writer is None:
+        _cassandra_writer = AsyncCassandraWriter(get_cassandra())
+    return _cassandra_writer
+
+
+def get_status_cache() -> TurbineStatusCache:
+    """Кеш статусів турбін поверх turbine_status_cache_table"""
+    global _status_cache
+    if _status_cache is None:
+        _status_cache = TurbineStatusCache(
+            turbine_status_cache_table, get_cassandra_writer(), cassandra_statements
+        )
+    return _status_cache
+
+
+def get_saga_executor() -> SagaExecutor:
+    """Спільний виконавець saga для обох агентів (спільні блокування турбін)"""
+    global _saga_executor
+    if _saga_executor is None:
+        _saga_executor = SagaExecutor(get_cassandra_writer(), cassandra_statements, get_status_cache())
+    return _saga_executor
+
+
 # Підготовлені запити для Cassandra
 def prepare_cassandra_statements(session):
     """Підготовлює prepared statements для швидшої роботи"""
@@ -76,13 +155,77 @@ async def init_cassandra():
     print("✅ Cassandra statements підготовлено")
 
 
-# Таблиця для зберігання подій у вікнах (10 хвилин, крок 2 хвилини)
-# Використовуємо Table з Hopping Window
+def status_cache_partition(device_id: str) -> int:
+    """Партиція changelog'у turbine_status_cache_table, в яку Faust запише ключ device_id"""
+    topic = turbine_status_cache_table.changelog_topic
+    key, _ = topic.prepare_key(device_id, turbine_status_cache_table.key_serializer)
+    return app.producer.key_partition(topic.get_topic_name(), key).partition
+
+
+@app.on_rebalance_complete.connect
+async def warm_turbine_status_cache(app, **kwargs):
+    """
+    Заповнює кеш статусів турбін з Cassandra після відновлення таблиць
+
+    У таблицю потрапляють лише турбіни активних партицій цього worker'а -
+    ключі інших партицій належать іншим worker'ам.
+    """
+    assigned = assigned_telemetry_partitions()
+    if not assigned:
+        return
+    try:
+        loaded = await get_status_cache().load(
+            lambda device_id: status_cache_partition(device_id) in assigned)
+        print(f"✅ Кеш статусів турбін заповнено: {loaded} турбін (партиції {sorted(assigned)})")
+    except Exception as e:
+        print(f"❌ Помилка заповнення кешу статусів: {e}")
+
+
+# Таблиця зі станом панелей hopping-вікна (10 хвилин, крок 2 хвилини)
+# Кожна турбіна зберігає лише sum/count/min/max для кожної 2-хвилинної панелі;
+# changelog кодується бінарно
 power_aggregates_table: Table = app.Table(
     'power_aggregates',
-    default=lambda: {'events': [], 'last_processed': None},
-    window=HoppingWindow(size=timedelta(minutes=10), step=timedelta(minutes=2))
+    partitions=TOPIC_PARTITIONS,
+    default=new_device_state,
+    use_partitioner=True,
+    options=TABLE_STORE_OPTIONS,
 )
+# Table бере серіалізатор лише з value_type-моделі, тому кодек задається явно
+# (до створення сховища та changelog-топіка, що відбувається ліниво)
+power_aggregates_table.value_serializer = 'device_state'
+
+
+def power_aggregates_state_bytes() -> int:
+    """Приблизний розмір стану power_aggregates: панелі (5 float64)"""
+    total = 0
+    for state in list(power_aggregates_table.values()):
+        total += len(state.panes) * 40
+    return total
+
+
+# Розмір таблиць обчислюється лише під час scrape метрик
+for _table in (previous_avg_power_table, turbine_status_cache_table, power_aggregates_table):
+    TABLE_KEYS.labels(_table.name).set_function(lambda t=_table: len(t))
+TABLE_STATE_BYTES.labels(power_aggregates_table.name).set_function(power_aggregates_state_bytes)
+
+
+# Watermark'и за часом події для кожної партиції telemetry_topic
+watermarks = WatermarkTracker(ALLOWED_LATENESS)
+
+
+def event_partition(stream: Stream) -> int:
+    """Партиція поточної події stream'а (0, якщо подія не прив'язана до Kafka)"""
+    current_event = stream.current_event
+    if current_event is None:
+        return 0
+    return current_event.message.partition
+
+
+def keyed_by_device(stream: Stream, device_id: str) -> bool:
+    """Чи має поточна подія ключ device_id (подія поза Kafka вважається коректною)"""
+    current_event = stream.current_event
+    return current_event is None or current_event.key == device_id
 
 
 @app.agent(telemetry_topic)
@@ -90,46 +233,69 @@ async def process_telemetry_with_hopping_windows(stream: Stream):
     """
     Агент 1: Обробка телеметрії з використанням Hopping Windows
     Розмір вікна: 10 хвилин, крок: 2 хвилини
+
+    Вікна будуються за часом події; вікна турбіни фіналізуються одразу,
+    щойно watermark її партиції перейде кінець вікна + allowed lateness.
     """
+    writer = get_cassandra_writer()
+    events = AGENT_EVENTS.labels('telemetry')
+    latency = AGENT_EVENT_SECONDS.labels('telemetry')
+
     async for event in stream:
+        started = time.perf_counter()
         device_id = event.device_id
-        
-        # Додаємо подію до таблиці для подальшої обробки
-        current = power_aggregates_table.get(device_id) or {'events': [], 'last_processed': None}
-        current['events'].append({
-            'power_output': event.power_output,
-            'timestamp': datetime.utcnow()
-        })
-        power_aggregates_table[device_id] = current
+        partition = event_partition(stream)
+        # Подія без ключа device_id лежить не в партиції стану турбіни
+        if not keyed_by_device(stream, device_id):
+            UNKEYED_EVENTS.inc()
+            log.warning('unkeyed_event', device_id=device_id, key=stream.current_event.key, partition=partition)
+        try:
+            event_time_ms = event.event_time_ms()
+        except ValueError as e:
+            INVALID_EVENTS.inc()
+            log.warning('invalid_event_dropped', device_id=device_id, partition=partition, error=e)
+            continue
+        event_time = event_seconds(event_time_ms)
+        watermarks.observe(partition, event_time)
 
+        current = power_aggregates_table.get(device_id) or new_device_state()
+        current.partition = partition
 
-# Періодична задача для обробки вікон (кожні 2 хвилини)
-@app.timer(interval=120.0)  # 2 хвилини в секундах
-async def process_windows():
-    """Обробляє завершені вікна та розраховує ramp rate"""
-    session = get_cassandra()
-    current_time = datetime.utcnow()
-    window_end = current_time
-    window_start = window_end - timedelta(minutes=10)
-    
-    # Обробляємо всі device_id
-    for device_id in list(power_aggregates_table.keys()):
-        device_data = power_aggregates_table.get(device_id)
-        if not device_data or not device_data.get('events'):
+        # Подія запізнилася більше ніж на allowed lateness - вікно вже збережено
+        if not current.accepts(event_time, POWER_WINDOW):
+            LATE_EVENTS.inc()
+            log.warning('late_event_dropped', device_id=device_id, timestamp=ms_to_iso(event_time_ms))
             continue
-        
-        # Фільтруємо події, що потрапили в поточне вікно
-        events_in_window = [
-            e for e in device_data['events']
-            if window_start <= e['timestamp'] <= window_end
-        ]
-        
-        if not events_in_window:
+
+        # Оновлюємо агрегати панелі замість накопичення всіх подій
+        current.record(event_time, event.power_output, POWER_WINDOW)
+        rows = finalize_device_windows(device_id, current, watermarks.horizon(partition))
+        power_aggregates_table[device_id] = current
+        await save_ramp_rates(writer, rows)
+        events.inc()
+        latency.observe(time.perf_counter() - started)
+
+
+def finalize_device_windows(device_id: str, device_data, horizon):
+    """
+    Фіналізує всі готові вікна турбіни та розраховує ramp rate
+
+    Стан оновлюється синхронно (без await), тому агент і таймер
+    не можуть фіналізувати одне вікно двічі. Повертає рядки для
+    ramp_rate_aggregates.
+    """
+    rows = []
+    window_size = float(POWER_WINDOW.size)
+    for window_end_ts in ready_window_ends(device_data.panes, device_data.finalized_end,
+                                           horizon, POWER_WINDOW):
+        # Об'єднуємо панелі вікна: O(панелей), а не O(подій)
+        aggregate = window_aggregate(device_data.panes, window_end_ts, POWER_WINDOW)
+        device_data.finalized_end = window_end_ts
+        if aggregate is None:
             continue
-        
-        # Обчислюємо середню потужність
-        total_power = sum(e['power_output'] for e in events_in_window)
-        avg_power = total_power / len(events_in_window)
+        WINDOWS_FINALIZED.inc()
+
+        avg_power = aggregate['avg']
         
         # Отримуємо попереднє середнє значення
         prev_data = previous_avg_power_table.get(device_id) or {'avg_power': None, 'window_end': None}
@@ -137,8 +303,8 @@ async def process_windows():
         
         # Розраховуємо ramp rate
         if prev_avg is not None and prev_data.get('window_end'):
-            # Розраховуємо час між вікнами (2 хвилини - крок вікна)
-            time_diff_minutes = 2.0
+            # Час між вікнами за часом події (зазвичай 2 хвилини - крок вікна)
+            time_diff_minutes = (window_end_ts - prev_data['window_end']) / 60.0
             power_diff_mw = (avg_power - prev_avg) / 1000.0  # Конвертація кВт -> МВт
             ramp_rate = power_diff_mw / time_diff_minutes
         else:
@@ -147,109 +313,158 @@ async def process_windows():
         # Оновлюємо попереднє значення
         previous_avg_power_table[device_id] = {
             'avg_power': avg_power,
-            'window_end': window_end
+            'window_end': window_end_ts
         }
         
         # Зберігаємо в Cassandra (тільки якщо є попереднє значення для розрахунку ramp rate)
         if prev_avg is not None:
-            try:
-                session.execute(
-                    cassandra_statements['insert_ramp_rate'],
-                    (device_id, window_start, window_end, avg_power, ramp_rate)
-                )
-                print(f"📊 Збережено ramp rate: {device_id} | "
-                      f"Window: {window_start} - {window_end} | "
-                      f"Avg Power: {avg_power:.2f} kW | "
-                      f"Ramp Rate: {ramp_rate:.4f} MW/min")
-            except Exception as e:
-                print(f"❌ Помилка збереження ramp rate: {e}")
-        
-        # Очищаємо старі події (старіші за 15 хвилин)
-        cutoff_time = current_time - timedelta(minutes=15)
-        device_data['events'] = [
-            e for e in device_data['events']
-            if e['timestamp'] > cutoff_time
-        ]
+            # Межі вікна - epoch мілісекунди, драйвер Cassandra приймає їх для TIMESTAMP
+            rows.append((
+                device_id,
+                round((window_end_ts - window_size) * 1000),
+                round(window_end_ts * 1000),
+                avg_power,
+                ramp_rate,
+            ))
+
+    # Відкидаємо панелі, що вже не потраплять у наступні вікна
+    if device_data.finalized_end:
+        expire_panes(device_data.panes,
+                     device_data.finalized_end - window_size + float(POWER_WINDOW.step),
+                     POWER_WINDOW)
+    return rows
+
+
+@app.on_partitions_assigned.connect
+async def check_copartitioning(app, assigned, **kwargs):
+    """Зупиняє worker, якщо топіки та changelog-топіки таблиць мають різну кількість партицій"""
+    verify_copartitioning(
+        [telemetry_topic, curtailment_requests_topic, cancel_curtailment_topic],
+        [previous_avg_power_table, turbine_status_cache_table, power_aggregates_table],
+    )
+
+
+@app.on_partitions_revoked.connect
+async def forget_revoked_watermarks(app, revoked, **kwargs):
+    """Скидає watermark'и партицій телеметрії, відкликаних у цього worker'а"""
+    topic_name = telemetry_topic.get_topic_name()
+    watermarks.forget(tp.partition for tp in revoked if tp.topic == topic_name)
+
+
+async def save_ramp_rates(writer: AsyncCassandraWriter, rows):
+    """Відправляє ramp rate в Cassandra, не чекаючи завершення запису"""
+    for row in rows:
+        # Запис не блокує цикл: чекаємо лише на вільний слот у writer
+        future = await writer.submit(cassandra_statements['insert_ramp_rate'], row)
+        future.add_done_callback(lambda f, r=row: _report_ramp_rate(f, *r))
+
+
+def _report_ramp_rate(future, device_id, window_start, window_end, avg_power, ramp_rate):
+    """Логує результат асинхронного збереження ramp rate"""
+    if future.exception() is not None:
+        log.error('ramp_rate_save_failed', device_id=device_id, error=future.exception())
+        return
+    log.info('ramp_rate_saved', device_id=device_id, window_start=ms_to_iso(window_start),
+             window_end=ms_to_iso(window_end), avg_power=f"{avg_power:.2f}",
+             ramp_rate=f"{ramp_rate:.4f}")
+
+
+# Черга турбін поточного проходу фіналізації (переходить між тіками таймера)
+_finalize_queue = deque()
+
+
+def assigned_telemetry_partitions():
+    """Активні (не standby) партиції telemetry_topic, призначені цьому worker'у"""
+    topic_name = telemetry_topic.get_topic_name()
+    return {tp.partition for tp in app.assignor.assigned_actives() if tp.topic == topic_name}
+
+
+# Періодична задача для фіналізації вікон турбін, що перестали надсилати дані.
+# Прохід по турбінах розбивається на частини між частими тіками, а кожен тік
+# обмежений бюджетом часу, тому споживання телеметрії не зупиняється.
+@app.timer(interval=FINALIZE_TICK_INTERVAL)
+async def process_windows():
+    """Фіналізує вікна, закриті watermark'ом партиції, та розраховує ramp rate"""
+    started = time.perf_counter()
+    processed = await finalize_windows_tick()
+    WINDOW_TICK_SECONDS.observe(time.perf_counter() - started)
+    if processed:
+        log.debug('windows_tick', devices=processed, queued=len(_finalize_queue))
+
+
+async def finalize_windows_tick(assigned=None, budget: float = FINALIZE_TICK_BUDGET) -> int:
+    """
+    Один тік фіналізації; повертає кількість турбін, чиї вікна фіналізовано
+
+    assigned - партиції, турбіни яких обробляються (за замовчуванням -
+    активні партиції цього worker'а).
+    """
+    writer = get_cassandra_writer()
+    if not _finalize_queue:
+        _finalize_queue.extend(power_aggregates_table.keys())
+
+    # Обробляємо лише турбіни власних партицій
+    if assigned is None:
+        assigned = assigned_telemetry_partitions()
+    deadline = time.monotonic() + budget
+    processed = 0
+    while _finalize_queue and time.monotonic() < deadline:
+        device_id = _finalize_queue.popleft()
+        device_data = power_aggregates_table.get(device_id)
+        if device_data is None or not len(device_data.panes):
+            continue
+        if device_data.partition not in assigned:
+            continue
+
+        horizon = watermarks.horizon(device_data.partition)
+        if horizon is None or horizon < device_data.finalized_end + float(POWER_WINDOW.step):
+            continue
+
+        rows = finalize_device_windows(device_id, device_data, horizon)
         power_aggregates_table[device_id] = device_data
+        await save_ramp_rates(writer, rows)
+
+        # Періодично повертаємо керування event loop'у
+        processed += 1
+        if processed % FINALIZE_YIELD_EVERY == 0:
+            await asyncio.sleep(0)
+    return processed
 
 
 @app.agent(curtailment_requests_topic)
 async def process_curtailment_saga(stream: Stream):
     """
     Агент 2 (частина 1): Обробка curtailment requests з використанням Saga Pattern
+    Запити обробляються мікро-пакетами, різні турбіни - паралельно
     """
-    session = get_cassandra()
-    
-    async for request in stream:
-        saga_id = str(uuid.uuid4())
-        timestamp = datetime.utcnow()
-        
-        try:
-            # Крок 1: Записуємо в saga_log (status: STARTED)
-            session.execute(
-                cassandra_statements['insert_saga_log'],
-                (saga_id, timestamp, request.device_id, 'STARTED', 'step_1', 
-                 f"Saga started for device {request.device_id}, reason: {request.reason}")
-            )
-            print(f"📝 Saga STARTED: {saga_id} | Device: {request.device_id}")
-            
-            # Крок 2: Оновлюємо turbine_status (status: CURTAILED)
-            session.execute(
-                cassandra_statements['update_turbine_status'],
-                (request.device_id, 'CURTAILED', timestamp)
-            )
-            print(f"🔄 Status updated: {request.device_id} -> CURTAILED")
-            
-            # Крок 3: Записуємо в saga_log (status: COMPLETED)
-            session.execute(
-                cassandra_statements['insert_saga_log'],
-                (saga_id, timestamp + timedelta(seconds=1), request.device_id, 'COMPLETED', 'step_3',
-                 f"Saga completed for device {request.device_id}")
-            )
-            print(f"✅ Saga COMPLETED: {saga_id} | Device: {request.device_id}")
-            
-        except Exception as e:
-            print(f"❌ Помилка обробки curtailment saga: {e}")
+    executor = get_saga_executor()
+    events = AGENT_EVENTS.labels('curtailment')
+    latency = AGENT_EVENT_SECONDS.labels('curtailment')
+
+    async for requests in stream.take(SAGA_BATCH_SIZE, within=SAGA_BATCH_WITHIN):
+        started = time.perf_counter()
+        await executor.run_batch(CURTAILMENT_SAGA, requests)
+        # Час пакета розподіляється між його запитами
+        events.inc(len(requests))
+        latency.observe((time.perf_counter() - started) / len(requests), count=len(requests))
 
 
 @app.agent(cancel_curtailment_topic)
 async def process_curtailment_compensation(stream: Stream):
     """
     Агент 2 (частина 2): Обробка компенсації (скасування curtailment)
+    Запити обробляються мікро-пакетами, різні турбіни - паралельно
     """
-    session = get_cassandra()
-    
-    async for cancel_request in stream:
-        saga_id = str(uuid.uuid4())
-        timestamp = datetime.utcnow()
-        
-        try:
-            # Крок 1: Записуємо в saga_log (status: COMPENSATION_STARTED)
-            session.execute(
-                cassandra_statements['insert_saga_log'],
-                (saga_id, timestamp, cancel_request.device_id, 'COMPENSATION_STARTED', 'compensation_step_1',
-                 f"Compensation started for device {cancel_request.device_id}, reason: {cancel_request.reason or 'N/A'}")
-            )
-            print(f"📝 Compensation STARTED: {saga_id} | Device: {cancel_request.device_id}")
-            
-            # Крок 2: Виконуємо компенсуючу дію - оновлюємо turbine_status (status: ACTIVE)
-            session.execute(
-                cassandra_statements['update_turbine_status'],
-                (cancel_request.device_id, 'ACTIVE', timestamp)
-            )
-            print(f"🔄 Status updated: {cancel_request.device_id} -> ACTIVE")
-            
-            # Крок 3: Записуємо в saga_log (status: COMPENSATION_COMPLETED)
-            session.execute(
-                cassandra_statements['insert_saga_log'],
-                (saga_id, timestamp + timedelta(seconds=1), cancel_request.device_id, 'COMPENSATION_COMPLETED', 
-                 'compensation_step_3',
-                 f"Compensation completed for device {cancel_request.device_id}")
-            )
-            print(f"✅ Compensation COMPLETED: {saga_id} | Device: {cancel_request.device_id}")
-            
-        except Exception as e:
-            print(f"❌ Помилка обробки compensation: {e}")
+    executor = get_saga_executor()
+    events = AGENT_EVENTS.labels('compensation')
+    latency = AGENT_EVENT_SECONDS.labels('compensation')
+
+    async for cancel_requests in stream.take(SAGA_BATCH_SIZE, within=SAGA_BATCH_WITHIN):
+        started = time.perf_counter()
+        await executor.run_batch(COMPENSATION_SAGA, cancel_requests)
+        events.inc(len(cancel_requests))
+        latency.observe((time.perf_counter() - started) / len(cancel_requests),
+                        count=len(cancel_requests))
 
 
 if __name__ == "__main__":
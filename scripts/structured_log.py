@@ -0,0 +1,71 @@
+"""
+Структуроване логування з обмеженням частоти
+
+Замість print на кожну подію агенти пишуть події у форматі
+"event key=value ...". Для кожного типу події дозволено не більше
+rate записів за interval секунд; решта лише підраховується і
+повідомляється як suppressed=N у наступному дозволеному записі.
+Якщо рівень логування вимкнено або ліміт вичерпано, рядок не форматується.
+"""
+
+import logging
+import os
+import time
+
+# Скільки записів одного типу події дозволено за інтервал
+LOG_RATE = int(os.getenv('LOG_RATE_PER_EVENT', '5'))
+LOG_INTERVAL = float(os.getenv('LOG_RATE_INTERVAL', '10'))
+
+
+def format_fields(fields) -> str:
+    return ' '.join(f"{key}={value}" for key, value in fields.items())
+
+
+class RateLimitedLogger:
+    """Логер, що обмежує кількість записів кожного типу події"""
+
+    def __init__(self, name: str, rate: int = LOG_RATE, interval: float = LOG_INTERVAL):
+        self.logger = logging.getLogger(name)
+        self.rate = rate
+        self.interval = interval
+        # event -> [початок вікна, записано у вікні, пропущено]
+        self._windows = {}
+
+    def _allow(self, event: str):
+        now = time.monotonic()
+        window = self._windows.get(event)
+        if window is None or now - window[0] >= self.interval:
+            suppressed = window[2] if window is not None else 0
+            self._windows[event] = [now, 1, 0]
+            return True, suppressed
+        if window[1] < self.rate:
+            window[1] += 1
+            return True, 0
+        window[2] += 1
+        return False, 0
+
+    def log(self, level: int, event: str, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        allowed, suppressed = self._allow(event)
+        if not allowed:
+            return
+        if suppressed:
+            fields['suppressed'] = suppressed
+        self.logger.log(level, "%s %s", event, format_fields(fields))
+
+    def debug(self, event: str, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+
+def get_logger(name: str) -> RateLimitedLogger:
+    return RateLimitedLogger(name)
@@ -0,0 +1,114 @@
+"""
+Компактний стан телеметрії турбін для Faust таблиць
+
+Замість списків словників з datetime-об'єктами кожна турбіна зберігає
+панелі hopping-вікна (PaneState, паралельні колонки array('d')), тому
+пам'ять на турбіну обмежена кількістю панелей. Також зберігаються
+партиція турбіни та кінець останнього фіналізованого вікна (для
+event-time вікон). Сирі вимірювання не зберігаються: кожен запис у
+таблицю кодує лише панелі, а не всю історію турбіни.
+Для changelog-топіку таблиці зареєстровано бінарний кодек 'device_state'
+без JSON та без datetime.
+"""
+
+import struct
+import sys
+from array import array
+from faust.serializers import codecs
+from windowing import POWER_WINDOW, PaneState, add_sample, pane_start_for
+
+# Заголовок: magic, версія, к-сть панелей, партиція, кінець останнього фіналізованого вікна
+_HEADER = struct.Struct('<2sBHid')
+# Заголовок версії 2 (з кільцевим буфером історії, що йшов після панелей)
+_HEADER_V2 = struct.Struct('<2sBHIIid')
+_MAGIC = b'DS'
+_VERSION = 3
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+class DeviceTelemetryState:
+    """Стан однієї турбіни: панелі вікна та прогрес фіналізації"""
+
+    __slots__ = ('panes', 'partition', 'finalized_end')
+
+    def __init__(self, panes: PaneState = None, partition: int = -1, finalized_end: float = 0.0):
+        self.panes = panes if panes is not None else PaneState()
+        self.partition = partition  # -1: партиція ще невідома
+        self.finalized_end = finalized_end
+
+    def accepts(self, timestamp: float, window=POWER_WINDOW) -> bool:
+        """
+        Чи можна ще врахувати подію з таким часом
+
+        Подія запізнилася, якщо її панель уже увійшла у фіналізоване вікно.
+        """
+        return pane_start_for(timestamp, window) >= self.finalized_end
+
+    def record(self, timestamp: float, value: float, window=POWER_WINDOW):
+        """Враховує нове вимірювання у панелях"""
+        add_sample(self.panes, timestamp, value, window)
+        return self
+
+
+def new_device_state() -> DeviceTelemetryState:
+    """Порожній стан турбіни (default для Faust таблиці)"""
+    return DeviceTelemetryState()
+
+
+def _pack_column(column: array) -> bytes:
+    if not _LITTLE_ENDIAN:
+        column = array('d', column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _unpack_column(data: bytes) -> array:
+    column = array('d')
+    column.frombytes(data)
+    if not _LITTLE_ENDIAN:
+        column.byteswap()
+    return column
+
+
+def encode_device_state(state: DeviceTelemetryState) -> bytes:
+    """Бінарне кодування стану: заголовок + колонки панелей float64 (little-endian)"""
+    parts = [_HEADER.pack(_MAGIC, _VERSION, len(state.panes), state.partition, state.finalized_end)]
+    parts.extend(_pack_column(column) for column in state.panes.columns())
+    return b''.join(parts)
+
+
+def decode_device_state(data: bytes) -> DeviceTelemetryState:
+    """
+    Відновлює стан турбіни з бінарного представлення
+
+    Записи версії 2 (ще в changelog'у до компакції) читаються без історії.
+    """
+    magic, version = data[:2], data[2]
+    if magic != _MAGIC or version not in (2, _VERSION):
+        raise ValueError(f"Невідомий формат стану турбіни: {magic!r} v{version}")
+    if version == 2:
+        _, _, pane_count, _, _, partition, finalized_end = _HEADER_V2.unpack_from(data)
+        offset = _HEADER_V2.size
+    else:
+        _, _, pane_count, partition, finalized_end = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+
+    panes = PaneState()
+    pane_bytes = 8 * pane_count
+    for name in PaneState.__slots__:
+        setattr(panes, name, _unpack_column(data[offset:offset + pane_bytes]))
+        offset += pane_bytes
+    return DeviceTelemetryState(panes, partition, finalized_end)
+
+
+class DeviceStateCodec(codecs.Codec):
+    """Faust кодек для DeviceTelemetryState"""
+
+    def _dumps(self, obj) -> bytes:
+        return encode_device_state(obj)
+
+    def _loads(self, s: bytes) -> DeviceTelemetryState:
+        return decode_device_state(s)
+
+
+codecs.register('device_state', DeviceStateCodec())
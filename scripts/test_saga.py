@@ -1,9 +1,10 @@
 import asyncio
-from shared_setup import app
+from shared_setup import app, device_topic
 from models import CurtailmentRequest, CancelCurtailment
 
-curtailment_requests_topic = app.topic('curtailment_requests', value_type=CurtailmentRequest)
-cancel_curtailment_topic = app.topic('cancel_curtailment', value_type=CancelCurtailment)
+# Ключ - device_id: запити турбіни потрапляють в партицію з її станом
+curtailment_requests_topic = device_topic('curtailment_requests', CurtailmentRequest)
+cancel_curtailment_topic = device_topic('cancel_curtailment', CancelCurtailment)
 
 
 @app.task
@@ -15,14 +16,14 @@ async def test_saga():
     # Тест 1: Відправляємо curtailment request
     print("\n1. Відправка curtailment request для WIND_ZP_001...")
     request = CurtailmentRequest(device_id="WIND_ZP_001", reason="Grid overload")
-    await curtailment_requests_topic.send(value=request)
+    await curtailment_requests_topic.send(key=request.device_id, value=request)
     print(f"📤 Відправлено curtailment request: {request.device_id} | Reason: {request.reason}")
     await asyncio.sleep(3)
     
     # Тест 2: Відправляємо cancel curtailment
     print("\n2. Відправка cancel curtailment для WIND_ZP_001...")
     cancel = CancelCurtailment(device_id="WIND_ZP_001", reason="Grid stabilized")
-    await cancel_curtailment_topic.send(value=cancel)
+    await cancel_curtailment_topic.send(key=cancel.device_id, value=cancel)
     print(f"📤 Відправлено cancel curtailment: {cancel.device_id} | Reason: {cancel.reason or 'N/A'}")
     await asyncio.sleep(3)
     
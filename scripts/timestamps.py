@@ -0,0 +1,32 @@
+"""
+Мітки часу подій як epoch мілісекунди (int)
+
+Усередині системи час події передається та зберігається цілим числом
+мілісекунд: у моделях, вікнах та при записі в Cassandra (драйвер приймає
+int для колонок TIMESTAMP). ISO-рядки з'являються лише на вході (старі
+повідомлення з полем timestamp) та при виводі.
+"""
+
+import time
+from datetime import datetime, timezone
+
+
+def now_ms() -> int:
+    """Поточний час, epoch мілісекунди"""
+    return time.time_ns() // 1_000_000
+
+
+def iso_to_ms(timestamp: str) -> int:
+    """ISO-мітка часу (з суфіксом 'Z' або без, без зони - UTC) в epoch мілісекунди"""
+    if timestamp.endswith('Z'):
+        timestamp = timestamp[:-1]
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return round(parsed.timestamp() * 1000)
+
+
+def ms_to_iso(timestamp_ms: int) -> str:
+    """Epoch мілісекунди в ISO-рядок UTC для виводу"""
+    parsed = datetime.fromtimestamp(timestamp_ms / 1000.0, tz=timezone.utc)
+    return parsed.replace(tzinfo=None).isoformat(timespec='milliseconds') + 'Z'
@@ -0,0 +1,244 @@
+"""
+Стиснення окремих повідомлень zstd з натренованим словником
+
+Записи телеметрії малі (~270 байт JSON) та майже однакові за структурою:
+ті самі імена полів, device_id, ns моделі. Стиснення одного такого
+повідомлення без контексту дає ~1.3x, а broker/batch-стиснення Kafka
+допомагає лише тоді, коли producer встигає зібрати batch (великий
+linger_ms). Для топіків з малою затримкою кожне повідомлення стискається
+окремо словником zstd, натренованим на прикладах телеметрії (~4.5x).
+
+Словники - версійовані артефакти в каталозі dictionaries/ (або
+ZSTD_DICT_DIR), registry.json перелічує їх версії:
+    [{"name": "turbine_telemetry", "version": 1, "dict_id": ..., "file": "..."}]
+
+dict_id записується zstd у заголовок кожного кадру, тому consumer
+розпаковує повідомлення словником, яким воно стиснене, навіть після
+появи новішої версії. Повідомлення без заголовка zstd (звичайний JSON)
+повертаються як є - producer'и можна переводити на словник поступово.
+
+Кодек реєструється у Faust як 'zdict' і поєднується з JSON через
+FAUST_TOPIC_SERIALIZERS, напр. turbine_telemetry=json|zdict
+(див. shared_setup.py).
+
+Тренування нової версії словника та порівняння збереженого словника
+(остання або --version) з zstd, lz4 і snappy:
+    python zstd_dict.py train --samples 20000
+    python zstd_dict.py bench --messages 50000
+"""
+
+import json
+import os
+
+import zstandard as zstd
+from faust.serializers import codecs
+
+DICT_DIR = os.getenv('ZSTD_DICT_DIR', os.path.join(os.path.dirname(__file__), 'dictionaries'))
+INDEX_FILE = 'registry.json'
+# Словник, яким кодек 'zdict' стискає нові повідомлення
+DICT_NAME = os.getenv('ZSTD_DICT_NAME', 'turbine_telemetry')
+DICT_LEVEL = int(os.getenv('ZSTD_DICT_LEVEL', '3'))
+DEFAULT_DICT_SIZE = 8192
+# Магічні байти кадру zstd (0xFD2FB528, little-endian)
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+class DictionaryStore:
+    """Версійовані словники zstd поверх каталогу з .zdict файлами"""
+
+    def __init__(self, directory: str = DICT_DIR):
+        self.directory = directory
+        self._by_id = {}
+        self._latest = {}
+        self._entries = []
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                self._entries = json.load(f)
+        for entry in self._entries:
+            with open(os.path.join(directory, entry['file']), 'rb') as f:
+                dictionary = zstd.ZstdCompressionDict(f.read())
+            self._add(entry, dictionary)
+
+    def _add(self, entry: dict, dictionary: zstd.ZstdCompressionDict):
+        self._by_id[entry['dict_id']] = dictionary
+        latest = self._latest.get(entry['name'])
+        if latest is None or entry['version'] > latest[0]:
+            self._latest[entry['name']] = (entry['version'], dictionary)
+
+    def get(self, dict_id: int) -> zstd.ZstdCompressionDict:
+        """Словник за dict_id з заголовка кадру zstd"""
+        try:
+            return self._by_id[dict_id]
+        except KeyError:
+            raise KeyError(f"Словник з dict_id={dict_id} не знайдено в {self.directory}") from None
+
+    def latest(self, name: str):
+        """Остання версія словника: (версія, ZstdCompressionDict)"""
+        try:
+            return self._latest[name]
+        except KeyError:
+            raise KeyError(f"Немає словника {name!r} в {self.directory}; "
+                           f"натренуйте його: python zstd_dict.py train --name {name}") from None
+
+    def version(self, name: str, version: int) -> zstd.ZstdCompressionDict:
+        """Словник name заданої версії з реєстру"""
+        for entry in self._entries:
+            if entry['name'] == name and entry['version'] == version:
+                return self._by_id[entry['dict_id']]
+        raise KeyError(f"Немає словника {name!r} v{version} в {self.directory}")
+
+    def train(self, name: str, samples, dict_size: int = DEFAULT_DICT_SIZE):
+        """
+        Тренує нову версію словника на прикладах повідомлень і зберігає її
+
+        Повертає (версія, ZstdCompressionDict).
+        """
+        dictionary = zstd.train_dictionary(dict_size, list(samples), threads=-1)
+        if dictionary.dict_id() in self._by_id:
+            raise ValueError(f"dict_id={dictionary.dict_id()} вже зареєстрований, повторіть тренування")
+        latest = self._latest.get(name)
+        version = latest[0] + 1 if latest else 1
+
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {'name': name, 'version': version, 'dict_id': dictionary.dict_id(),
+                 'file': f"{name}.v{version}.zdict"}
+        with open(os.path.join(self.directory, entry['file']), 'wb') as f:
+            f.write(dictionary.as_bytes())
+        self._entries.append(entry)
+        with open(os.path.join(self.directory, INDEX_FILE), 'w', encoding='utf-8') as f:
+            f.write('[\n' + ',\n'.join(f"  {json.dumps(item)}" for item in self._entries) + '\n]\n')
+
+        self._add(entry, dictionary)
+        return version, dictionary
+
+
+class DictCompressor:
+    """Стиснення повідомлень останньою версією словника, розпакування - за dict_id кадру"""
+
+    def __init__(self, store: DictionaryStore, name: str = DICT_NAME, level: int = DICT_LEVEL):
+        self.store = store
+        self.version, dictionary = store.latest(name)
+        # Контексти створюються один раз: словник готується під рівень лише при створенні
+        self._compressor = zstd.ZstdCompressor(level=level, dict_data=dictionary)
+        self._decompressors = {}
+
+    def compress(self, payload: bytes) -> bytes:
+        return self._compressor.compress(payload)
+
+    def decompress(self, data: bytes) -> bytes:
+        if not data.startswith(ZSTD_MAGIC):
+            return data  # повідомлення без стиснення
+        dict_id = zstd.get_frame_parameters(data).dict_id
+        decompressor = self._decompressors.get(dict_id)
+        if decompressor is None:
+            dictionary = self.store.get(dict_id) if dict_id else None
+            decompressor = zstd.ZstdDecompressor(dict_data=dictionary)
+            self._decompressors[dict_id] = decompressor
+        return decompressor.decompress(data)
+
+
+class ZstdDictCodec(codecs.Codec):
+    """
+    Faust кодек 'zdict'
+
+    Стискає вже серіалізовані байти, тому використовується після іншого
+    кодека: 'json|zdict'. Словники завантажуються при першому
+    повідомленні, тому без каталогу словників імпорт модуля не падає.
+    """
+
+    def __init__(self, compressor: DictCompressor = None, **kwargs):
+        self._compressor = compressor
+        super().__init__(**kwargs)
+
+    @property
+    def compressor(self) -> DictCompressor:
+        if self._compressor is None:
+            self._compressor = DictCompressor(DictionaryStore())
+        return self._compressor
+
+    def _dumps(self, obj: bytes) -> bytes:
+        return self.compressor.compress(obj)
+
+    def _loads(self, s: bytes) -> bytes:
+        return self.compressor.decompress(s)
+
+
+codecs.register('zdict', ZstdDictCodec())
+
+
+def telemetry_messages(count: int, seed: int):
+    """Записи TurbineTelemetry у JSON-представленні Faust (як у топіку turbine_telemetry)"""
+    from bulk_gen import BulkTelemetryGenerator, TELEMETRY_FIELDS, iter_rows
+    from models import TurbineTelemetry
+
+    generator = BulkTelemetryGenerator(150, seed=seed, rated_power=2500.0)
+    return [TurbineTelemetry(*row).dumps(serializer='json')
+            for row in iter_rows(generator.batch(count), TELEMETRY_FIELDS, decimals=2)]
+
+
+def read_messages(path: str):
+    """Повідомлення з файлу JSON Lines (напр. wind_1000.json)"""
+    with open(path, 'rb') as f:
+        return [line.rstrip(b'\n') for line in f if line.strip()]
+
+
+def train(args):
+    samples = read_messages(args.input) if args.input else telemetry_messages(args.samples, args.seed)
+    store = DictionaryStore()
+    print(f"🧠 Тренування словника {args.name!r} на {len(samples)} повідомленнях...")
+    version, dictionary = store.train(args.name, samples, args.dict_size)
+    print(f"✅ {args.name} v{version}: dict_id={dictionary.dict_id()}, "
+          f"{len(dictionary)} байт -> {store.directory}")
+
+
+def bench(args):
+    """Стиснення окремих повідомлень: збережений словник vs zstd, lz4, snappy без словника"""
+    from compression_bench import measure, parse_codecs, print_header, print_row
+
+    # Вимірюється той самий словник, яким стискає кодек 'zdict', а не щойно натренований
+    store = DictionaryStore()
+    if args.version is None:
+        version, dictionary = store.latest(args.name)
+    else:
+        version, dictionary = args.version, store.version(args.name, args.version)
+    # Тестові повідомлення - інший потік, ніж приклади train (seed + 1)
+    messages = read_messages(args.input) if args.input else telemetry_messages(args.messages, args.seed + 1)
+
+    baseline = parse_codecs(['none', 'zstd:1,3', 'lz4:0', 'snappy'])
+    print(f"🧪 {len(messages)} повідомлень, {sum(map(len, messages)) / len(messages):.0f} байт в середньому; "
+          f"словник {args.name} v{version} (dict_id={dictionary.dict_id()}, {len(dictionary)} байт)")
+    print_header()
+
+    payloads = [(message, 1) for message in messages]
+    for name, level in baseline:
+        print_row("msg", measure(name, level, payloads, len(messages)))
+    for level in (1, 3, 9):
+        compressor = zstd.ZstdCompressor(level=level, dict_data=dictionary)
+        decompressor = zstd.ZstdDecompressor(dict_data=dictionary)
+        result = measure('zdict', level, payloads, len(messages),
+                         codec=(compressor.compress, decompressor.decompress))
+        print_row("msg", result)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Словники zstd для окремих повідомлень телеметрії")
+    parser.add_argument('command', choices=['train', 'bench'])
+    parser.add_argument('--name', default=DICT_NAME)
+    parser.add_argument('--version', type=int, help="версія словника для bench (за замовчуванням - остання)")
+    parser.add_argument('--input', help="файл JSON Lines з повідомленнями замість записів TurbineTelemetry")
+    parser.add_argument('--samples', type=int, default=20000, help="кількість прикладів для тренування")
+    parser.add_argument('--messages', type=int, default=50000, help="кількість повідомлень для bench")
+    parser.add_argument('--dict-size', type=int, default=DEFAULT_DICT_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    if args.command == 'train':
+        train(args)
+    else:
+        bench(args)
+
+
+if __name__ == '__main__':
+    main()